@@ -0,0 +1,125 @@
+# benchmark_blending.py
+"""
+Vergelijkt de alpha-blending van de auto-afbeeldingen voor verschillende sprite-groottes.
+
+Per sprite-grootte wordt gemeten (gemiddelde tijd per blend, in-place in een ROI van een
+compositie-frame):
+  - float64: de oude implementatie van overlay_image (masker / 255.0, np.dstack, casten),
+  - numpy uint16: vaste-komma met voorvermenigvuldigde alpha en vooraf gealloceerde
+    uint16-buffers (exacte deling door 255 via (t + (t >> 8)) >> 8),
+  - kernel: image_utils.blend_premultiplied (uint8, cv2.multiply/cv2.add in-place).
+
+Daarnaast de grootste afwijking t.o.v. blenden in float64 (zonder afkappen) en het aantal
+bytes dat NumPy per blend tijdelijk alloceert (tracemalloc).
+
+Gebruik:
+    python benchmark_blending.py
+"""
+import time
+import tracemalloc
+
+import numpy as np
+
+from image_utils import blend_premultiplied
+from sprite_cache import Sprite
+
+SPRITE_SIZES = [(32, 24), (64, 48), (128, 96), (256, 192), (640, 480)]
+FRAME_SHAPE = (580, 1040, 3)
+REPEATS = 200
+
+
+def make_sprite(width, height, rng):
+    """
+    Maakt een BGRA-sprite met een ondoorzichtige kern, een zachte rand en een transparante omgeving.
+    """
+    image = rng.integers(0, 256, (height, width, 4), dtype=np.uint8)
+    ys, xs = np.mgrid[0:height, 0:width]
+    radius = np.hypot((xs - width / 2) / (width / 2), (ys - height / 2) / (height / 2))
+    image[:, :, 3] = np.clip((1.2 - radius) * 400, 0, 255).astype(np.uint8)
+    return image
+
+
+def blend_float64(roi, overlay):
+    # De oude implementatie uit overlay_image
+    overlay_bgr = overlay[:, :, :3]
+    alpha_mask = overlay[:, :, 3] / 255.0
+    alpha_mask = np.dstack([alpha_mask] * 3)
+    roi[:] = (overlay_bgr * alpha_mask + roi * (1 - alpha_mask)).astype(roi.dtype)
+
+
+class Uint16Blender:
+    """
+    Vaste-komma blending in NumPy met vooraf gealloceerde uint16-buffers.
+    """
+
+    def __init__(self, shape):
+        self.product = np.empty(shape, dtype=np.uint16)
+        self.shifted = np.empty(shape, dtype=np.uint16)
+
+    def blend(self, roi, premultiplied, inverse_alpha):
+        t = self.product
+        np.multiply(roi, inverse_alpha, out=t, dtype=np.uint16)
+        t += 128
+        np.right_shift(t, 8, out=self.shifted)
+        t += self.shifted
+        t >>= 8
+        t += premultiplied
+        np.copyto(roi, t, casting="unsafe")
+
+
+def reference(roi, overlay):
+    alpha = overlay[:, :, 3:] / 255.0
+    return overlay[:, :, :3] * alpha + roi * (1.0 - alpha)
+
+
+def measure(func, frame, roi_slice, original):
+    frame[roi_slice] = original
+    start = time.perf_counter()
+    for _ in range(REPEATS):
+        func()
+    elapsed = (time.perf_counter() - start) / REPEATS * 1e6
+
+    # Tijdelijke NumPy-allocaties van één blend
+    frame[roi_slice] = original
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def run_benchmark():
+    rng = np.random.default_rng(7)
+    frame = rng.integers(0, 256, FRAME_SHAPE, dtype=np.uint8)
+
+    print(f"{'sprite':>9} {'float64 (us)':>13} {'uint16 (us)':>12} {'kernel (us)':>12} "
+          f"{'versnelling':>12} {'fout':>5} {'alloc float64':>14} {'alloc kernel':>13}")
+    for width, height in SPRITE_SIZES:
+        overlay = make_sprite(width, height, rng)
+        sprite = Sprite.from_image(overlay)
+        roi_slice = (slice(40, 40 + height), slice(200, 200 + width))
+        roi = frame[roi_slice]
+        original = roi.copy()
+        blender = Uint16Blender(roi.shape)
+
+        # Nauwkeurigheid t.o.v. float64 zonder afkappen
+        expected = reference(original.astype(np.float64), overlay)
+        errors = []
+        for func in (lambda: blender.blend(roi, sprite.premultiplied, sprite.inverse_alpha),
+                     lambda: blend_premultiplied(roi, sprite.premultiplied, sprite.inverse_alpha)):
+            roi[:] = original
+            func()
+            errors.append(float(np.abs(roi - expected).max()))
+
+        float_us, float_alloc = measure(lambda: blend_float64(roi, overlay), frame, roi_slice, original)
+        uint16_us, _ = measure(lambda: blender.blend(roi, sprite.premultiplied, sprite.inverse_alpha),
+                               frame, roi_slice, original)
+        kernel_us, kernel_alloc = measure(lambda: blend_premultiplied(roi, sprite.premultiplied, sprite.inverse_alpha),
+                                          frame, roi_slice, original)
+
+        print(f"{width:>4}x{height:<4} {float_us:>13.1f} {uint16_us:>12.1f} {kernel_us:>12.1f} "
+              f"{float_us / kernel_us:>11.1f}x {max(errors):>5.1f} {float_alloc:>14} {kernel_alloc:>13}")
+
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,114 @@
+# benchmark_process_detection.py
+"""
+Meet de doorvoer van markerdetectie met threads en met een pool van processen, per aantal cores.
+
+Op vooraf gerenderde synthetische racebeelden (grijswaarden, zie synthetic_race.py) wordt de
+detectie-fps gemeten voor:
+  - threads: N threads die één detector delen (de detect-workers van de RacePipeline),
+  - processen: een ProcessPoolDetector met N processen (frames via gedeeld geheugen) en N
+    threads die er frames aan aanbieden.
+Daarnaast: of de processen dezelfde markers vinden als de detector in het hoofdproces, en
+hoeveel bytes er per frame heen (naar gedeeld geheugen) en terug (gepickled resultaat) gaan.
+
+Op een machine met één core laten de processen geen versnelling zien, alleen de overhead.
+
+Gebruik:
+    python benchmark_process_detection.py
+    python benchmark_process_detection.py --mode roi --frame-size 1280x720 --max-workers 8
+"""
+import argparse
+import os
+import pickle
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+
+from config import DETECTION_CONFIG, MARKER_REAL_WIDTH, FOCAL_LENGTH
+from marker_detection import create_marker_detector
+from process_detection import pack_detection
+from synthetic_race import SyntheticRaceGenerator
+
+NUM_FRAMES = 60
+ROUNDS = 3
+
+
+def render_frames(frame_size, num_cars):
+    generator = SyntheticRaceGenerator(num_cars=num_cars, frame_size=frame_size, fps=30.0, speed=600.0,
+                                       noise_sigma=4.0, seed=1)
+    frames = []
+    for _, frame in generator.frames(NUM_FRAMES / generator.fps):
+        frames.append(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY))
+    return frames
+
+
+def make_detector(config):
+    aruco_dict = cv2.aruco.getPredefinedDictionary(cv2.aruco.DICT_4X4_50)
+    parameters = cv2.aruco.DetectorParameters()
+    return create_marker_detector(aruco_dict, parameters, config, MARKER_REAL_WIDTH, FOCAL_LENGTH)
+
+
+def measure_fps(detector, frames, workers):
+    """
+    Detecteert alle frames ROUNDS keer met workers threads; geeft de beste fps en de resultaten.
+    """
+    best = 0.0
+    results = None
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(detector.detect, frames[:workers]))  # Opwarmen (en de pool starten)
+        for _ in range(ROUNDS):
+            start = time.perf_counter()
+            results = list(pool.map(detector.detect, frames))
+            best = max(best, len(frames) / (time.perf_counter() - start))
+    return best, results
+
+
+def found_ids(results):
+    return [set() if ids is None else {int(i) for i in ids.flatten()} for _, ids in results]
+
+
+def run_benchmark(frame_size, num_cars, mode, max_workers):
+    frames = render_frames(frame_size, num_cars)
+    thread_config = dict(DETECTION_CONFIG, mode=mode, backend="thread")
+
+    # Referentie: de detector in het hoofdproces
+    reference = found_ids([make_detector(thread_config).detect(frame) for frame in frames])
+    reference_bytes = len(pickle.dumps(pack_detection(*make_detector(thread_config).detect(frames[0]))))
+
+    counts = [1]
+    while counts[-1] * 2 <= max_workers:
+        counts.append(counts[-1] * 2)
+
+    print(f"{frame_size[0]}x{frame_size[1]}, {num_cars} auto's, modus {mode}, {os.cpu_count()} core(s)")
+    print(f"per frame: {frames[0].nbytes} bytes naar gedeeld geheugen, {reference_bytes} bytes terug")
+    print(f"{'workers':>8} {'threads fps':>12} {'processen fps':>14} {'versnelling':>12} {'zelfde markers':>15}")
+    base_fps = None
+    for workers in counts:
+        thread_fps, _ = measure_fps(make_detector(thread_config), frames, workers)
+
+        detector = make_detector(dict(thread_config, backend="process", processes=workers))
+        try:
+            process_fps, results = measure_fps(detector, frames, workers)
+        finally:
+            detector.close()
+        same = found_ids(results) == reference if mode == "full" else "n.v.t."
+
+        if base_fps is None:
+            base_fps = thread_fps
+        print(f"{workers:>8} {thread_fps:>12.1f} {process_fps:>14.1f} {process_fps / base_fps:>11.2f}x {str(same):>15}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--frame-size", default="1920x1080", help="Beeldgrootte als BREEDTExHOOGTE")
+    parser.add_argument("--cars", type=int, default=8, help="Aantal auto's")
+    parser.add_argument("--mode", choices=["full", "roi"], default="full", help="Detectiemodus")
+    parser.add_argument("--max-workers", type=int, default=max(os.cpu_count() or 1, 2),
+                        help="Grootste aantal threads/processen")
+    args = parser.parse_args()
+    width, height = (int(v) for v in args.frame_size.lower().split("x"))
+    run_benchmark((width, height), args.cars, args.mode, args.max_workers)
+
+
+if __name__ == "__main__":
+    main()
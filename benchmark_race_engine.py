@@ -0,0 +1,79 @@
+# benchmark_race_engine.py
+"""
+Meet de doorvoer van de RaceEngine (headless, zonder OpenCV): waarnemingen per seconde.
+
+Een aantal auto's rijdt met verschillende snelheden over de centerline van PATH_POINTS. Alle
+waarnemingen (timestamp, marker_id, x, y) worden eerst opgebouwd en daarna in één keer door
+RaceEngine.observe_many gehaald, met een ranking-update per frame.
+
+Gebruik:
+    python benchmark_race_engine.py
+"""
+import time
+
+import numpy as np
+
+from config import PATH_POINTS, FINISH_ZONE, CHECKPOINT_ZONE
+from race_engine import RaceEngine
+
+CAR_COUNTS = [2, 8, 32]
+NUM_FRAMES = 3000
+FPS = 30.0
+
+
+class BenchmarkCar:
+    """
+    Minimale auto met alleen de attributen die de RaceEngine gebruikt.
+    """
+
+    def __init__(self, marker_id):
+        self.marker_id = marker_id
+        self.passed_checkpoint = False
+        self.lap_count = 0
+        self.last_lap_time = None
+        self.fastest_lap = None
+        self.finished = False
+        self.finish_time = None
+        self.final_position = None
+        self.position = None
+        self.progress = 0.0
+        self.track_distance = None
+        self.segment_index = None
+        self.last_seen_point = None
+        self.last_seen_time = None
+        self.x = None
+        self.y = None
+
+
+def make_observations(engine, num_cars, rng):
+    speeds = rng.uniform(400.0, 700.0, num_cars)  # pixels per seconde
+    offsets = rng.uniform(0.0, 50.0, num_cars)
+    observations = []
+    for frame in range(NUM_FRAMES):
+        t = frame / FPS
+        points, _ = engine.geometry.point_at(offsets + speeds * t)
+        points += rng.normal(0.0, 0.5, points.shape)
+        for marker_id, (x, y) in enumerate(points.tolist()):
+            observations.append((t, marker_id, x, y))
+    return observations
+
+
+def run_benchmark():
+    rng = np.random.default_rng(3)
+    print(f"{'auto':>5} {'waarnemingen':>13} {'obs/s':>10} {'laps':>6} {'events':>7}")
+    for num_cars in CAR_COUNTS:
+        cars = {marker_id: BenchmarkCar(marker_id) for marker_id in range(num_cars)}
+        engine = RaceEngine.from_track(cars, PATH_POINTS, FINISH_ZONE, CHECKPOINT_ZONE, total_laps=10 ** 6)
+        observations = make_observations(engine, num_cars, rng)
+        engine.start(0.0)
+
+        start = time.perf_counter()
+        events = engine.observe_many(observations)
+        elapsed = time.perf_counter() - start
+
+        laps = sum(1 for event in events if event.type == "lap")
+        print(f"{num_cars:>5} {len(observations):>13} {len(observations) / elapsed:>10.0f} {laps:>6} {len(events):>7}")
+
+
+if __name__ == "__main__":
+    run_benchmark()
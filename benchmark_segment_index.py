@@ -0,0 +1,107 @@
+# benchmark_segment_index.py
+"""
+Vergelijkt de brute-force projectie op de centerline met de SegmentGrid, voor banen met
+steeds meer punten (zoals een getraceerde baan met duizenden punten).
+
+Per baangrootte worden gemeten (gemiddelde tijd per auto-positie):
+  - brute force: alle segmenten in één NumPy-broadcast.
+  - grid: alleen segmenten in de cellen rond het punt.
+  - grid + hint: idem, met het segment van de vorige positie als temporele hint.
+De kolom "hint" is grid gedeeld door grid + hint (onder 1.0x maakt de hint het trager).
+
+Gebruik:
+    python benchmark_segment_index.py
+"""
+import time
+import numpy as np
+
+from config import PATH_POINTS
+from track_geometry import TrackGeometry
+
+TRACK_SIZES = [16, 128, 1000, 5000, 20000]
+NUM_CARS = 12
+NUM_FRAMES = 50
+ROUNDS = 5
+
+
+def make_dense_track(num_points):
+    """
+    Maakt een dichte, gesloten centerline door PATH_POINTS lineair te herbemonsteren tot
+    ongeveer num_points punten, met een kleine golving zoals bij een getraceerde baan.
+    """
+    points = np.asarray(PATH_POINTS, dtype=np.float64)
+    lengths = np.linalg.norm(np.diff(points, axis=0), axis=1)
+    cum = np.concatenate(([0.0], np.cumsum(lengths)))
+    samples = np.linspace(0.0, cum[-1], num_points)
+    xs = np.interp(samples, cum, points[:, 0])
+    ys = np.interp(samples, cum, points[:, 1])
+    wobble = 2.0 * np.sin(samples / 7.0)
+    return np.column_stack((xs + wobble, ys - wobble))
+
+
+def make_car_trajectories(geometry, rng):
+    """
+    Laat NUM_CARS auto's NUM_FRAMES frames langs de baan rijden, met wat ruis rond de centerline.
+    """
+    total = geometry.total_length
+    starts = rng.uniform(0.0, total, NUM_CARS)
+    speeds = rng.uniform(3.0, 12.0, NUM_CARS)  # pixels per frame
+    frames = []
+    points = geometry.points
+    for frame in range(NUM_FRAMES):
+        distance = (starts + speeds * frame) % total
+        xs = np.interp(distance, geometry.cum_distances, points[:, 0])
+        ys = np.interp(distance, geometry.cum_distances, points[:, 1])
+        frames.append(np.column_stack((xs, ys)) + rng.normal(0.0, 1.5, (NUM_CARS, 2)))
+    return frames
+
+
+def time_per_position(func, frames, reset=None):
+    """
+    Geeft de beste tijd van ROUNDS rondes (minst verstoord door andere processen).
+    """
+    best = float("inf")
+    for _ in range(ROUNDS):
+        if reset is not None:
+            reset()
+        start = time.perf_counter()
+        for positions in frames:
+            func(positions)
+        best = min(best, time.perf_counter() - start)
+    return best / (len(frames) * NUM_CARS) * 1e6  # microseconden
+
+
+def run_benchmark():
+    rng = np.random.default_rng(42)
+    print(f"{'punten':>8} {'brute (us)':>12} {'grid (us)':>12} {'grid+hint (us)':>15} {'versnelling':>12} "
+          f"{'hint':>6}")
+    for size in TRACK_SIZES:
+        track = make_dense_track(size)
+        brute = TrackGeometry(track, use_index=False)
+        indexed = TrackGeometry(track, use_index=True)
+        frames = make_car_trajectories(brute, rng)
+
+        # Controleer dat de grid exact hetzelfde segment en dezelfde afstand vindt
+        for positions in frames[:5]:
+            _, perp_b, _ = brute.project_points(positions)
+            _, perp_g, _ = indexed.project_points(positions)
+            assert np.allclose(perp_b, perp_g), "SegmentGrid wijkt af van brute force"
+
+        hints = [None] * NUM_CARS
+
+        def reset_hints():
+            hints[:] = [None] * NUM_CARS
+
+        def project_with_hint(positions):
+            _, _, segments = indexed.project_points(positions, hints)
+            hints[:] = segments.tolist()
+
+        brute_us = time_per_position(brute.project_points, frames)
+        grid_us = time_per_position(indexed.project_points, frames)
+        hint_us = time_per_position(project_with_hint, frames, reset_hints)
+        print(f"{size:>8} {brute_us:>12.1f} {grid_us:>12.1f} {hint_us:>15.1f} {brute_us / hint_us:>11.1f}x "
+              f"{grid_us / hint_us:>5.2f}x")
+
+
+if __name__ == "__main__":
+    run_benchmark()
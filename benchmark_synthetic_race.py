@@ -0,0 +1,148 @@
+# benchmark_synthetic_race.py
+"""
+Deterministische end-to-end benchmark op synthetische racebeelden (zie synthetic_race.py).
+
+Per combinatie van resolutie en aantal auto's wordt gemeten:
+  - detectiegraad: gevonden markers / markers in beeld (met de detector uit DETECTION_CONFIG),
+  - detectie-fps: alleen cvtColor + detectie,
+  - lap-nauwkeurigheid: gedetecteerde laps t.o.v. de ground truth, en de gemiddelde
+    afwijking van de lap-tijden,
+  - fps van process_frame (headless replay, zonder het genereren van de beelden).
+
+Gebruik:
+    python benchmark_synthetic_race.py
+    python benchmark_synthetic_race.py --quick
+"""
+import argparse
+import time
+
+import cv2
+import numpy as np
+
+from config import CAR_CONFIG, DETECTION_CONFIG, MARKER_REAL_WIDTH, FOCAL_LENGTH
+from car import Car
+from marker_detection import create_marker_detector
+from race_manager import RaceManager
+from replay import run_replay
+from synthetic_race import SyntheticRaceGenerator
+
+RESOLUTIONS = [(640, 480), (1280, 720), (1920, 1080)]
+CAR_COUNTS = [2, 4, 8, 16]
+SPEED = 600.0  # pixels per seconde
+
+
+def make_benchmark_cars(marker_ids):
+    """
+    Maakt Car-objecten voor de gegeven marker-ID's, met een effen auto-afbeelding (RGBA)
+    en de zijbalkposities van CAR_CONFIG (om de beurt).
+    """
+    settings = list(CAR_CONFIG.values())
+    cars = {}
+    for index, marker_id in enumerate(marker_ids):
+        config = settings[index % len(settings)]
+        image = np.zeros((40, 60, 4), dtype=np.uint8)
+        image[:, :, :3] = config["sidebar_text_color"]
+        image[:, :, 3] = 255
+        car = Car(marker_id, config["sidebar_text_color"], image, config["lap_position_offset"],
+                  config["lap_complete_position_offset"], f"car_{marker_id}")
+        car.username = f"Car {marker_id}"
+        cars[marker_id] = car
+    return cars
+
+
+def measure_detection(generator, duration):
+    """
+    Meet de detectiegraad en de detectie-fps over alle frames van de race.
+    """
+    aruco_dict = cv2.aruco.getPredefinedDictionary(cv2.aruco.DICT_4X4_50)
+    parameters = cv2.aruco.DetectorParameters()
+    detector = create_marker_detector(aruco_dict, parameters, DETECTION_CONFIG, MARKER_REAL_WIDTH, FOCAL_LENGTH)
+
+    expected_ids = {car.marker_id for car in generator.cars}
+    found = 0
+    total = 0
+    detect_time = 0.0
+    frames = 0
+    for _, frame in generator.frames(duration):
+        start = time.perf_counter()
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        _, ids = detector.detect(gray)
+        detect_time += time.perf_counter() - start
+        frames += 1
+        total += len(expected_ids)
+        if ids is not None:
+            found += len(expected_ids.intersection(int(i) for i in ids.flatten()))
+    return found / max(total, 1), frames / max(detect_time, 1e-9)
+
+
+def measure_laps(expected, events, tolerance=0.5):
+    """
+    Vergelijkt de lap-events van de replay met de ground truth.
+
+    Per auto wordt elke verwachte lap gekoppeld aan de dichtstbijzijnde, nog ongebruikte
+    gedetecteerde lap binnen tolerance seconden. Zo telt een gemiste lap maar één keer,
+    ook als de lap-nummers daarna verschoven zijn.
+
+    Returns:
+        tuple: (gekoppelde laps / verwachte laps, gemiddelde absolute afwijking in ms, extra laps)
+    """
+    detected = {}
+    for e in events:
+        if e["type"] == "lap":
+            detected.setdefault(e["marker_id"], []).append(e["time"])
+
+    errors = []
+    for e in expected:
+        candidates = detected.get(e["marker_id"], [])
+        if not candidates:
+            continue
+        nearest = min(range(len(candidates)), key=lambda i: abs(candidates[i] - e["time"]))
+        if abs(candidates[nearest] - e["time"]) <= tolerance:
+            errors.append(abs(candidates.pop(nearest) - e["time"]))
+
+    extra = sum(len(times) for times in detected.values())
+    mean_error = 1000.0 * float(np.mean(errors)) if errors else float("nan")
+    return len(errors) / max(len(expected), 1), mean_error, extra
+
+
+def run_case(frame_size, num_cars, fps, noise, blur, occlusion):
+    def make_generator():
+        return SyntheticRaceGenerator(num_cars=num_cars, frame_size=frame_size, fps=fps, speed=SPEED,
+                                      noise_sigma=noise, blur_size=blur, occlusion_prob=occlusion, seed=1)
+
+    generator = make_generator()
+    duration = generator.race_duration()
+    expected = generator.expected_lap_events(duration)
+    detection_rate, detect_fps = measure_detection(generator, duration)
+
+    # De generator opnieuw aanmaken, zodat de replay exact dezelfde beelden krijgt
+    generator = make_generator()
+    cars = make_benchmark_cars([car.marker_id for car in generator.cars])
+    result = run_replay(generator.frames(duration), cars, RaceManager(), fps=fps, skip_countdown=True)
+    lap_rate, lap_error_ms, extra_laps = measure_laps(expected, result["events"])
+    return detection_rate, detect_fps, lap_rate, lap_error_ms, extra_laps, result["fps"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark op synthetische racebeelden.")
+    parser.add_argument("--quick", action="store_true", help="Alleen 640x480 met 2 en 4 auto's")
+    parser.add_argument("--fps", type=float, default=30.0)
+    parser.add_argument("--noise", type=float, default=4.0)
+    parser.add_argument("--blur", type=int, default=5)
+    parser.add_argument("--occlusion", type=float, default=0.02)
+    args = parser.parse_args()
+
+    resolutions = RESOLUTIONS[:1] if args.quick else RESOLUTIONS
+    car_counts = CAR_COUNTS[:2] if args.quick else CAR_COUNTS
+
+    print(f"{'resolutie':>10} {'auto':>4} {'detectie':>9} {'det-fps':>8} {'laps':>6} {'fout (ms)':>9} {'extra':>5} {'fps':>7}")
+    for frame_size in resolutions:
+        for num_cars in car_counts:
+            detection_rate, detect_fps, lap_rate, lap_error_ms, extra, fps = run_case(
+                frame_size, num_cars, args.fps, args.noise, args.blur, args.occlusion)
+            print(f"{frame_size[0]:>4}x{frame_size[1]:<5} {num_cars:>4} {detection_rate:>8.1%} {detect_fps:>8.1f} "
+                  f"{lap_rate:>6.0%} {lap_error_ms:>9.1f} {extra:>5} {fps:>7.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+# camera_capture.py
+import threading
+import time
+from collections import deque
+
+from perf_stats import perf
+import race_clock
+
+# Beschikbare policies als de framequeue vol is
+DROP_OLDEST = "drop_oldest"   # Gooi het oudste frame in de queue weg en voeg het nieuwe toe
+LATEST_ONLY = "latest_only"   # Houd alleen het nieuwste frame over (queue wordt geleegd)
+
+
+class CapturedFrame:
+    """
+    Eén camera-frame met het volgnummer en het tijdstip waarop het is vastgelegd.
+
+    Attributen:
+        seq (int): Oplopend volgnummer van het frame (vanaf 1).
+        timestamp (float): Tijdstip (volgens de klok van de CaptureThread) direct na cap.read().
+        image (numpy.ndarray): Het camerabeeld (BGR).
+    """
+    __slots__ = ("seq", "timestamp", "image")
+
+    def __init__(self, seq, timestamp, image):
+        self.seq = seq
+        self.timestamp = timestamp
+        self.image = image
+
+
+class CaptureThread(threading.Thread):
+    """
+    Leest frames van een cv2.VideoCapture in een eigen thread en zet ze in een begrensde queue.
+
+    Zo blokkeert een trage verwerking (detectie, overlays, imshow) het uitlezen van de camera
+    niet, en krijgt elk frame een timestamp van het moment van vastleggen in plaats van het
+    moment van verwerken. Als de queue vol is, bepaalt de policy welk frame vervalt:
+      - DROP_OLDEST: het oudste frame wordt weggegooid.
+      - LATEST_ONLY: alleen het nieuwste frame blijft over (laagste latency).
+
+    Mislukte reads worden niet in een busy-loop herhaald: de thread wacht read_retry_delay
+    seconden (oplopend bij herhaalde fouten, tot max. 0.5 s) voor een nieuwe poging.
+    """
+
+    def __init__(self, cap, queue_size=2, policy=DROP_OLDEST, read_retry_delay=0.01, clock=None):
+        """
+        Args:
+            cap (cv2.VideoCapture): De (geopende) camera.
+            queue_size (int): Maximaal aantal frames dat op verwerking wacht.
+            policy (str): DROP_OLDEST of LATEST_ONLY.
+            read_retry_delay (float): Wachttijd (s) na een mislukte read.
+            clock: De klok voor de timestamps (standaard race_clock.get_clock()).
+        """
+        super().__init__(name="CaptureThread", daemon=True)
+        if policy not in (DROP_OLDEST, LATEST_ONLY):
+            raise ValueError(f"Onbekende capture-policy: {policy}")
+        self.cap = cap
+        self.policy = policy
+        self.queue_size = max(1, queue_size)
+        self.read_retry_delay = read_retry_delay
+        self.clock = clock if clock is not None else race_clock.get_clock()
+
+        self._frames = deque()
+        self._condition = threading.Condition()
+        self._stop_event = threading.Event()
+
+        # Statistieken
+        self.captured = 0
+        self.dropped = 0
+        self.read_failures = 0
+        self.max_queue_depth = 0
+
+    def run(self):
+        consecutive_failures = 0
+        seq = 0
+        while not self._stop_event.is_set():
+            read_start = time.perf_counter()
+            ret, image = self.cap.read()
+            timestamp = self.clock.now()
+            perf.lap("capture", read_start)
+
+            if not ret or image is None:
+                self.read_failures += 1
+                consecutive_failures += 1
+                delay = min(self.read_retry_delay * consecutive_failures, 0.5)
+                self._stop_event.wait(delay)
+                continue
+            consecutive_failures = 0
+
+            seq += 1
+            captured = CapturedFrame(seq, timestamp, image)
+            with self._condition:
+                if self.policy == LATEST_ONLY:
+                    self.dropped += len(self._frames)
+                    self._frames.clear()
+                elif len(self._frames) >= self.queue_size:
+                    self._frames.popleft()
+                    self.dropped += 1
+                self._frames.append(captured)
+                self.captured += 1
+                self.max_queue_depth = max(self.max_queue_depth, len(self._frames))
+                self._condition.notify()
+
+    def read(self, timeout=None):
+        """
+        Haalt het volgende frame uit de queue.
+
+        Args:
+            timeout (float, optional): Maximale wachttijd in seconden (None = oneindig).
+
+        Returns:
+            CapturedFrame of None: None als er binnen de timeout geen frame was of de thread stopt.
+        """
+        with self._condition:
+            if not self._frames:
+                self._condition.wait_for(lambda: self._frames or self._stop_event.is_set(), timeout)
+            if not self._frames:
+                return None
+            return self._frames.popleft()
+
+    @property
+    def queue_depth(self):
+        return len(self._frames)
+
+    def stats(self):
+        """
+        Geeft de capture-statistieken als dictionary.
+        """
+        return {
+            "captured": self.captured,
+            "dropped": self.dropped,
+            "read_failures": self.read_failures,
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+        }
+
+    def stop(self, timeout=1.0):
+        """
+        Stopt de capture-thread en wacht (maximaal timeout seconden) tot deze klaar is.
+        """
+        self._stop_event.set()
+        with self._condition:
+            self._condition.notify_all()
+        if self.is_alive():
+            self.join(timeout)
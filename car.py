@@ -1,9 +1,13 @@
 import cv2
 import numpy as np
-import time
 
-from config import CAR_CONFIG
+from config import CAR_CONFIG, MOTION_CONFIG
 from image_utils import load_image
+from log_utils import get_logger
+from motion_filter import ConstantVelocityFilter
+from race_engine import record_lap
+
+logger = get_logger(__name__)
 
 class Car:
     def __init__(self, marker_id, color, car_image, lap_position, lap_complete_position, color_key):
@@ -39,8 +43,17 @@ class Car:
         self.fastest_lap = None  # Voeg dit attribuut toe zodat get_best_lap_time() hier op kan werken
         self.finished = False
         self.progress = 0.0
+        self.track_distance = None   # Loodrechte afstand tot de centerline
+        self.segment_index = None    # Index van het dichtstbijzijnde segment van de centerline
+        self.last_seen_point = None  # Laatst gedetecteerde positie (float, compositiecoördinaten)
+        self.last_seen_time = None   # Capture-tijdstip van het frame van die detectie
+        self.velocity = (0.0, 0.0)   # Geschatte snelheid (px/s) uit het bewegingsfilter
+        self.motion = ConstantVelocityFilter(process_noise=MOTION_CONFIG["process_noise"],
+                                             measurement_noise=MOTION_CONFIG["measurement_noise"],
+                                             scale_smoothing=MOTION_CONFIG["scale_smoothing"],
+                                             max_coast=MOTION_CONFIG["max_coast"])
         self.last_lap_time = 0.0
-        self.lap_text_start_time = time.time()
+        self.lap_text_start_time = None   # Tijdstip van de laatste lap (voor de "Lap Complete"-melding)
         self.position = None
         self.final_position = None  # Nieuw attribuut: final finish ranking
         
@@ -69,30 +82,18 @@ class Car:
         return current_time - race_start_time
 
     def increment_lap(self, current_time, total_laps, race_manager):
-        if self.last_lap_time is not None:
-            lap_time = current_time - self.last_lap_time
-            if hasattr(self, 'fastest_lap'):
-                if self.fastest_lap is None or lap_time < self.fastest_lap:
-                    self.fastest_lap = lap_time
-            else:
-                self.fastest_lap = lap_time
-        else:
-            self.last_lap_time = current_time
-    
-        self.lap_count += 1
-        self.last_lap_time = current_time
-    
-        print(f"DEBUG: Auto {self.marker_id} incremented lap to {self.lap_count} at {current_time}")
-    
-        if self.lap_count >= total_laps and not self.finished:
-            self.finished = True
-            self.finish_time = current_time
-            if hasattr(race_manager, "finished_order"):
-                race_manager.finished_order.append(self.marker_id)
-                self.final_position = len(race_manager.finished_order)
-            else:
-                self.final_position = 1  # fallback
-            print(f"DEBUG: Auto {self.marker_id} finished at position {self.final_position}")  
+        """
+        Registreert een voltooide lap op current_time (zie race_engine.record_lap).
+
+        Returns:
+            list: Het LapEvent en eventueel een FinishEvent.
+        """
+        finished_order = getattr(race_manager, "finished_order", None)
+        events = record_lap(self, current_time, total_laps, finished_order if finished_order is not None else [])
+        logger.debug("Auto %s incremented lap to %s at %s", self.marker_id, self.lap_count, current_time)
+        if any(event.type == "finish" for event in events):
+            logger.info("Auto %s finished at position %s", self.marker_id, self.final_position)
+        return events
                 
     def get_best_lap_time(self):
         """
@@ -111,6 +112,12 @@ class Car:
         self.scale_factor = 1.0
         self.lap_count = 0
         self.progress = 0.0
+        self.track_distance = None
+        self.segment_index = None
+        self.last_seen_point = None
+        self.last_seen_time = None
+        self.velocity = (0.0, 0.0)
+        self.motion.reset()
         self.position = None
         self.last_lap_time = 0.0
         self.finished = False
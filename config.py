@@ -36,6 +36,44 @@ FOCAL_LENGTH = 800             # Focale lengte (in pixels, voorbeeld)
 INITIAL_SCALE_FACTOR = 0.2
 MIN_SCALE_FACTOR = 0.2
 
+# Markerdetectie: "full" scant elke frame het hele beeld, "roi" alleen regio's rond de
+# voorspelde posities van de auto's (met periodiek een volledige scan, zie marker_detection.py)
+DETECTION_CONFIG = {
+    "mode": "roi",
+    "full_scan_interval": 15,      # Maximaal aantal frames tussen twee volledige scans
+    "roi_padding": 2.5,            # Halve ROI-grootte als veelvoud van de markergrootte
+    "min_roi_size": 64,            # Minimale zijde van een ROI in pixels
+    "max_missed_scans": 3,         # Aantal volledige scans dat een (bijv. bedekte) marker nog gevolgd wordt
+    # Volledige scans op een verkleind beeld, met hoekverfijning op volle resolutie.
+    # "auto" kiest de schaal uit de kleinst verwachte marker (MARKER_REAL_WIDTH, FOCAL_LENGTH);
+    # 1.0 schakelt het verkleinen uit.
+    "pyramid_scale": "auto",
+    "max_marker_distance": 1.5,    # Grootste afstand (m) tussen camera en marker
+    "min_marker_pixels": 24,       # Kleinste markergrootte (px) die na verkleinen nog gedetecteerd wordt
+    # "thread": detectie in het eigen proces (detect-workers als threads);
+    # "process": detectie in een pool van processen met frames in gedeeld geheugen (process_detection.py)
+    "backend": "thread",
+    "processes": None,             # Aantal processen bij "process" (None = aantal cores)
+    "slots_per_process": 2,        # Gedeelde framebuffers per proces
+    "start_method": "spawn"        # multiprocessing-startmethode ("spawn" is veilig met threads)
+}
+
+# ---------------------------------------------------------------------------
+# Bewegingsfilter per auto (zie motion_filter.py)
+# ---------------------------------------------------------------------------
+# Een Kalman-filter met constante snelheid voorspelt de positie van een auto op frames zonder
+# detectie (overlay, ranking en ROI's), en strijkt de schaalfactor glad.
+MOTION_CONFIG = {
+    "enabled": True,
+    "process_noise": 1500.0,       # Standaardafwijking van de versnelling (px/s²)
+    "measurement_noise": 1.5,      # Standaardafwijking van een gemeten markercentrum (px)
+    "scale_smoothing": 0.3,        # Gewicht van een nieuwe schaalmeting (1.0 = niet gladstrijken)
+    "max_coast": 0.5,              # Maximale tijd (s) na de laatste detectie waarover voorspeld wordt
+    # Detecteer alleen op elk N-de frame; de frames ertussen gebruiken de voorspelling.
+    # 1 = elk frame detecteren. Een hogere waarde ontlast de CPU bij hoge framerates.
+    "detect_interval": 1
+}
+
 # ---------------------------------------------------------------------------
 # Auto Configuratie
 # Voeg hier eenvoudig nieuwe auto's toe of verwijder ze.
@@ -145,6 +183,70 @@ CHECKPOINT_ZONE = ((744, 250), (100, 15), 0)
 CAMERA_INDEX = 0  # Standaard webcam
 BLACK_BAR_WIDTH = 200  # Breedte van zijbalken in pixels
 
+# Camera's die samen de baan dekken (zie multi_camera.py). De eerste camera wordt getoond.
+# Per camera een homografie van het camerabeeld naar de baancoördinaten (de ruimte van
+# PATH_POINTS), als 3x3-matrix ("homography") of als ijkpunten ("point_pairs": minstens 4
+# paren [(camera_x, camera_y), (baan_x, baan_y)]). Zonder beide: verschuiving (BLACK_BAR_WIDTH, 0).
+# "intrinsics": JSON-bestand van camera_calibration.py (op de resolutie van de camera). Bestaat
+# het, dan worden de markerhoeken voor lensvervorming gecorrigeerd en wordt de afstand met de
+# gecalibreerde focale lengte berekend; ijkpunten en matrix gelden dan voor het gecorrigeerde
+# beeld. Met de standaard verschuiving blijft de baan in het getoonde (vervormde) beeld en
+# verandert de correctie alleen grootte en afstand. Wijkt de resolutie van de camera af van
+# die van de calibratie, dan wordt een fout gelogd en de correctie uitgeschakeld.
+CAMERAS = [
+    {"index": CAMERA_INDEX, "homography": None, "point_pairs": None, "intrinsics": "camera_intrinsics.json"},
+]
+
+# Cameracalibratie (camera_calibration.py) en correctie van de markerhoeken
+CALIBRATION_CONFIG = {
+    "pattern_size": (9, 6),        # Binnenhoeken van het dambord (kolommen, rijen)
+    "square_size": 0.025,          # Zijde van een vakje (m)
+    "min_images": 10,              # Minimaal aantal beelden bij live calibreren
+    "map_step": 8                  # Rasterstap (px) van de vooraf berekende correctietabel
+}
+
+# Samenvoegen van detecties van meerdere camera's (alleen gebruikt bij meer dan één camera)
+MULTI_CAMERA_CONFIG = {
+    "merge_window": 0.02           # Waarnemingen van dezelfde marker binnen dit interval (s) samenvoegen
+}
+
+# Capture-thread: frames worden in een aparte thread gelezen en in een begrensde queue gezet
+CAPTURE_CONFIG = {
+    "queue_size": 2,               # Maximaal aantal frames dat op verwerking wacht
+    "policy": "drop_oldest",       # "drop_oldest" of "latest_only" als de queue vol is
+    "read_retry_delay": 0.01,      # Wachttijd (s) na een mislukte cap.read()
+    "read_timeout": 1.0            # Maximale wachttijd (s) op een nieuw frame in run_race
+}
+
+# Pipeline: detectie, race-logica en renderen op aparte worker-threads (zie race_pipeline.py)
+PIPELINE_CONFIG = {
+    "enabled": True,               # False: alles serieel in run_race
+    "detect_workers": 2,           # Aantal parallelle detect-workers
+    "queue_size": 2                # Maximale lengte van de queues tussen de stages
+}
+
+# Performance-metingen per stage (zie perf_stats.py)
+PERF_CONFIG = {
+    "enabled": True,               # Timings per stage bijhouden in ringbuffers
+    "capacity": 600,               # Aantal metingen per ringbuffer (ca. 20 s bij 30 fps)
+    "hud": False,                  # p50/p95/p99 per stage tonen in de linker zijbalk
+    "hud_stages": None,            # Lijst met stages voor de HUD (None = alle stages)
+    "hud_refresh_interval": 0.5,   # Tijd (s) tussen twee herberekeningen van de HUD
+    "dump_path": "race_perf"       # Aan het einde van de race: race_perf.csv en race_perf.json (None = niet wegschrijven)
+}
+
+# Cache met voorgeschaalde auto-afbeeldingen (zie sprite_cache.py)
+SPRITE_CACHE_CONFIG = {
+    "max_bytes": 32 * 1024 * 1024,  # Geheugenbudget; daarboven worden de minst recent gebruikte sprites verwijderd
+    "scale_step": 0.02              # Relatieve stapgrootte van de schaal-buckets (0.02 = 2% per bucket)
+}
+
+# Voorgerenderde teksten in de zijbalken (zie sidebar_renderer.py)
+SIDEBAR_CONFIG = {
+    "time_refresh_interval": 0.1,  # Stapgrootte (s) van de lopende totaaltijd (0 = elke frame bijwerken)
+    "max_glyphs": 256               # Maximaal aantal voorgerenderde teksten in de cache
+}
+
 # ---------------------------------------------------------------------------
 # position indicators (goud, zilver en brons)
 # ---------------------------------------------------------------------------
@@ -170,6 +272,7 @@ START_TEXT_POSITION = (250, 300)
 START_TEXT_FONT_SCALE = 5
 START_TEXT_COLOR = (255, 255, 255)
 START_TEXT_THICKNESS = 15
+READY_TEXT_DURATION = 1.0  # Duur (in seconden) dat "Ready?" getoond wordt vóór de countdown
 
 # Tekst instellingen voor de countdown
 COUNTDOWN_FONT_SCALE = 5
@@ -204,4 +307,19 @@ FINAL_OVERLAY_CONFIG = {
     "text_color": (0, 0, 0)     # zwart
 }
 
-FINAL_OVERLAY_DELAY = 3.0  # Vertraag de finale overlay met 3 seconden
\ No newline at end of file
+FINAL_OVERLAY_DELAY = 3.0  # Vertraag de finale overlay met 3 seconden
+# ---------------------------------------------------------------------------
+# Logging (zie log_utils.py)
+# ---------------------------------------------------------------------------
+LOGGING_CONFIG = {
+    "level": "INFO",               # Standaardniveau van alle modules
+    "levels": {                    # Niveau per module, bijv. "race_logic": "DEBUG"
+        "race_logic": "INFO",
+        "path_utils": "INFO",
+        "overlay_utils": "INFO",
+        "car": "INFO",
+    },
+    "format": "%(asctime)s %(levelname)s %(name)s: %(message)s",
+    "async": True,                 # Schrijven via een QueueListener-thread (geen stdout-writes in de hot path)
+    "no_marker_interval": 5.0      # Minimale tijd (s) tussen twee "geen markers gedetecteerd"-waarschuwingen
+}
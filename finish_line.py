@@ -0,0 +1,86 @@
+# finish_line.py
+import math
+
+import numpy as np
+
+
+class CrossingLine:
+    """
+    Een lijn dwars over de baan (finish of checkpoint) met een rijrichting.
+
+    De lijn is de lange as van een zone uit de config (een rotated rectangle zoals FINISH_ZONE).
+    Een passage telt alleen als het segment tussen twee opeenvolgende posities de lijn snijdt
+    en in de rijrichting beweegt. Omdat het snijpunt een fractie t langs het segment geeft,
+    kan het passagetijdstip tussen de twee frametijden geïnterpoleerd worden: zo is de
+    lap-tijd niet meer gekwantiseerd op het frame waarin de marker in de zone te zien was.
+
+    Alle coördinaten zijn compositiecoördinaten (dezelfde als PATH_POINTS en Car.x/Car.y).
+    """
+
+    def __init__(self, start, end, forward):
+        """
+        Args:
+            start, end (tuple): De eindpunten van de lijn.
+            forward (tuple): De rijrichting (hoeft niet genormaliseerd te zijn).
+        """
+        self.start = np.asarray(start, dtype=np.float64)
+        self.end = np.asarray(end, dtype=np.float64)
+        self.forward = np.asarray(forward, dtype=np.float64)
+
+        # Als floats, zodat crossing() per waarneming geen NumPy-arrays hoeft aan te maken
+        self._ax, self._ay = float(self.start[0]), float(self.start[1])
+        self._ex, self._ey = float(self.end[0] - self.start[0]), float(self.end[1] - self.start[1])
+        self._fx, self._fy = float(self.forward[0]), float(self.forward[1])
+
+    @classmethod
+    def from_zone(cls, zone, geometry):
+        """
+        Maakt de lijn uit een zone (rotated rectangle) en haalt de rijrichting uit de raaklijn
+        van de centerline ter hoogte van het midden van de zone.
+
+        Args:
+            zone (tuple): ((center_x, center_y), (width, height), angle); de lijn is de lange as.
+            geometry (TrackGeometry): De geometrie van de centerline.
+        """
+        (cx, cy), (width, height), angle = zone
+        a = math.radians(angle)
+        if width >= height:
+            half = 0.5 * width * np.array([math.cos(a), math.sin(a)])
+        else:
+            half = 0.5 * height * np.array([-math.sin(a), math.cos(a)])
+        center = np.array([cx, cy], dtype=np.float64)
+
+        distance = geometry.project_point((cx, cy))[0]
+        _, tangents = geometry.point_at(distance)
+        return cls(center - half, center + half, tangents[0])
+
+    def crossing(self, p0, p1):
+        """
+        Test of de beweging p0 -> p1 de lijn in de rijrichting passeert.
+
+        Returns:
+            float or None: De fractie t in [0, 1] langs p0 -> p1 waarop de lijn gepasseerd wordt,
+                           of None als er geen (voorwaartse) passage is.
+        """
+        # Snijpunt van p0 -> p1 met start -> end, in gewone floats (wordt per waarneming aangeroepen)
+        x0, y0 = float(p0[0]), float(p0[1])
+        dx, dy = float(p1[0]) - x0, float(p1[1]) - y0
+        if dx * self._fx + dy * self._fy <= 0.0:
+            return None
+        ex, ey = self._ex, self._ey
+        denom = dx * ey - dy * ex
+        if denom == 0.0:
+            return None
+        wx, wy = self._ax - x0, self._ay - y0
+        t = (wx * ey - wy * ex) / denom
+        u = (wx * dy - wy * dx) / denom
+        if 0.0 <= t <= 1.0 and 0.0 <= u <= 1.0:
+            return t
+        return None
+
+
+def interpolate_time(t0, t1, fraction):
+    """
+    Interpoleert lineair tussen de frametijden t0 en t1.
+    """
+    return t0 + fraction * (t1 - t0)
@@ -0,0 +1,78 @@
+# frame_buffers.py
+import numpy as np
+
+from config import BLACK_BAR_WIDTH, RANKING_BAR_CONFIG
+
+
+class FrameBufferPool:
+    """
+    Pool van herbruikbare compositie-buffers (zwarte balken + camerabeeld + ranking bar).
+
+    In plaats van elke frame een nieuwe np.zeros-array van volle grootte te alloceren, wordt
+    round-robin een van de vooraf gealloceerde buffers teruggegeven. Met twee buffers
+    (double buffering) kan het vorige frame nog getoond worden terwijl het volgende al in de
+    andere buffer wordt opgebouwd. Bij een andere framegrootte worden alle buffers opnieuw
+    gealloceerd.
+    """
+
+    def __init__(self, num_buffers=2):
+        """
+        Args:
+            num_buffers (int): Aantal buffers in de pool. Moet minstens gelijk zijn aan het aantal
+                               frames dat tegelijk in gebruik kan zijn (verwerking + weergave).
+        """
+        if num_buffers < 1:
+            raise ValueError("Een FrameBufferPool heeft minimaal één buffer nodig.")
+        self.num_buffers = num_buffers
+        self._buffers = []
+        self._frame_shape = None
+        self._next = 0
+
+    @staticmethod
+    def composite_shape(frame_shape):
+        """
+        Geeft de shape van de compositie voor een camerabeeld van de gegeven shape.
+        """
+        ranking_bar_height = RANKING_BAR_CONFIG['ranking_bar_height']
+        return (frame_shape[0] + ranking_bar_height, frame_shape[1] + 2 * BLACK_BAR_WIDTH, 3)
+
+    @staticmethod
+    def camera_region(frame_shape):
+        """
+        Geeft de slices van de cameraregio binnen de compositie.
+        """
+        return (slice(0, frame_shape[0]), slice(BLACK_BAR_WIDTH, BLACK_BAR_WIDTH + frame_shape[1]))
+
+    def acquire(self, frame_shape):
+        """
+        Geeft de volgende vrije compositie-buffer voor een camerabeeld van de gegeven shape.
+
+        De inhoud van de buffer is die van het frame dat er eerder in werd opgebouwd; de
+        aanroeper moet alle regio's die hij gebruikt zelf overschrijven.
+
+        Args:
+            frame_shape (tuple): De shape van het camerabeeld (hoogte, breedte, kanalen).
+
+        Returns:
+            tuple: (composite, cam_view) waarbij cam_view een view is op de cameraregio van composite.
+        """
+        frame_shape = tuple(frame_shape[:2])
+        if frame_shape != self._frame_shape:
+            shape = self.composite_shape(frame_shape)
+            self._buffers = [np.zeros(shape, dtype=np.uint8) for _ in range(self.num_buffers)]
+            self._frame_shape = frame_shape
+            self._next = 0
+
+        composite = self._buffers[self._next]
+        self._next = (self._next + 1) % self.num_buffers
+        return composite, composite[self.camera_region(frame_shape)]
+
+
+def clear_outside_camera(composite, frame_shape):
+    """
+    Maakt de zijbalken en de ranking bar-regio van een hergebruikte buffer weer zwart.
+    """
+    frame_height, frame_width = frame_shape[:2]
+    composite[:, :BLACK_BAR_WIDTH] = 0
+    composite[:, BLACK_BAR_WIDTH + frame_width:] = 0
+    composite[frame_height:, BLACK_BAR_WIDTH:BLACK_BAR_WIDTH + frame_width] = 0
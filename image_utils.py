@@ -1,6 +1,10 @@
 # image_utils.py
 import cv2
-import numpy as np
+
+from log_utils import get_logger
+from sprite_cache import Sprite, sprite_cache
+
+logger = get_logger(__name__)
 
 def load_image(path, width=None, height=None):
     """
@@ -29,6 +33,69 @@ def load_image(path, width=None, height=None):
         
     return img
 
+def blend_premultiplied(roi, premultiplied, inverse_alpha):
+    """
+    Blend-kernel voor voorvermenigvuldigde alpha, in-place in de ROI:
+
+        roi = round(roi * inverse_alpha / 255) + premultiplied
+
+    Alles blijft uint8 (verzadigend, afgerond); er worden geen tijdelijke arrays aangemaakt,
+    cv2.multiply en cv2.add schrijven direct in de ROI (ook als die een view in het frame is).
+    Het resultaat wijkt hooguit 1 af van blenden in float64.
+
+    Args:
+        roi (numpy.ndarray): Het doelgebied (uint8, H x W x 3), wordt overschreven.
+        premultiplied (numpy.ndarray): BGR * alpha / 255 (uint8, H x W x 3).
+        inverse_alpha (numpy.ndarray): 255 - alpha (uint8, H x W x 3).
+    """
+    cv2.multiply(roi, inverse_alpha, dst=roi, scale=1.0 / 255.0)
+    cv2.add(roi, premultiplied, dst=roi)
+
+def blend_sprite_at(background, sprite, x, y):
+    """
+    Blendt een sprite (zie sprite_cache.py) met de linkerbovenhoek op (x, y), in-place.
+    Delen van de sprite buiten de achtergrond worden weggelaten.
+
+    Returns:
+        numpy.ndarray: De achtergrondafbeelding met de sprite erop.
+    """
+    h, w = sprite.shape[:2]
+
+    # Knip de sprite af op de grenzen van de achtergrond
+    bg_h, bg_w = background.shape[:2]
+    sx1, sy1 = max(-x, 0), max(-y, 0)
+    sx2, sy2 = min(w, bg_w - x), min(h, bg_h - y)
+
+    # Indien de ROI geen geldige dimensies heeft, doen we niets.
+    if sx1 >= sx2 or sy1 >= sy2:
+        return background
+
+    roi = background[y + sy1:y + sy2, x + sx1:x + sx2]
+    premultiplied = sprite.premultiplied[sy1:sy2, sx1:sx2]
+    if sprite.inverse_alpha is None:
+        # Geen alpha-kanaal: kopieer de sprite direct over de ROI
+        roi[:] = premultiplied
+    else:
+        blend_premultiplied(roi, premultiplied, sprite.inverse_alpha[sy1:sy2, sx1:sx2])
+    return background
+
+def blend_sprite(background, sprite, center_x, center_y):
+    """
+    Blendt een voorgeschaalde sprite (zie sprite_cache.py) gecentreerd op (center_x, center_y).
+
+    Args:
+        background (numpy.ndarray): De achtergrondafbeelding (BGR), wordt in-place aangepast.
+        sprite (Sprite): De sprite.
+        center_x (int): De x-coördinaat van het middelpunt.
+        center_y (int): De y-coördinaat van het middelpunt.
+
+    Returns:
+        numpy.ndarray: De achtergrondafbeelding met de sprite erop.
+    """
+    # Bereken de bovenste linkerhoek zodat de sprite gecentreerd wordt op (center_x, center_y)
+    h, w = sprite.shape[:2]
+    return blend_sprite_at(background, sprite, int(center_x - w / 2), int(center_y - h / 2))
+
 def overlay_transparent(background, overlay, x, y, overlay_size=None):
     """
     Past een transparante overlay (met een alpha kanaal) toe op het 'background'-beeld op de
@@ -48,32 +115,19 @@ def overlay_transparent(background, overlay, x, y, overlay_size=None):
     bg = background.copy()
     if overlay_size is not None:
         overlay = cv2.resize(overlay, overlay_size, interpolation=cv2.INTER_AREA)
-    
-    h, w = overlay.shape[:2]
-
-    # Als de overlay buiten het achtergrondbeeld valt, doe niets
-    if x >= bg.shape[1] or y >= bg.shape[0]:
-        return bg
-
-    # Definieer het gebied (ROI) op het achtergrondbeeld waar de overlay moet komen
-    roi = bg[y:y+h, x:x+w]
-
-    # Split de overlay af in de BGR-component en het alpha-kanaal (transparantie)
-    overlay_img = overlay[..., :3]
-    mask = overlay[..., 3:] / 255.0  # Masker normaliseren naar bereik 0-1
 
-    # Combineer de overlay en de ROI via blending
-    roi = (1 - mask) * roi + mask * overlay_img
-    bg[y:y+h, x:x+w] = roi.astype(np.uint8)
-    return bg
+    # Voorvermenigvuldigen en blenden met de uint8-kernel (zoals overlay_image, maar zonder cache)
+    return blend_sprite_at(bg, Sprite.from_image(overlay), x, y)
 
 def overlay_image(background, overlay, center_x, center_y, scale_factor):
     """
     Overlayt de 'overlay'-afbeelding op de 'background' op een specifieke locatie en met een bepaalde schaal.
     
-    De functie schaalt eerst de overlay-afbeelding met de gegeven scale_factor. Vervolgens wordt
-    de overlay zo geplaatst dat het middelpunt (center_x, center_y) overeenkomt met het middelpunt van de overlay.
-    Als de overlay een alpha-kanaal (transparantie) bevat, wordt alpha blending toegepast; anders wordt de overlay direct gekopieerd.
+    De geschaalde overlay komt uit de sprite-cache (per afbeelding en gekwantiseerde schaal
+    één keer geschaald en met alpha voorvermenigvuldigd), zodat er per frame alleen nog
+    geblend wordt. De overlay wordt zo geplaatst dat het middelpunt (center_x, center_y)
+    overeenkomt met het middelpunt van de overlay. Als de overlay een alpha-kanaal
+    (transparantie) bevat, wordt alpha blending toegepast; anders wordt de overlay direct gekopieerd.
     
     Args:
         background (numpy.ndarray): De achtergrondafbeelding (BGR) waarop overlegd wordt.
@@ -87,55 +141,10 @@ def overlay_image(background, overlay, center_x, center_y, scale_factor):
     """
     # Veiligheid: als de coördinaten None zijn, sla dan de overlay over.
     if center_x is None or center_y is None:
-        print("Warning: overlay_image aangeroepen met None-coördinaten; overlay overslaan.")
+        logger.warning("overlay_image aangeroepen met None-coördinaten; overlay overslaan.")
         return background
-    
-    # Schaal de overlay-afbeelding
-    overlay_resized = cv2.resize(overlay, None, fx=scale_factor, fy=scale_factor)
-    h, w = overlay_resized.shape[:2]
-    
-    # Bereken de bovenste linkerhoek zodat de overlay gecentreerd wordt op (center_x, center_y)
-    x1 = int(center_x - w / 2)
-    y1 = int(center_y - h / 2)
-    x2 = x1 + w
-    y2 = y1 + h
-    
-    # Bepaal de regio van interesse (ROI) op de achtergrond en de overlay indien de overlay buiten de grenzen valt.
-    bg_h, bg_w = background.shape[:2]
-    
-    overlay_x1, overlay_y1 = 0, 0
-    overlay_x2, overlay_y2 = w, h
-
-    # Indien de overlay buiten de grenzen valt, pas de ROI aan
-    if x1 < 0:
-        overlay_x1 = -x1
-        x1 = 0
-    if y1 < 0:
-        overlay_y1 = -y1
-        y1 = 0
-    if x2 > bg_w:
-        overlay_x2 = w - (x2 - bg_w)
-        x2 = bg_w
-    if y2 > bg_h:
-        overlay_y2 = h - (y2 - bg_h)
-        y2 = bg_h
 
-    # Indien de ROI geen geldige dimensies heeft, doen we niets.
-    if overlay_x1 >= overlay_x2 or overlay_y1 >= overlay_y2:
+    sprite = sprite_cache.get(overlay, scale_factor)
+    if sprite is None:
         return background
-
-    # Verkrijg de ROI van de achtergrond
-    roi = background[y1:y2, x1:x2]
-    overlay_part = overlay_resized[overlay_y1:overlay_y2, overlay_x1:overlay_x2]
-
-    # Als overlay een alfa-kanaal heeft, gebruik alpha blending.
-    if overlay_part.shape[2] == 4:
-        overlay_bgr = overlay_part[:, :, :3]
-        alpha_mask = overlay_part[:, :, 3] / 255.0  # Normaliseer naar [0, 1]
-        alpha_mask = np.dstack([alpha_mask] * 3)      # Zet om naar 3 kanalen voor BGR
-        roi[:] = (overlay_bgr * alpha_mask + roi * (1 - alpha_mask)).astype(roi.dtype)
-    else:
-        # Anders, kopieer de overlay direct over de ROI.
-        roi[:] = overlay_part
-
-    return background
\ No newline at end of file
+    return blend_sprite(background, sprite, center_x, center_y)
@@ -0,0 +1,112 @@
+# log_utils.py
+import atexit
+import logging
+import logging.handlers
+import queue
+import threading
+import time
+
+from config import LOGGING_CONFIG
+
+# De listener die de log-records (asynchroon) naar de echte handlers schrijft
+_listener = None
+_setup_lock = threading.Lock()
+
+
+def setup_logging(config=LOGGING_CONFIG):
+    """
+    Configureert de logging van het hele programma (eenmalig; volgende aanroepen doen niets).
+
+    De hot path (detectie, race-logica, renderen) schrijft nooit zelf naar stdout: de root
+    logger krijgt een QueueHandler die het record alleen in een queue zet. Een QueueListener
+    op een eigen thread formatteert de records en schrijft ze naar de console.
+
+    Args:
+        config (dict): Zie LOGGING_CONFIG in config.py ("level", "levels", "format", "async").
+    """
+    global _listener
+    with _setup_lock:
+        root = logging.getLogger()
+        if getattr(root, "_race_logging_configured", False):
+            return
+
+        root.setLevel(config.get("level", "INFO"))
+        for name, level in config.get("levels", {}).items():
+            logging.getLogger(name).setLevel(level)
+
+        console = logging.StreamHandler()
+        console.setFormatter(logging.Formatter(config.get("format", "%(levelname)s %(name)s: %(message)s")))
+
+        if config.get("async", True):
+            log_queue = queue.SimpleQueue()
+            root.addHandler(logging.handlers.QueueHandler(log_queue))
+            _listener = logging.handlers.QueueListener(log_queue, console, respect_handler_level=True)
+            _listener.start()
+            atexit.register(shutdown_logging)
+        else:
+            root.addHandler(console)
+
+        root._race_logging_configured = True
+
+
+def shutdown_logging():
+    """
+    Stopt de QueueListener, nadat alle records in de queue zijn weggeschreven.
+    """
+    global _listener
+    with _setup_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+
+def get_logger(name):
+    """
+    Geeft de logger van een module. Het niveau komt uit LOGGING_CONFIG["levels"] (of de root logger).
+
+    Gebruik altijd lazy %-formattering: logger.debug("Auto %s op x=%s", marker_id, x).
+    Als DEBUG uit staat, wordt de melding dan nooit opgebouwd. Voor argumenten die zelf
+    duur zijn om te berekenen: eerst logger.isEnabledFor(logging.DEBUG) controleren.
+    """
+    logger = logging.getLogger(name)
+    level = LOGGING_CONFIG.get("levels", {}).get(name)
+    if level is not None:
+        logger.setLevel(level)
+    return logger
+
+
+class RateLimitedLog:
+    """
+    Logt een terugkerende melding hoogstens één keer per interval seconden.
+
+    Handig voor meldingen die anders elke frame verschijnen, zoals "geen markers
+    gedetecteerd". Het aantal onderdrukte meldingen wordt bij de volgende melding vermeld.
+    """
+
+    def __init__(self, logger, interval=5.0, level=logging.WARNING):
+        self.logger = logger
+        self.interval = interval
+        self.level = level
+        self._last_time = None
+        self._suppressed = 0
+        self._lock = threading.Lock()
+
+    def log(self, msg, *args):
+        """
+        Logt msg (met lazy %-argumenten) als het interval sinds de vorige melding verstreken is.
+        """
+        if not self.logger.isEnabledFor(self.level):
+            return
+        now = time.monotonic()
+        with self._lock:
+            if self._last_time is not None and now - self._last_time < self.interval:
+                self._suppressed += 1
+                return
+            suppressed = self._suppressed
+            self._suppressed = 0
+            self._last_time = now
+
+        if suppressed:
+            self.logger.log(self.level, msg + " (%d keer onderdrukt)", *args, suppressed)
+        else:
+            self.logger.log(self.level, msg, *args)
@@ -11,7 +11,9 @@ from car_utils import initialize_cars
 from race_manager import RaceManager
 from path_utils import expand_path
 from race_logic import process_frame, run_race
+from race_pipeline import run_race_pipelined, run_race_multi_camera
 from race_menu import RaceMenu
+from log_utils import setup_logging
 
 # master branch goed werkende code
 def handle_close(sig, frame):
@@ -30,6 +32,9 @@ signal.signal(signal.SIGTERM, handle_close)
 def main():
     print("main() is gestart!")  # Debug-uitvoer
 
+    # Logging via een QueueListener-thread (niveaus per module in LOGGING_CONFIG)
+    setup_logging(LOGGING_CONFIG)
+
     # Open een Tkinter venster voor het menu
     root = tk.Tk()
     print("Tkinter venster geopend!")  # Debug-uitvoer
@@ -64,19 +69,29 @@ def main():
         for marker_id, car in cars.items():
             print(f"✅ Auto {marker_id}: color_key = {car.color_key}, color = {car.color}, username = {car.username}")
 
-        # Open de camera
-        cap = cv2.VideoCapture(CAMERA_INDEX)
-        if not cap.isOpened():
-            print("❌ Kan de camera niet openen.")
-            return
+        # Open de camera('s)
+        caps = []
+        for camera_config in CAMERAS:
+            cap = cv2.VideoCapture(camera_config["index"])
+            if not cap.isOpened():
+                print(f"❌ Kan camera {camera_config['index']} niet openen.")
+                for opened in caps:
+                    opened.release()
+                cap.release()
+                return
+            caps.append(cap)
 
-        print("Camera geopend!")  # Debug-uitvoer
+        print(f"{len(caps)} camera('s) geopend!")  # Debug-uitvoer
 
         # Debug-uitvoer vóór het starten van de thread
         print("Thread wordt aangemaakt voor run_race...")  # Debug-uitvoer
 
-        # Start de race-logica in een aparte thread
-        thread = threading.Thread(target=lambda: run_race(cars, race_manager, cap), daemon=True)
+        # Start de race-logica in een aparte thread (serieel, via de pipeline, of met meerdere camera's)
+        if len(caps) > 1:
+            thread = threading.Thread(target=lambda: run_race_multi_camera(cars, race_manager, caps), daemon=True)
+        else:
+            race_runner = run_race_pipelined if PIPELINE_CONFIG["enabled"] else run_race
+            thread = threading.Thread(target=lambda: race_runner(cars, race_manager, caps[0]), daemon=True)
         thread.start()
 
         # Debug-uitvoer na het starten van de thread
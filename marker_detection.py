@@ -0,0 +1,291 @@
+# marker_detection.py
+import math
+import threading
+
+import cv2
+import numpy as np
+
+# Stopcriteria voor cv2.cornerSubPix bij het verfijnen van hoeken op volle resolutie
+SUBPIX_CRITERIA = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 20, 0.01)
+
+
+def compute_detection_scale(marker_real_width, focal_length, max_marker_distance, min_marker_pixels):
+    """
+    Kiest de schaal voor detectie op een verkleind beeld op basis van de kleinst verwachte marker.
+
+    De kleinste marker in beeld (in pixels) is marker_real_width * focal_length / max_marker_distance.
+    Het beeld wordt zo ver verkleind dat die marker nog min_marker_pixels groot is.
+
+    Returns:
+        float: De schaal in (0, 1]; 1.0 betekent detectie op volle resolutie.
+    """
+    smallest_marker = marker_real_width * focal_length / max_marker_distance
+    return float(min(1.0, max(min_marker_pixels / smallest_marker, 0.05)))
+
+
+class MarkerDetector:
+    """
+    Detecteert ArUco-markers in het volledige (grijswaarden)beeld.
+
+    Dit is het standaardgedrag: elke frame één cv2.aruco.detectMarkers over het hele beeld.
+
+    Met detection_scale < 1 wordt gedetecteerd op een verkleind beeld (cv2.INTER_AREA). De
+    gevonden hoeken worden teruggeschaald en daarna met cv2.cornerSubPix verfijnd in kleine
+    vensters op het originele beeld, zodat process_markers centra krijgt met (minstens) dezelfde
+    precisie als bij detectie op volle resolutie, terwijl detectMarkers maar een fractie van
+    de pixels hoeft te verwerken.
+    """
+
+    def __init__(self, aruco_dict, parameters, detection_scale=1.0):
+        self.aruco_dict = aruco_dict
+        self.parameters = parameters
+        self.detection_scale = float(detection_scale)
+        # Venster voor de verfijning: één verkleinde pixel beslaat 1/scale pixels op volle resolutie
+        half_window = int(math.ceil(1.0 / self.detection_scale)) + 1
+        self._subpix_window = (half_window, half_window)
+
+    def _detect_full(self, gray):
+        if self.detection_scale >= 1.0:
+            corners, ids, _ = cv2.aruco.detectMarkers(gray, self.aruco_dict, parameters=self.parameters)
+            return list(corners), ids
+
+        small = cv2.resize(gray, None, fx=self.detection_scale, fy=self.detection_scale,
+                           interpolation=cv2.INTER_AREA)
+        corners, ids, _ = cv2.aruco.detectMarkers(small, self.aruco_dict, parameters=self.parameters)
+        if ids is None or len(ids) == 0:
+            return [], ids
+
+        # Terugschalen naar volle resolutie (pixelcentra: (x + 0.5) / scale - 0.5)
+        points = np.concatenate([c.reshape(-1, 2) for c in corners]).astype(np.float32)
+        points = (points + 0.5) / self.detection_scale - 0.5
+
+        # Verfijn alle hoeken in één aanroep, alleen in kleine vensters rond elke hoek
+        points = points.reshape(-1, 1, 2)
+        cv2.cornerSubPix(gray, points, self._subpix_window, (-1, -1), SUBPIX_CRITERIA)
+        refined = [points[i * 4:(i + 1) * 4].reshape(1, 4, 2) for i in range(len(corners))]
+        return refined, ids
+
+    def detect(self, gray, predictions=None):
+        """
+        Args:
+            gray (numpy.ndarray): Het grijswaardenbeeld.
+            predictions (dict, optional): Voorspelde markercentra {marker_id: (x, y)} in
+                                          beeldcoördinaten; niet gebruikt bij een volledige scan.
+
+        Returns:
+            tuple: (corners, ids) in het formaat van cv2.aruco.detectMarkers.
+        """
+        return self._detect_full(gray)
+
+    def close(self):
+        """
+        Geeft de resources van de detector vrij (niets voor een detector in hetzelfde proces).
+        """
+
+
+class _MarkerTrack:
+    """
+    Laatst bekende toestand van één marker, in beeldcoördinaten.
+    """
+    __slots__ = ("center", "velocity", "size", "frame_index", "missed")
+
+    def __init__(self, center, size, frame_index):
+        self.center = center
+        self.velocity = np.zeros(2, dtype=np.float64)
+        self.size = size
+        self.frame_index = frame_index
+        self.missed = 0  # Aantal volledige scans op rij waarin de marker ontbrak
+
+
+class RoiMarkerDetector(MarkerDetector):
+    """
+    Detecteert markers alleen in regio's (ROI's) rond de voorspelde positie van elke auto.
+
+    Na een volledige scan wordt per gevonden marker een track bijgehouden (centrum, snelheid
+    in pixels per frame en markergrootte). De frames daarna wordt detectMarkers alleen
+    uitgevoerd op een vierkant rond de voorspelde positie (centrum + snelheid * verstreken
+    frames), met een marge van roi_padding keer de markergrootte. Omdat elke ROI veel
+    kleiner is dan het frame, blijft de detectietijd vrijwel constant als het beeld groter wordt.
+
+    Als er voorspellingen van het bewegingsfilter (motion_filter.py) worden meegegeven, is dat
+    het centrum van de ROI in plaats van de eigen extrapolatie. Het filter rekent met de
+    capture-tijden, dus ook bij weggevallen of overgeslagen frames ligt de ROI op de juiste plek.
+
+    Er wordt teruggevallen op een volledige scan:
+      - elke full_scan_interval frames (om nieuwe auto's te vinden),
+      - zodra een gevolgde marker niet meer in zijn ROI gevonden wordt,
+      - als er nog geen tracks zijn.
+    Een marker die ook bij een volledige scan niet gevonden wordt (bijv. kort bedekt), blijft
+    nog max_missed_scans scans gevolgd op zijn voorspelde positie; daarna vervalt de track.
+    Zo wordt een auto na een korte occlusie direct weer in zijn ROI gevonden, in plaats van
+    pas bij de volgende periodieke volledige scan.
+
+    De detector is thread-safe: de detectie zelf draait buiten de lock, zodat meerdere
+    detect-workers tegelijk kunnen werken.
+    """
+
+    def __init__(self, aruco_dict, parameters, full_scan_interval=15, roi_padding=2.5, min_roi_size=64,
+                 detection_scale=1.0, max_missed_scans=3):
+        """
+        Args:
+            aruco_dict, parameters: ArUco-dictionary en detectieparameters.
+            detection_scale (float): Schaal voor de volledige scans (de ROI's blijven op volle resolutie).
+            full_scan_interval (int): Maximaal aantal frames tussen twee volledige scans.
+            roi_padding (float): Halve ROI-grootte als veelvoud van de markergrootte.
+            min_roi_size (int): Minimale zijde van een ROI in pixels.
+            max_missed_scans (int): Aantal volledige scans dat een ontbrekende marker nog gevolgd wordt.
+        """
+        super().__init__(aruco_dict, parameters, detection_scale)
+        self.full_scan_interval = max(1, full_scan_interval)
+        self.roi_padding = roi_padding
+        self.min_roi_size = min_roi_size
+        self.max_missed_scans = max_missed_scans
+
+        self._tracks = {}
+        self._frame_index = 0
+        self._last_full_scan = None
+        self._lock = threading.Lock()
+
+        # Statistieken
+        self.full_scans = 0
+        self.roi_scans = 0
+
+    def _plan(self, frame_shape, predictions=None):
+        """
+        Bepaalt (onder de lock) of dit frame een volledige scan krijgt, en anders de ROI's.
+        """
+        with self._lock:
+            self._frame_index += 1
+            frame_index = self._frame_index
+            if (not self._tracks or self._last_full_scan is None
+                    or frame_index - self._last_full_scan >= self.full_scan_interval):
+                return frame_index, None
+
+            height, width = frame_shape[:2]
+            rois = []
+            for marker_id, track in self._tracks.items():
+                if predictions is not None and marker_id in predictions:
+                    predicted = predictions[marker_id]
+                else:
+                    predicted = track.center + track.velocity * (frame_index - track.frame_index)
+                half = max(self.min_roi_size / 2.0, self.roi_padding * track.size)
+                x0 = max(int(predicted[0] - half), 0)
+                y0 = max(int(predicted[1] - half), 0)
+                x1 = min(int(predicted[0] + half), width)
+                y1 = min(int(predicted[1] + half), height)
+                if x1 - x0 < 8 or y1 - y0 < 8:
+                    return frame_index, None  # Voorspelling buiten beeld: volledig scannen
+                rois.append((marker_id, x0, y0, x1, y1))
+            return frame_index, rois
+
+    def _update_tracks(self, frame_index, corners, ids, full_scan):
+        with self._lock:
+            seen = set()
+            if ids is not None:
+                for marker_corners, marker_id in zip(corners, ids.flatten()):
+                    marker_id = int(marker_id)
+                    points = marker_corners.reshape(4, 2)
+                    center = points.mean(axis=0).astype(np.float64)
+                    size = float(np.linalg.norm(points[0] - points[1]) + np.linalg.norm(points[0] - points[3])) / 2.0
+                    track = self._tracks.get(marker_id)
+                    if track is None:
+                        self._tracks[marker_id] = _MarkerTrack(center, size, frame_index)
+                    elif frame_index > track.frame_index:
+                        frames = frame_index - track.frame_index
+                        track.velocity = (center - track.center) / frames
+                        track.center = center
+                        track.size = size
+                        track.frame_index = frame_index
+                        track.missed = 0
+                    seen.add(marker_id)
+            if full_scan:
+                # Markers die bij te veel volledige scans op rij ontbreken, worden niet langer gevolgd
+                for marker_id, track in list(self._tracks.items()):
+                    if marker_id not in seen:
+                        track.missed += 1
+                        if track.missed > self.max_missed_scans:
+                            del self._tracks[marker_id]
+                self._last_full_scan = frame_index
+            return seen
+
+    def detect(self, gray, predictions=None):
+        frame_index, rois = self._plan(gray.shape, predictions)
+
+        if rois is None:
+            corners, ids = self._detect_full(gray)
+            self.full_scans += 1
+            self._update_tracks(frame_index, corners, ids, full_scan=True)
+            return corners, ids
+
+        found_corners = []
+        found_ids = []
+        for expected_id, x0, y0, x1, y1 in rois:
+            roi_corners, roi_ids, _ = cv2.aruco.detectMarkers(gray[y0:y1, x0:x1], self.aruco_dict,
+                                                              parameters=self.parameters)
+            if roi_ids is None:
+                continue
+            offset = np.array([x0, y0], dtype=np.float32)
+            for marker_corners, marker_id in zip(roi_corners, roi_ids.flatten()):
+                # Overlappende ROI's kunnen dezelfde marker twee keer vinden
+                if marker_id in found_ids:
+                    continue
+                found_corners.append(marker_corners + offset)
+                found_ids.append(int(marker_id))
+        self.roi_scans += 1
+
+        ids = np.array(found_ids, dtype=np.int32).reshape(-1, 1) if found_ids else None
+        seen = self._update_tracks(frame_index, found_corners, ids, full_scan=False)
+
+        # Een gevolgde marker is kwijt: val direct terug op een volledige scan van dit frame
+        if any(expected_id not in seen for expected_id, _, _, _, _ in rois):
+            corners, ids = self._detect_full(gray)
+            self.full_scans += 1
+            self._update_tracks(frame_index, corners, ids, full_scan=True)
+            return corners, ids
+
+        return found_corners, ids
+
+
+def create_marker_detector(aruco_dict, parameters, detection_config,
+                           marker_real_width=None, focal_length=None):
+    """
+    Maakt de detector aan volgens de configuratie (zie DETECTION_CONFIG in config.py).
+
+    Args:
+        aruco_dict, parameters: ArUco-dictionary en detectieparameters.
+        detection_config (dict): Met "mode" ("full" of "roi"), de ROI-instellingen,
+                                 "pyramid_scale" (een getal, of "auto") en "backend"
+                                 ("thread", of "process" voor een ProcessPoolDetector).
+        marker_real_width, focal_length: Nodig voor pyramid_scale "auto" (MARKER_REAL_WIDTH, FOCAL_LENGTH).
+
+    Returns:
+        MarkerDetector: De detector.
+    """
+    backend = detection_config.get("backend", "thread")
+    if backend == "process":
+        # Import hier: process_detection gebruikt deze functie zelf in de worker-processen
+        from process_detection import ProcessPoolDetector
+        return ProcessPoolDetector(aruco_dict, parameters, detection_config, marker_real_width, focal_length,
+                                   processes=detection_config.get("processes"),
+                                   slots_per_process=detection_config.get("slots_per_process", 2),
+                                   start_method=detection_config.get("start_method", "spawn"))
+    if backend != "thread":
+        raise ValueError(f"Onbekende detectie-backend: {backend}")
+
+    detection_scale = detection_config.get("pyramid_scale", 1.0)
+    if detection_scale == "auto":
+        detection_scale = compute_detection_scale(marker_real_width, focal_length,
+                                                  detection_config.get("max_marker_distance", 1.5),
+                                                  detection_config.get("min_marker_pixels", 24))
+
+    mode = detection_config.get("mode", "full")
+    if mode == "roi":
+        return RoiMarkerDetector(aruco_dict, parameters,
+                                 full_scan_interval=detection_config.get("full_scan_interval", 15),
+                                 roi_padding=detection_config.get("roi_padding", 2.5),
+                                 min_roi_size=detection_config.get("min_roi_size", 64),
+                                 detection_scale=detection_scale,
+                                 max_missed_scans=detection_config.get("max_missed_scans", 3))
+    if mode != "full":
+        raise ValueError(f"Onbekende detectiemodus: {mode}")
+    return MarkerDetector(aruco_dict, parameters, detection_scale)
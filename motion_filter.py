@@ -0,0 +1,127 @@
+# motion_filter.py
+import numpy as np
+
+
+class ConstantVelocityFilter:
+    """
+    Kalman-filter met een constante-snelheidsmodel voor de positie van één auto.
+
+    De toestand is [x, y, vx, vy] in compositiecoördinaten (pixels en pixels per seconde).
+    Elke detectie uit process_markers is een meting van (x, y) op het capture-tijdstip van het
+    frame. Tussen detecties kan de positie voorspeld worden met position_at(t), zodat overlay,
+    ranking en ROI-detectie niet op een bevroren positie blijven staan als een marker een paar
+    frames gemist wordt. Langer dan max_coast seconden zonder detectie wordt niet voorspeld.
+
+    De schaalfactor (uit de markergrootte) wordt apart gladgestreken met een exponentieel
+    voortschrijdend gemiddelde, omdat die per frame een paar procent verspringt.
+
+    Toestand en tijdstip staan samen in één tuple (_estimate) die per update in één toewijzing
+    vervangen wordt. position_at() leest die tuple één keer, zodat andere threads (de
+    detect-workers van de pipeline) veilig een voorspelling kunnen opvragen terwijl de
+    logic-thread het filter bijwerkt: nooit een nieuwe toestand met een oud tijdstip.
+    """
+
+    def __init__(self, process_noise=1500.0, measurement_noise=1.5, scale_smoothing=0.3, max_coast=0.5):
+        """
+        Args:
+            process_noise (float): Standaardafwijking van de versnelling (px/s²).
+            measurement_noise (float): Standaardafwijking van een gemeten markercentrum (px).
+            scale_smoothing (float): Gewicht (0..1] van een nieuwe schaalmeting in het gemiddelde.
+            max_coast (float): Maximale tijd (s) na de laatste detectie waarover voorspeld wordt.
+        """
+        self.process_noise = process_noise
+        self.measurement_noise = measurement_noise
+        self.scale_smoothing = scale_smoothing
+        self.max_coast = max_coast
+        self._measurement_cov = np.eye(2) * measurement_noise ** 2
+        self.reset()
+
+    def reset(self):
+        self._estimate = (None, None)   # (toestand [x, y, vx, vy], tijdstip van de laatste update)
+        self.covariance = None          # 4x4
+        self.scale = None               # Gladgestreken schaalfactor
+
+    @property
+    def state(self):
+        return self._estimate[0]
+
+    @property
+    def last_time(self):
+        return self._estimate[1]
+
+    @property
+    def initialized(self):
+        return self.state is not None
+
+    @property
+    def velocity(self):
+        """
+        De geschatte snelheid (vx, vy) in pixels per seconde, of (0.0, 0.0) zonder toestand.
+        """
+        state = self.state
+        if state is None:
+            return 0.0, 0.0
+        return float(state[2]), float(state[3])
+
+    def _transition(self, dt):
+        F = np.eye(4)
+        F[0, 2] = F[1, 3] = dt
+        q = self.process_noise ** 2
+        dt2 = dt * dt
+        Q = np.zeros((4, 4))
+        Q[0, 0] = Q[1, 1] = 0.25 * dt2 * dt2 * q
+        Q[0, 2] = Q[2, 0] = Q[1, 3] = Q[3, 1] = 0.5 * dt2 * dt * q
+        Q[2, 2] = Q[3, 3] = dt2 * q
+        return F, Q
+
+    def update(self, t, point, scale=None):
+        """
+        Verwerkt een detectie op tijdstip t.
+
+        Args:
+            t (float): Capture-tijdstip van het frame.
+            point (tuple): Het gemeten centrum (x, y).
+            scale (float, optional): De gemeten schaalfactor.
+        """
+        z = np.asarray(point, dtype=np.float64)
+        if scale is not None:
+            self.scale = scale if self.scale is None else self.scale + self.scale_smoothing * (scale - self.scale)
+
+        if self.state is None or t - self.last_time > self.max_coast:
+            # Eerste detectie (of na een lange onderbreking): begin opnieuw, snelheid nog onbekend
+            self.covariance = np.diag([self.measurement_noise ** 2, self.measurement_noise ** 2, 500.0 ** 2, 500.0 ** 2])
+            self._estimate = (np.array([z[0], z[1], 0.0, 0.0]), t)
+            return
+
+        # Voorspellen tot t
+        dt = max(t - self.last_time, 0.0)
+        F, Q = self._transition(dt)
+        state = F @ self.state
+        covariance = F @ self.covariance @ F.T + Q
+
+        # Bijwerken met de meting (H = [I 0])
+        S = covariance[:2, :2] + self._measurement_cov
+        K = covariance[:, :2] @ np.linalg.inv(S)
+        state = state + K @ (z - state[:2])
+        covariance = covariance - K @ covariance[:2, :]
+
+        # Toestand en tijdstip in één toewijzing vervangen, zie de docstring van de klasse
+        self.covariance = covariance
+        self._estimate = (state, t)
+
+    def position_at(self, t):
+        """
+        Voorspelt de positie op tijdstip t, zonder de toestand te veranderen.
+
+        Returns:
+            tuple or None: (x, y), of None zonder toestand of als t meer dan max_coast
+                           seconden na de laatste detectie ligt.
+        """
+        state, last_time = self._estimate
+        if state is None:
+            return None
+        dt = t - last_time
+        if dt > self.max_coast:
+            return None
+        dt = max(dt, 0.0)
+        return float(state[0] + state[2] * dt), float(state[1] + state[3] * dt)
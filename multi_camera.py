@@ -0,0 +1,316 @@
+# multi_camera.py
+"""
+Meerdere camera's op één baan: homografieën naar baancoördinaten en het samenvoegen van detecties.
+
+Elke camera heeft een homografie van zijn beeld naar de gedeelde baancoördinaten (de ruimte
+waarin PATH_POINTS, FINISH_ZONE en CHECKPOINT_ZONE liggen). Voor één camera is dat de
+verschuiving over de zijbalk (BLACK_BAR_WIDTH, 0). Detecties worden per camera omgezet naar
+MarkerObservations in baancoördinaten; de DetectionMerger voegt dubbele waarnemingen van
+dezelfde marker (in het overlapgebied van twee camera's) samen op tijdstip en betrouwbaarheid,
+voordat ze de race-logica bereiken.
+
+Met een cameracalibratie (zie camera_calibration.py) worden alleen de gedetecteerde
+hoekpunten voor lensvervorming gecorrigeerd; het frame zelf niet. Een homografie uit ijkpunten
+of een matrix geldt voor het gecorrigeerde beeld. Bij de standaard verschuiving is de baan op
+het getoonde (vervormde) beeld getekend: de posities blijven dan in dat beeld en de correctie
+bepaalt alleen grootte en afstand van de markers.
+"""
+import threading
+
+import cv2
+import numpy as np
+
+from config import BLACK_BAR_WIDTH, MARKER_REAL_WIDTH, FOCAL_LENGTH
+from log_utils import get_logger
+
+logger = get_logger(__name__)
+
+
+class CameraHomography:
+    """
+    Projectieve afbeelding van camerabeeld-coördinaten naar baancoördinaten (en terug).
+
+    Attributen:
+        matrix (numpy.ndarray): 3x3-homografie camera -> baan.
+        inverse (numpy.ndarray): 3x3-homografie baan -> camera.
+        undistorted (bool): True als de homografie voor het voor lensvervorming gecorrigeerde
+                            camerabeeld geldt, False als de baan op het getoonde (vervormde)
+                            beeld getekend is (de standaard verschuiving).
+    """
+    __slots__ = ("matrix", "inverse", "undistorted")
+
+    def __init__(self, matrix, undistorted=True):
+        self.matrix = np.asarray(matrix, dtype=np.float64).reshape(3, 3)
+        self.inverse = np.linalg.inv(self.matrix)
+        self.undistorted = undistorted
+
+    @classmethod
+    def from_offset(cls, dx=BLACK_BAR_WIDTH, dy=0):
+        """
+        Een zuivere verschuiving (de standaard voor één camera: het beeld naast de zijbalk).
+
+        PATH_POINTS, FINISH_ZONE en CHECKPOINT_ZONE zijn dan in het getoonde, vervormde
+        camerabeeld getekend, dus de homografie werkt op niet-gecorrigeerde punten.
+        """
+        return cls([[1.0, 0.0, dx], [0.0, 1.0, dy], [0.0, 0.0, 1.0]], undistorted=False)
+
+    @classmethod
+    def from_point_pairs(cls, camera_points, track_points):
+        """
+        Schat de homografie uit ijkpunten (minstens 4, bijv. hoeken van de baan of markers op
+        bekende plaatsen) met cv2.findHomography (RANSAC).
+
+        Args:
+            camera_points (list): Punten (x, y) in het camerabeeld.
+            track_points (list): Dezelfde punten in baancoördinaten.
+
+        Raises:
+            ValueError: Als er te weinig punten zijn of er geen homografie gevonden wordt.
+        """
+        camera_points = np.asarray(camera_points, dtype=np.float64).reshape(-1, 2)
+        track_points = np.asarray(track_points, dtype=np.float64).reshape(-1, 2)
+        if len(camera_points) < 4 or len(camera_points) != len(track_points):
+            raise ValueError("Voor een homografie zijn minstens 4 paren ijkpunten nodig.")
+        matrix, _ = cv2.findHomography(camera_points, track_points, cv2.RANSAC, 3.0)
+        if matrix is None:
+            raise ValueError("Geen homografie gevonden voor de opgegeven ijkpunten.")
+        return cls(matrix)
+
+    @classmethod
+    def from_config(cls, camera_config):
+        """
+        Maakt de homografie uit een camera-configuratie (zie CAMERAS in config.py):
+        "homography" (3x3-matrix), anders "point_pairs" ([(camera_punt, baan_punt), ...]),
+        anders de standaard verschuiving.
+        """
+        if camera_config.get("homography") is not None:
+            return cls(camera_config["homography"])
+        if camera_config.get("point_pairs"):
+            camera_points, track_points = zip(*camera_config["point_pairs"])
+            return cls.from_point_pairs(camera_points, track_points)
+        return cls.from_offset()
+
+    @staticmethod
+    def _apply(matrix, points):
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        projected = points @ matrix[:, :2].T + matrix[:, 2]
+        return projected[:, :2] / projected[:, 2:3]
+
+    def to_track(self, points):
+        """
+        Zet (N, 2) camerabeeld-punten om naar baancoördinaten.
+        """
+        return self._apply(self.matrix, points)
+
+    def to_camera(self, points):
+        """
+        Zet (N, 2) baanpunten om naar camerabeeld-coördinaten.
+        """
+        return self._apply(self.inverse, points)
+
+
+class MarkerObservation:
+    """
+    Eén waarneming van een marker, in baancoördinaten.
+
+    Attributen:
+        marker_id (int): Het ArUco-ID.
+        timestamp (float): Het tijdstip waarop het frame is vastgelegd.
+        corners (numpy.ndarray): De 4 hoekpunten (4, 2) in baancoördinaten.
+        confidence (float): Betrouwbaarheid: de gemiddelde zijde van de marker in camerapixels
+                            (een grotere marker ligt dichter bij de camera en is nauwkeuriger).
+        camera_id (int): De camera van de waarneming.
+        distance (float or None): Geschatte afstand van de marker tot de camera (m).
+    """
+    __slots__ = ("marker_id", "timestamp", "corners", "confidence", "camera_id", "distance")
+
+    def __init__(self, marker_id, timestamp, corners, confidence, camera_id=0, distance=None):
+        self.marker_id = marker_id
+        self.timestamp = timestamp
+        self.corners = corners
+        self.confidence = confidence
+        self.camera_id = camera_id
+        self.distance = distance
+
+    @property
+    def center(self):
+        """
+        Het centrum van de marker (x, y) als floats.
+        """
+        x, y = self.corners.mean(axis=0).tolist()
+        return x, y
+
+    def __repr__(self):
+        x, y = self.center
+        return (f"MarkerObservation(marker_id={self.marker_id}, timestamp={self.timestamp:.3f}, "
+                f"center=({x:.1f}, {y:.1f}), confidence={self.confidence:.1f}, camera_id={self.camera_id})")
+
+
+def observations_from_detection(corners, ids, timestamp, homography, camera_id=0, undistorter=None):
+    """
+    Zet het resultaat van cv2.aruco.detectMarkers om naar waarnemingen in baancoördinaten.
+
+    Komt een ID meerdere keren voor in dezelfde detectie, dan telt alleen de eerste. Met een
+    (actieve) undistorter (CornerUndistorter) worden de hoekpunten eerst voor lensvervorming
+    gecorrigeerd en wordt de afstand met de gecalibreerde focale lengte berekend, anders met
+    FOCAL_LENGTH. Geldt de homografie voor het vervormde beeld (homography.undistorted is
+    False), dan gaan de gedetecteerde hoekpunten zelf naar baancoördinaten.
+
+    Returns:
+        list: MarkerObservations in de volgorde van de detectie.
+    """
+    if ids is None or len(ids) == 0:
+        return []
+    marker_ids = []
+    indices = []
+    seen = set()
+    for index, marker_id in enumerate(ids.flatten().tolist()):
+        if marker_id not in seen:
+            seen.add(marker_id)
+            marker_ids.append(marker_id)
+            indices.append(index)
+    detected = np.concatenate([np.asarray(corners[index], dtype=np.float64).reshape(4, 2) for index in indices])
+    if undistorter is not None and undistorter.enabled:
+        # Alle hoekpunten van dit frame in één keer corrigeren
+        points = undistorter.undistort(detected)
+        focal_length = undistorter.focal_length
+    else:
+        points = detected
+        focal_length = FOCAL_LENGTH
+    # Een baan in het vervormde beeld krijgt de gedetecteerde hoekpunten (gelijk aan
+    # undistorter.distort() van de gecorrigeerde, zonder de omweg)
+    track_points = homography.to_track(points if homography.undistorted else detected).reshape(-1, 4, 2)
+    points = points.reshape(-1, 4, 2)
+
+    # Gemiddelde zijde (pixels) in het gecorrigeerde camerabeeld
+    sizes = (np.linalg.norm(points[:, 0] - points[:, 1], axis=1)
+             + np.linalg.norm(points[:, 0] - points[:, 3], axis=1)) / 2.0
+
+    observations = []
+    for marker_id, marker_points, size in zip(marker_ids, track_points, sizes.tolist()):
+        distance = MARKER_REAL_WIDTH * focal_length / size if size > 0 else None
+        observations.append(MarkerObservation(marker_id, timestamp, marker_points, size, camera_id, distance))
+    return observations
+
+
+class DetectionMerger:
+    """
+    Verzamelt waarnemingen van alle camera's en voegt dubbele waarnemingen samen.
+
+    Waarnemingen van dezelfde marker binnen merge_window seconden van elkaar (dezelfde marker
+    gezien door twee camera's in het overlapgebied) worden één waarneming: hoekpunten en
+    tijdstip zijn het gewogen gemiddelde met de betrouwbaarheid als gewicht. pop_ready geeft de
+    waarnemingen tot een tijdstip in tijdvolgorde vrij, met merge_window vertraging zodat
+    dubbele waarnemingen van een camera die iets achterloopt nog kunnen aansluiten. Een
+    waarneming die binnenkomt nadat er al een latere van dezelfde marker is vrijgegeven (een
+    camera die meer dan merge_window achterloopt), wordt weggegooid, zodat de race-logica elke
+    marker strikt in tijdvolgorde ziet.
+
+    Thread-safe: de camera-workers voegen toe, de logic-worker haalt op.
+    """
+
+    def __init__(self, merge_window=0.02):
+        """
+        Args:
+            merge_window (float): Maximaal tijdsverschil (s) tussen samen te voegen waarnemingen.
+        """
+        self.merge_window = merge_window
+        self._pending = []
+        self._released = {}   # marker_id -> tijdstip van de laatst vrijgegeven waarneming
+        self._lock = threading.Lock()
+
+        # Statistieken
+        self.received = 0
+        self.merged = 0
+        self.stale = 0
+
+    def add(self, observations):
+        """
+        Voegt waarnemingen (van één camera-frame) toe.
+        """
+        if not observations:
+            return
+        with self._lock:
+            self._pending.extend(observations)
+            self.received += len(observations)
+
+    def pop_ready(self, until_time):
+        """
+        Geeft de samengevoegde waarnemingen met een tijdstip tot en met until_time.
+
+        Een waarneming binnen merge_window voor until_time wordt pas bij een volgende aanroep
+        vrijgegeven (ongeveer één frame later), zodat een dubbele waarneming van een camera
+        die iets achterloopt nog samengevoegd wordt in plaats van als verouderd weggegooid.
+
+        Returns:
+            list: MarkerObservations, gesorteerd op tijdstip.
+        """
+        with self._lock:
+            ready = [obs for obs in self._pending if obs.timestamp <= until_time]
+            if not ready:
+                return []
+            self._pending = [obs for obs in self._pending if obs.timestamp > until_time]
+
+            by_marker = {}
+            for obs in ready:
+                by_marker.setdefault(obs.marker_id, []).append(obs)
+
+            # Een groep die pas binnen merge_window voor until_time begint, kan nog een
+            # waarneming van een andere camera krijgen: die blijft staan tot de volgende keer
+            release_until = until_time - self.merge_window
+            held = []
+            result = []
+            stale = 0
+            for marker_id, observations in by_marker.items():
+                observations.sort(key=lambda obs: obs.timestamp)
+                last_released = self._released.get(marker_id)
+                released = []
+                group = []
+                for obs in observations:
+                    if last_released is not None and obs.timestamp <= last_released:
+                        stale += 1
+                        continue
+                    if group and obs.timestamp - group[0].timestamp > self.merge_window:
+                        released.append(self._merge(group))
+                        group = []
+                    group.append(obs)
+                if group:
+                    if group[0].timestamp <= release_until:
+                        released.append(self._merge(group))
+                    else:
+                        held.extend(group)
+                if released:
+                    self._released[marker_id] = released[-1].timestamp
+                    result.extend(released)
+            self._pending.extend(held)
+            self.stale += stale
+
+        result.sort(key=lambda obs: obs.timestamp)
+        if stale:
+            logger.debug("DetectionMerger: %s verouderde waarneming(en) weggegooid.", stale)
+        return result
+
+    def _merge(self, group):
+        if len(group) == 1:
+            return group[0]
+        self.merged += len(group) - 1
+        weights = np.array([obs.confidence for obs in group], dtype=np.float64)
+        if weights.sum() <= 0:
+            weights = np.ones(len(group))
+        weights /= weights.sum()
+        corners = np.tensordot(weights, np.stack([obs.corners for obs in group]), axes=1)
+        timestamp = float(np.dot(weights, [obs.timestamp for obs in group]))
+        best = max(group, key=lambda obs: obs.confidence)
+        distances = [obs.distance for obs in group]
+        distance = float(np.dot(weights, distances)) if None not in distances else best.distance
+        return MarkerObservation(best.marker_id, timestamp, corners,
+                                 max(obs.confidence for obs in group), best.camera_id, distance)
+
+    def stats(self):
+        """
+        Returns:
+            dict: Met "received", "merged", "stale" en "pending".
+        """
+        with self._lock:
+            pending = len(self._pending)
+        return {"received": self.received, "merged": self.merged, "stale": self.stale, "pending": pending}
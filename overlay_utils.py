@@ -4,9 +4,18 @@ import numpy as np
 import time
 
 from config import *
-from race_sorting import sort_cars_by_position
+from race_engine import ranked_cars
 from ranking_bar import draw_ranking_bar
 from image_utils import overlay_image
+from sidebar_renderer import SidebarRenderer
+from log_utils import get_logger
+from perf_stats import perf
+
+logger = get_logger(__name__)
+
+# Voorgerenderde teksten voor display_car_info (alleen gebruikt door de render-stage)
+_sidebar = SidebarRenderer(time_refresh_interval=SIDEBAR_CONFIG["time_refresh_interval"],
+                           max_glyphs=SIDEBAR_CONFIG["max_glyphs"])
 
 def draw_race_track(frame, path_points):
     # Tekent het traject (de centerline) op het frame.
@@ -81,7 +90,7 @@ def overlay_position_indicator(frame, car):
     cv2.putText(frame, rank_text, (text_x, text_y), FONT, font_scale, text_color, thickness, LINE_TYPE)
     
     # Debug: Print de progress voor de auto.
-    print(f"Car {car.marker_id} progress: {car.progress:.1f}")
+    logger.debug("Car %s progress: %.1f", car.marker_id, car.progress)
     
     return frame
 
@@ -153,27 +162,39 @@ def draw_final_ranking_overlay(frame, sorted_cars):
 
     return output
 
-def update_and_draw_overlays(frame, cars, race_manager):
+def update_and_draw_overlays(frame, cars, race_manager, draw_ranking_background=True, frame_time=None):
     """
-    Update de progress van elke auto (langs de centerline), berekent de ranking en tekent de
-    auto-informatie overlays op basis van de display-coördinaten die eerder in process_frame 
-    (bijv. car.display_x en car.display_y) zijn ingesteld. 
+    Tekent de auto-informatie overlays en de ranking bar op basis van de display-coördinaten en
+    posities die eerder in de race-logica (update_race_state en de RaceEngine) zijn ingesteld
+    (bijv. car.display_x, car.display_y en car.position).
     
     Omdat alle auto-informatie nu dynamisch in de Car-objecten zit (via CAR_CONFIG),
     hoeft deze functie niet aangepast te worden als je een auto toevoegt of verwijdert.
 
+    Met draw_ranking_background=False wordt de achtergrond van de ranking bar overgeslagen,
+    omdat die dan al uit de StaticOverlayLayer komt.
+
+    frame_time is de timestamp van het frame; zonder waarde wordt de klok van de race_manager gebruikt.
+
     Returns:
         frame (numpy.ndarray): Het originele frame met alle overlays toegevoegd.
     """
-    # Sorteer de auto's op basis van hun progress (deze functie is verondersteld al dynamisch de Car objecten te verwerken)
-    sorted_cars = sort_cars_by_position(cars)
-    current_time = time.time()
+    # Sorteer de auto's op hun positie (de ranking zelf is al door de RaceEngine berekend;
+    # zolang ranking_version gelijk blijft, wordt de vorige volgorde hergebruikt)
+    start = time.perf_counter()
+    ranking_version = race_manager.ranking_version
+    sorted_cars = ranked_cars(cars, ranking_version)
+    start = perf.lap("sort", start)
+    current_time = frame_time if frame_time is not None else race_manager.clock.now()
     
     # Werk de auto-informatie bij en teken deze overlay (zoals username, lap-tijd, enz.)
     display_car_info(cars, frame, current_time, race_manager)
+    start = perf.lap("car_info", start)
     
     # Teken de ranking bar (deze functie gebruikt nu de dynamisch gesorteerde auto's en RANKING_BAR_CONFIG)
-    frame = draw_ranking_bar(frame, sorted_cars, RANKING_BAR_CONFIG)
+    frame = draw_ranking_bar(frame, sorted_cars, RANKING_BAR_CONFIG, draw_background=draw_ranking_background,
+                             ranking_version=ranking_version)
+    start = perf.lap("ranking_bar", start)
     
     # Voor elke auto: teken de auto-afbeelding en de position indicator op basis van de display-coördinaten die eerder zijn vastgesteld.
     for car in sorted_cars:
@@ -181,7 +202,8 @@ def update_and_draw_overlays(frame, cars, race_manager):
             overlay_image(frame, car.car_image, car.x, car.y, car.scale_factor)
             overlay_position_indicator(frame, car)
         else:
-            print(f"Auto {car.marker_id} heeft nog geen geldige positie. Overslaan.")
+            logger.debug("Auto %s heeft nog geen geldige positie. Overslaan.", car.marker_id)
+    perf.lap("car_overlays", start)
     
     return frame
 
@@ -192,82 +214,17 @@ def display_car_info(cars, frame, current_time, race_manager):
       - Huidige lap-info: of de auto "Finished" is, of welke lap actief is.
       - Totale racetijd en de snelste lap.
       - Eventueel een positie-indicator.
+
+    De teksten komen uit de SidebarRenderer: elke tekst wordt één keer gerenderd en daarna
+    als bitmap gekopieerd, tot de tekst van het veld verandert.
     """
     for car in cars.values():
         if not car.lap_position or not car.lap_complete_position:
-            print(f"Fout: lap_position of lap_complete_position ontbreekt voor auto met marker_id {car.marker_id}")
+            logger.error("lap_position of lap_complete_position ontbreekt voor auto met marker_id %s", car.marker_id)
             continue
 
-        # Gebruik de kleur die is ingesteld via de initialisatie (bijv. via settings["sidebar_text_color"])
-        color = car.color  
-        username = car.username if car.username is not None else car.color_key.capitalize()
-
-        # Pas de BLACK_BAR_WIDTH toe op de X-coördinaten van de overlay
-        adjusted_lap_position = (car.lap_position[0], car.lap_position[1])
-        adjusted_complete_position = (car.lap_complete_position[0], car.lap_complete_position[1])
-
-        # Debug-uitvoer voor aangepaste posities
-        print(f"Car {car.marker_id}: oorspronkelijke lap_position = {car.lap_position}, aangepaste lap_position = {adjusted_lap_position}")
-        print(f"Car {car.marker_id}: oorspronkelijke lap_complete_position = {car.lap_complete_position}, aangepaste lap_complete_position = {adjusted_complete_position}")
-
-        # Teken de gebruikersnaam (30 pixels boven de basispositie)
-        username_pos = (adjusted_lap_position[0], adjusted_lap_position[1] - 30)
-        draw_text(frame, username, username_pos, color, FONT_SCALE_SIDEBAR, THICKNESS)
-
-        # Controleer of de race is gestart
-        if not race_manager.race_started:
-            total_time_str = "0.000s"
-            best_lap_str = "N/A"
-            lap_str = "Lap 1"
-        else:
-            lap_time_diff = current_time - car.lap_text_start_time
-
-            # Als de lap net is voltooid, toon "Lap Complete" en de lap-tijd
-            if lap_time_diff < LAP_COMPLETE_DURATION:
-                draw_text(frame, "Lap Complete", adjusted_complete_position, color, FONT_SCALE_SIDEBAR, THICKNESS)
-                if car.lap_times:
-                    last_lap_time = car.lap_times[-1]
-                    if last_lap_time > 0:
-                        minutes, seconds = divmod(last_lap_time, 60)
-                        lap_time_str = f"{int(minutes)}m {seconds:.2f}s"
-                        label_pos = (adjusted_complete_position[0], adjusted_complete_position[1] + 30)
-                        draw_text(frame, "Lap Time:", label_pos, color, FONT_SCALE_SIDEBAR, THICKNESS)
-                        value_pos = (label_pos[0], label_pos[1] + 25)
-                        draw_text(frame, lap_time_str, value_pos, color, FONT_SCALE_SIDEBAR, THICKNESS)
-
-            # Bereken en formatteer de totale tijd
-            if car.finished and car.finish_time is not None:
-                total_race_time = car.finish_time - race_manager.race_start_time
-            else:
-                total_race_time = current_time - race_manager.race_start_time
-            total_minutes, total_seconds = divmod(total_race_time, 60)
-            total_time_str = f"{int(total_minutes)}m {total_seconds:.2f}s"
-
-            # Bereken en formatteer de snelste ronde
-            best_lap_time = car.get_best_lap_time()
-            if best_lap_time:
-                best_minutes, best_seconds = divmod(best_lap_time, 60)
-                best_lap_str = f"{int(best_minutes)}m {best_seconds:.2f}s"
-            else:
-                best_lap_str = "N/A"
-
-            # Toon de huidige ronde
-            if car.finished:
-                lap_str = "Finished"  # Pas dit aan om "Lap X" te vermijden bij gefinishte auto's
-            else:
-                lap_str = f"Lap {car.lap_count + 1}"
-
-        # Teken tijd- en ronde-informatie
-        total_label_pos = (adjusted_lap_position[0], adjusted_lap_position[1] + 35)
-        total_value_pos = (adjusted_lap_position[0], total_label_pos[1] + 25)
-        best_label_pos = (adjusted_lap_position[0], total_value_pos[1] + 35)
-        best_value_pos = (adjusted_lap_position[0], best_label_pos[1] + 25)
-
-        draw_text(frame, lap_str, adjusted_lap_position, color, FONT_SCALE_SIDEBAR, THICKNESS)
-        draw_text(frame, "Total Time:", total_label_pos, color, FONT_SCALE_SIDEBAR, THICKNESS)
-        draw_text(frame, total_time_str, total_value_pos, color, FONT_SCALE_SIDEBAR, THICKNESS)
-        draw_text(frame, "Fastest Lap:", best_label_pos, color, FONT_SCALE_SIDEBAR, THICKNESS)
-        draw_text(frame, best_lap_str, best_value_pos, color, FONT_SCALE_SIDEBAR, THICKNESS)
+        # Teken gebruikersnaam, lap-info en tijden
+        _sidebar.draw(frame, car, current_time, race_manager)
 
         # Teken de positie-indicator
-        overlay_position_indicator(frame, car)
\ No newline at end of file
+        overlay_position_indicator(frame, car)
@@ -0,0 +1,205 @@
+# perf_stats.py
+import csv
+import json
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from config import PERF_CONFIG, BLACK_BAR_WIDTH
+
+
+class TimingRing:
+    """
+    Ringbuffer met de laatste `capacity` metingen (in seconden) van één stage op één thread.
+
+    Er is precies één schrijver per ring (zie PerfRecorder), dus schrijven gebeurt zonder lock:
+    één toewijzing in een vooraf gealloceerde numpy-array en het ophogen van de teller.
+    Lezers (HUD, rapport) nemen een kopie en kunnen hooguit de laatste meting missen.
+    """
+    __slots__ = ("values", "count")
+
+    def __init__(self, capacity):
+        self.values = np.zeros(capacity, dtype=np.float64)
+        self.count = 0
+
+    def add(self, seconds):
+        self.values[self.count % len(self.values)] = seconds
+        self.count += 1
+
+    def samples(self):
+        """
+        Geeft een kopie van de gevulde metingen (niet in tijdsvolgorde).
+        """
+        return self.values[:min(self.count, len(self.values))].copy()
+
+
+class PerfRecorder:
+    """
+    Verzamelt per-frame timings van de stages (capture, grayscale, detect, process_markers,
+    sort, de overlay-tekenstappen, imshow, ...).
+
+    Elke (stage, thread)-combinatie krijgt een eigen TimingRing, zodat elke ring één schrijver
+    heeft: ook als meerdere detect-workers dezelfde stage meten, is er geen lock nodig in de
+    hot path. Alleen het aanmaken van een nieuwe ring (eenmalig per stage en thread) gebeurt
+    onder een lock. De rollups (p50/p95/p99) voegen de ringen van een stage samen.
+
+    Gebruik:
+        t = time.perf_counter()
+        ...                               # grayscale
+        t = perf.lap("grayscale", t)      # registreert de duur en geeft het nieuwe beginpunt
+    """
+
+    def __init__(self, capacity=600, enabled=True):
+        self.capacity = capacity
+        self.enabled = enabled
+        self._rings = {}
+        self._lock = threading.Lock()
+
+    def _ring(self, stage):
+        key = (stage, threading.get_ident())
+        ring = self._rings.get(key)
+        if ring is None:
+            with self._lock:
+                ring = self._rings.setdefault(key, TimingRing(self.capacity))
+        return ring
+
+    def record(self, stage, seconds):
+        """
+        Registreert één meting (in seconden) voor de stage.
+        """
+        if self.enabled:
+            self._ring(stage).add(seconds)
+
+    def lap(self, stage, start_time):
+        """
+        Registreert de tijd sinds start_time voor de stage en geeft het huidige tijdstip terug.
+        """
+        now = time.perf_counter()
+        if self.enabled:
+            self._ring(stage).add(now - start_time)
+        return now
+
+    def stages(self):
+        """
+        Geeft de namen van alle gemeten stages, in de volgorde waarin ze voor het eerst gemeten zijn.
+        """
+        return list(dict.fromkeys(stage for stage, _ in list(self._rings)))
+
+    def summary(self):
+        """
+        Berekent de rollups per stage over de metingen in de ringbuffers.
+
+        Returns:
+            dict: {stage: {"count", "mean_ms", "p50_ms", "p95_ms", "p99_ms", "max_ms"}}
+        """
+        samples = {}
+        for (stage, _), ring in list(self._rings.items()):
+            samples.setdefault(stage, []).append(ring.samples())
+
+        result = {}
+        for stage, parts in samples.items():
+            values = np.concatenate(parts) * 1000.0
+            if len(values) == 0:
+                continue
+            p50, p95, p99 = np.percentile(values, [50, 95, 99])
+            result[stage] = {
+                "count": int(len(values)),
+                "mean_ms": float(values.mean()),
+                "p50_ms": float(p50),
+                "p95_ms": float(p95),
+                "p99_ms": float(p99),
+                "max_ms": float(values.max()),
+            }
+        return result
+
+    def dump(self, path_prefix):
+        """
+        Schrijft de rollups naar <path_prefix>.csv en <path_prefix>.json.
+
+        Returns:
+            dict: De geschreven samenvatting.
+        """
+        summary = self.summary()
+        columns = ["count", "mean_ms", "p50_ms", "p95_ms", "p99_ms", "max_ms"]
+        with open(f"{path_prefix}.csv", "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["stage"] + columns)
+            for stage, stats in summary.items():
+                writer.writerow([stage] + [round(stats[c], 3) if c != "count" else stats[c] for c in columns])
+        with open(f"{path_prefix}.json", "w") as f:
+            json.dump(summary, f, indent=2)
+        return summary
+
+    def reset(self):
+        with self._lock:
+            self._rings = {}
+
+
+# De recorder van het programma (wordt door alle modules gedeeld)
+perf = PerfRecorder(capacity=PERF_CONFIG["capacity"], enabled=PERF_CONFIG["enabled"])
+
+
+class PerfHud:
+    """
+    Tekent de p50/p95/p99 per stage onderin de linker zijbalk.
+
+    De rollups worden maar om de refresh_interval seconden opnieuw berekend, zodat de
+    HUD zelf nauwelijks frametijd kost.
+    """
+
+    def __init__(self, recorder, stages=None, refresh_interval=0.5,
+                 font_scale=0.35, line_height=13, color=(0, 255, 255)):
+        self.recorder = recorder
+        self.stages = stages
+        self.refresh_interval = refresh_interval
+        self.font_scale = font_scale
+        self.line_height = line_height
+        self.color = color
+        self._lines = []
+        self._last_refresh = None
+
+    def _refresh(self):
+        summary = self.recorder.summary()
+        stages = self.stages if self.stages is not None else list(summary)
+        self._lines = ["stage       p50/p95/p99 ms"]
+        for stage in stages:
+            stats = summary.get(stage)
+            if stats is not None:
+                self._lines.append(f"{stage[:11]:<11} {stats['p50_ms']:.1f}/{stats['p95_ms']:.1f}/{stats['p99_ms']:.1f}")
+
+    def draw(self, frame, frame_height):
+        """
+        Tekent de HUD in de linker zijbalk, net boven de ranking bar.
+
+        Args:
+            frame (numpy.ndarray): De compositie.
+            frame_height (int): De hoogte van het camerabeeld (de ranking bar begint daaronder).
+        """
+        now = time.perf_counter()
+        if self._last_refresh is None or now - self._last_refresh >= self.refresh_interval:
+            self._refresh()
+            self._last_refresh = now
+
+        top = max(frame_height - len(self._lines) * self.line_height - 6, 0)
+        cv2.rectangle(frame, (0, top), (BLACK_BAR_WIDTH - 1, frame_height - 1), (0, 0, 0), -1)
+        for i, line in enumerate(self._lines):
+            y = top + (i + 1) * self.line_height
+            cv2.putText(frame, line, (4, y), cv2.FONT_HERSHEY_SIMPLEX, self.font_scale,
+                        self.color, 1, cv2.LINE_AA)
+        return frame
+
+
+def finish_perf_report(recorder=perf, config=PERF_CONFIG):
+    """
+    Schrijft aan het einde van de race de rollups weg (als dump_path is ingesteld).
+
+    Returns:
+        dict: De samenvatting per stage.
+    """
+    if not recorder.enabled:
+        return {}
+    if config.get("dump_path"):
+        return recorder.dump(config["dump_path"])
+    return recorder.summary()
@@ -0,0 +1,200 @@
+# process_detection.py
+"""
+Markerdetectie in een pool van processen, met de frames in gedeeld geheugen.
+
+Elke worker-proces heeft een eigen detector (volgens DETECTION_CONFIG). De grijswaardenbeelden
+gaan niet gepickled naar de workers: ze worden in een vrije slot van een ring van
+multiprocessing.shared_memory-buffers gekopieerd, en alleen het slotnummer, de beeldgrootte en
+de (kleine) voorspellingen worden verstuurd. Terug komen alleen compacte arrays: de ID's
+(int32) en de hoekpunten (float32, N x 4 x 2).
+
+Zo draaien detectMarkers en het Python-werk eromheen echt parallel, zonder de GIL van het
+hoofdproces. De ProcessPoolDetector heeft dezelfde detect(gray, predictions) als de andere
+detectors en blokkeert tot het resultaat er is; meerdere detect-workers (threads) houden
+zo meerdere processen tegelijk bezig.
+"""
+import os
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context, shared_memory
+
+import cv2
+import numpy as np
+
+from log_utils import get_logger
+
+logger = get_logger(__name__)
+
+# Toestand van een worker-proces (gezet door _init_worker)
+_worker_detector = None
+_worker_slots = None
+
+
+def pack_detection(corners, ids):
+    """
+    Zet het resultaat van een detector om naar compacte arrays.
+
+    Returns:
+        tuple: (ids als (N,) int32, hoekpunten als (N, 4, 2) float32).
+    """
+    if ids is None or len(ids) == 0:
+        return np.empty(0, dtype=np.int32), np.empty((0, 4, 2), dtype=np.float32)
+    packed_corners = np.concatenate([np.asarray(c, dtype=np.float32).reshape(1, 4, 2) for c in corners])
+    return np.asarray(ids, dtype=np.int32).reshape(-1), packed_corners
+
+
+def unpack_detection(packed_ids, packed_corners):
+    """
+    Zet compacte arrays terug naar het formaat van cv2.aruco.detectMarkers: (corners, ids).
+    """
+    if len(packed_ids) == 0:
+        return [], None
+    corners = [packed_corners[i:i + 1] for i in range(len(packed_ids))]
+    return corners, packed_ids.reshape(-1, 1)
+
+
+def _init_worker(slot_names, detection_config, marker_real_width, focal_length, dictionary_id):
+    global _worker_detector, _worker_slots
+    from marker_detection import create_marker_detector
+
+    # Alleen koppelen: het hoofdproces maakt de buffers aan en verwijdert ze (close)
+    _worker_slots = [shared_memory.SharedMemory(name=name) for name in slot_names]
+
+    worker_config = dict(detection_config, backend="thread")
+    _worker_detector = create_marker_detector(cv2.aruco.getPredefinedDictionary(dictionary_id),
+                                              cv2.aruco.DetectorParameters(), worker_config,
+                                              marker_real_width, focal_length)
+
+
+def _detect_in_worker(slot_index, shape, predictions):
+    gray = np.ndarray(shape, dtype=np.uint8, buffer=_worker_slots[slot_index].buf)
+    corners, ids = _worker_detector.detect(gray, predictions)
+    return pack_detection(corners, ids)
+
+
+class ProcessPoolDetector:
+    """
+    Detector die de detectie uitbesteedt aan een pool van processen (zie de moduledocstring).
+
+    De pool en de gedeelde buffers worden bij het eerste frame aangemaakt, op de grootte van
+    dat frame. Een later, groter frame wordt in het hoofdproces gedetecteerd (met een
+    waarschuwing). Bij de ROI-modus heeft elk proces zijn eigen tracks; de voorspellingen van
+    het bewegingsfilter bepalen dan de ROI's, ongeacht welk proces het frame krijgt.
+
+    Roep close() aan om de processen te stoppen en de buffers vrij te geven.
+    """
+
+    def __init__(self, aruco_dict, parameters, detection_config, marker_real_width=None, focal_length=None,
+                 processes=None, slots_per_process=2, start_method="spawn",
+                 dictionary_id=cv2.aruco.DICT_4X4_50):
+        """
+        Args:
+            aruco_dict, parameters: Voor de fallback in het hoofdproces (de workers maken hun
+                                    eigen dictionary uit dictionary_id en standaardparameters).
+            detection_config (dict): DETECTION_CONFIG (de detector in elk proces).
+            marker_real_width, focal_length: Voor pyramid_scale "auto".
+            processes (int, optional): Aantal processen (standaard het aantal cores).
+            slots_per_process (int): Aantal gedeelde buffers per proces.
+            start_method (str): Startmethode van multiprocessing ("spawn" is veilig met threads).
+            dictionary_id (int): Het ArUco-dictionary voor de workers.
+        """
+        self.aruco_dict = aruco_dict
+        self.parameters = parameters
+        self.detection_config = detection_config
+        self.marker_real_width = marker_real_width
+        self.focal_length = focal_length
+        self.processes = max(1, processes or os.cpu_count() or 1)
+        self.num_slots = self.processes * max(1, slots_per_process)
+        self.start_method = start_method
+        self.dictionary_id = dictionary_id
+
+        self._executor = None
+        self._slots = []
+        self._slot_size = 0
+        self._free_slots = queue.Queue()
+        self._start_lock = threading.Lock()
+        self._local_detector = None
+        self._closed = False
+
+        # Statistieken
+        self.frames = 0
+        self.local_frames = 0
+
+    def _start(self, nbytes):
+        with self._start_lock:
+            if self._executor is not None:
+                return
+            self._slots = [shared_memory.SharedMemory(create=True, size=nbytes) for _ in range(self.num_slots)]
+            self._slot_size = nbytes
+            for index in range(self.num_slots):
+                self._free_slots.put(index)
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.processes,
+                mp_context=get_context(self.start_method),
+                initializer=_init_worker,
+                initargs=([slot.name for slot in self._slots], self.detection_config,
+                          self.marker_real_width, self.focal_length, self.dictionary_id))
+            logger.info("Detectie-pool gestart: %s processen, %s buffers van %s bytes.",
+                        self.processes, self.num_slots, nbytes)
+
+    def _detect_local(self, gray, predictions):
+        if self._local_detector is None:
+            from marker_detection import create_marker_detector
+            logger.warning("Frame van %s past niet in de gedeelde buffers; detectie in het hoofdproces.",
+                           gray.shape)
+            self._local_detector = create_marker_detector(self.aruco_dict, self.parameters,
+                                                          dict(self.detection_config, backend="thread"),
+                                                          self.marker_real_width, self.focal_length)
+        self.local_frames += 1
+        return self._local_detector.detect(gray, predictions)
+
+    def detect(self, gray, predictions=None):
+        """
+        Args:
+            gray (numpy.ndarray): Het grijswaardenbeeld (uint8).
+            predictions (dict, optional): Voorspelde markercentra {marker_id: (x, y)}.
+
+        Returns:
+            tuple: (corners, ids) in het formaat van cv2.aruco.detectMarkers.
+        """
+        if self._closed:
+            raise RuntimeError("ProcessPoolDetector is gesloten.")
+        if self._executor is None:
+            self._start(gray.nbytes)
+        if gray.nbytes > self._slot_size or gray.dtype != np.uint8:
+            return self._detect_local(gray, predictions)
+
+        slot_index = self._free_slots.get()
+        try:
+            view = np.ndarray(gray.shape, dtype=np.uint8, buffer=self._slots[slot_index].buf)
+            np.copyto(view, gray)
+            future = self._executor.submit(_detect_in_worker, slot_index, gray.shape, predictions)
+            packed_ids, packed_corners = future.result()
+        finally:
+            self._free_slots.put(slot_index)
+        self.frames += 1
+        return unpack_detection(packed_ids, packed_corners)
+
+    def close(self):
+        """
+        Stopt de processen en geeft de gedeelde buffers vrij.
+        """
+        self._closed = True
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+        for slot in self._slots:
+            slot.close()
+            try:
+                slot.unlink()
+            except FileNotFoundError:
+                pass
+        self._slots = []
+
+    def stats(self):
+        """
+        Returns:
+            dict: Met "processes", "frames" (in de pool) en "local_frames" (in het hoofdproces).
+        """
+        return {"processes": self.processes, "frames": self.frames, "local_frames": self.local_frames}
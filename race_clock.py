@@ -0,0 +1,71 @@
+# race_clock.py
+import time
+
+
+class MonotonicClock:
+    """
+    Klok voor live races: time.perf_counter(), monotoon en met hoge resolutie.
+
+    De absolute waarde heeft geen betekenis (geen datum); de race gebruikt alleen verschillen
+    tussen tijdstippen (lap-tijden, countdown, weergavetijden).
+    """
+
+    def now(self):
+        return time.perf_counter()
+
+
+class VirtualClock:
+    """
+    Virtuele klok voor offline replays en tests: de tijd staat stil tot hij expliciet wordt gezet.
+
+    Zo loopt een replay zo snel als de verwerking toelaat, terwijl countdown, lap-tijden en
+    overlays dezelfde tijden zien als bij een live race met de opgenomen framerate.
+    """
+
+    def __init__(self, start_time=0.0):
+        self.current_time = float(start_time)
+
+    def now(self):
+        return self.current_time
+
+    def set(self, timestamp):
+        self.current_time = float(timestamp)
+
+    def advance(self, seconds):
+        self.current_time += seconds
+        return self.current_time
+
+
+# De standaardklok, voor objecten die zonder eigen klok zijn aangemaakt
+_clock = MonotonicClock()
+
+
+def now():
+    """
+    Geeft de huidige tijd in seconden volgens de standaardklok.
+    """
+    return _clock.now()
+
+
+def get_clock():
+    """
+    Geeft de standaardklok.
+    """
+    return _clock
+
+
+def set_clock(clock):
+    """
+    Stelt de standaardklok in.
+
+    Args:
+        clock: Een object met een now()-methode (MonotonicClock of VirtualClock).
+               None herstelt een MonotonicClock.
+
+    Returns:
+        De vorige klok, zodat die later hersteld kan worden.
+    """
+    global _clock
+    previous = _clock
+    _clock = clock if clock is not None else MonotonicClock()
+    return previous
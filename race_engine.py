@@ -0,0 +1,360 @@
+# race_engine.py
+"""
+Race-status zonder OpenCV of tekenwerk: waarnemingen (marker, tijdstip, positie) in, events uit.
+
+De RaceEngine bevat alle race-regels: checkpoint en finish passeren (lijnsnijding met
+sub-frame timing), lappen tellen, finishen en de ranking. Hij werkt op "duck-typed" auto's:
+elk object met de attributen hieronder volstaat (Car voldoet), zodat de engine ook headless
+op een server, in een replay of in tests gebruikt kan worden.
+
+Attributen die de engine leest en bijwerkt:
+    marker_id, passed_checkpoint, lap_count, last_lap_time, fastest_lap, finished,
+    finish_time, final_position, position, progress, track_distance, segment_index,
+    last_seen_point, last_seen_time, en voor de ranking x en y (None als onbekend).
+Optioneel: lap_times (lijst), waar elke lap-tijd aan wordt toegevoegd.
+"""
+from finish_line import CrossingLine, interpolate_time
+from ranking import IncrementalRanking, ranking_key
+from track_geometry import TrackGeometry
+
+
+class RaceEvent:
+    """
+    Basisklasse van alle events. Elk event heeft een type, een tijdstip en (behalve bij de
+    start) de marker_id van de auto.
+    """
+    __slots__ = ("time", "marker_id")
+    type = "event"
+
+    def __init__(self, time, marker_id=None):
+        self.time = time
+        self.marker_id = marker_id
+
+    def as_dict(self):
+        """
+        Geeft het event als dictionary (met "type"), bijvoorbeeld voor logging of JSON.
+        """
+        result = {"type": self.type, "time": self.time}
+        for cls in type(self).__mro__:
+            for name in getattr(cls, "__slots__", ()):
+                result.setdefault(name, getattr(self, name))
+        if self.marker_id is None:
+            del result["marker_id"]
+        return result
+
+    def __repr__(self):
+        fields = ", ".join(f"{key}={value!r}" for key, value in self.as_dict().items() if key != "type")
+        return f"{type(self).__name__}({fields})"
+
+
+class RaceStartEvent(RaceEvent):
+    __slots__ = ()
+    type = "race_start"
+
+
+class CheckpointEvent(RaceEvent):
+    __slots__ = ()
+    type = "checkpoint"
+
+
+class LapEvent(RaceEvent):
+    """
+    Een voltooide lap. lap is het nieuwe aantal voltooide lappen, lap_time de duur van de lap
+    (None als er geen vorige lap- of starttijd bekend is).
+    """
+    __slots__ = ("lap", "lap_time")
+    type = "lap"
+
+    def __init__(self, time, marker_id, lap, lap_time):
+        super().__init__(time, marker_id)
+        self.lap = lap
+        self.lap_time = lap_time
+
+
+class FinishEvent(RaceEvent):
+    __slots__ = ("position",)
+    type = "finish"
+
+    def __init__(self, time, marker_id, position):
+        super().__init__(time, marker_id)
+        self.position = position
+
+
+class PositionChangeEvent(RaceEvent):
+    """
+    Een gewijzigde positie in de ranking (old_position is None bij de eerste ranking).
+    """
+    __slots__ = ("old_position", "new_position")
+    type = "position"
+
+    def __init__(self, time, marker_id, old_position, new_position):
+        super().__init__(time, marker_id)
+        self.old_position = old_position
+        self.new_position = new_position
+
+
+def record_lap(car, crossing_time, total_laps, finished_order):
+    """
+    Registreert een voltooide lap voor een auto (lap-tijd, snelste lap, finish).
+
+    Args:
+        car: De auto.
+        crossing_time (float): Het tijdstip waarop de finish gepasseerd werd.
+        total_laps (int): Het aantal lappen van de race.
+        finished_order (list): De marker_id's in volgorde van finishen (wordt aangevuld).
+
+    Returns:
+        list: Het LapEvent en eventueel een FinishEvent.
+    """
+    lap_time = None
+    if car.last_lap_time is not None:
+        lap_time = crossing_time - car.last_lap_time
+        if car.fastest_lap is None or lap_time < car.fastest_lap:
+            car.fastest_lap = lap_time
+        lap_times = getattr(car, "lap_times", None)
+        if lap_times is not None:
+            lap_times.append(lap_time)
+
+    car.lap_count += 1
+    car.last_lap_time = crossing_time
+    events = [LapEvent(crossing_time, car.marker_id, car.lap_count, lap_time)]
+
+    if car.lap_count >= total_laps and not car.finished:
+        car.finished = True
+        car.finish_time = crossing_time
+        finished_order.append(car.marker_id)
+        car.final_position = len(finished_order)
+        events.append(FinishEvent(crossing_time, car.marker_id, car.final_position))
+    return events
+
+
+class RaceEngine:
+    """
+    Verwerkt waarnemingen van markers tot race-status en events.
+
+    Gebruik:
+        engine = RaceEngine.from_track(cars, PATH_POINTS, FINISH_ZONE, CHECKPOINT_ZONE, TOTAL_LAPS)
+        engine.start(t0)
+        engine.observe(marker_id, t, x, y)     # per detectie, in tijdvolgorde
+        engine.update_ranking(t)               # per frame (na alle waarnemingen van dat frame)
+
+    Elke methode geeft de nieuwe events terug en roept ook de listeners aan (add_listener).
+    Passages worden pas geteld als de race gestart is.
+    """
+
+    def __init__(self, cars, total_laps, geometry, finish_line, checkpoint_line, finished_order=None):
+        """
+        Args:
+            cars (dict): De auto's (key: marker_id).
+            total_laps (int): Het aantal lappen van de race.
+            geometry (TrackGeometry): De centerline, voor de progress in de ranking.
+            finish_line, checkpoint_line (CrossingLine): De finish- en checkpointlijn.
+            finished_order (list, optional): Lijst voor de finishvolgorde (bijv. die van de
+                                             RaceManager); standaard een nieuwe lijst.
+        """
+        self.cars = cars
+        self.total_laps = total_laps
+        self.geometry = geometry
+        self.finish_line = finish_line
+        self.checkpoint_line = checkpoint_line
+        self.finished_order = finished_order if finished_order is not None else []
+        self.race_start_time = None
+        self._ranking = IncrementalRanking()
+        self._listeners = []
+
+    @classmethod
+    def from_track(cls, cars, path_points, finish_zone, checkpoint_zone, total_laps, start_point=None,
+                   finished_order=None):
+        """
+        Maakt een engine uit de baandefinitie (zoals in config.py).
+
+        Args:
+            path_points (list): De centerline (PATH_POINTS).
+            finish_zone, checkpoint_zone (tuple): Rotated rectangles; de lijnen zijn de lange assen.
+            start_point (tuple, optional): Het startpunt voor de progress (standaard het eerste punt).
+        """
+        geometry = TrackGeometry(path_points, start_point=start_point)
+        return cls(cars, total_laps, geometry,
+                   CrossingLine.from_zone(finish_zone, geometry),
+                   CrossingLine.from_zone(checkpoint_zone, geometry),
+                   finished_order=finished_order)
+
+    def add_listener(self, callback):
+        """
+        Registreert een callback die met elk nieuw event wordt aangeroepen.
+        """
+        self._listeners.append(callback)
+
+    def _emit(self, events):
+        if self._listeners:
+            for event in events:
+                for callback in self._listeners:
+                    callback(event)
+        return events
+
+    def start(self, race_start_time):
+        """
+        Start de race: de starttijd is de "vorige lap-tijd" van elke auto.
+
+        Returns:
+            list: [RaceStartEvent]
+        """
+        self.race_start_time = race_start_time
+        for car in self.cars.values():
+            car.last_lap_time = race_start_time
+        return self._emit([RaceStartEvent(race_start_time)])
+
+    def observe(self, marker_id, timestamp, x, y):
+        """
+        Verwerkt één waarneming van een marker (compositiecoördinaten, float).
+
+        Het segment tussen de vorige en deze waarneming wordt gesneden met de checkpoint- en
+        finishlijn; het passagetijdstip wordt lineair geïnterpoleerd tussen beide tijdstippen.
+
+        Returns:
+            list: De nieuwe events (CheckpointEvent, LapEvent, FinishEvent).
+        """
+        car = self.cars.get(marker_id)
+        if car is None:
+            return []
+
+        events = []
+        point = (x, y)
+        previous = car.last_seen_point
+        if previous is not None and self.race_start_time is not None and not car.finished:
+            # Passages van checkpoint en finish, in volgorde langs het segment
+            crossings = []
+            t = self.checkpoint_line.crossing(previous, point)
+            if t is not None:
+                crossings.append((t, 0))
+            t = self.finish_line.crossing(previous, point)
+            if t is not None:
+                crossings.append((t, 1))
+            if len(crossings) > 1:
+                crossings.sort()
+
+            for t, is_finish in crossings:
+                crossing_time = interpolate_time(car.last_seen_time, timestamp, t)
+                if not is_finish:
+                    if not car.passed_checkpoint:
+                        car.passed_checkpoint = True
+                        events.append(CheckpointEvent(crossing_time, marker_id))
+                elif car.passed_checkpoint and not car.finished:
+                    events.extend(record_lap(car, crossing_time, self.total_laps, self.finished_order))
+                    # Reset de checkpoint-status na het voltooien van een lap
+                    car.passed_checkpoint = False
+
+        car.last_seen_point = point
+        car.last_seen_time = timestamp
+        return self._emit(events) if events else events
+
+    def observe_many(self, observations, rank=True):
+        """
+        Verwerkt een reeks waarnemingen (timestamp, marker_id, x, y) in tijdvolgorde.
+
+        Met rank=True wordt de ranking bijgewerkt zodra het tijdstip verandert (één keer per
+        frame) en na de laatste waarneming.
+
+        Returns:
+            list: Alle nieuwe events.
+        """
+        events = []
+        current_time = None
+        for timestamp, marker_id, x, y in observations:
+            if rank and current_time is not None and timestamp != current_time:
+                events.extend(self.update_ranking(current_time))
+            current_time = timestamp
+            events.extend(self.observe(marker_id, timestamp, x, y))
+        if rank and current_time is not None:
+            events.extend(self.update_ranking(current_time))
+        return events
+
+    def _ranking_position(self, car):
+        # De (gefilterde) positie van de auto, of anders de laatste waarneming
+        if car.x is not None and car.y is not None:
+            return car.x, car.y
+        return car.last_seen_point
+
+    @property
+    def ranking(self):
+        """
+        De auto's in volgorde van de laatst berekende ranking.
+        """
+        return [self.cars[marker_id] for marker_id in self._ranking.marker_ids]
+
+    @property
+    def ranking_version(self):
+        """
+        Waarde die verandert zodra de volgorde van de ranking verandert (zie IncrementalRanking).
+        """
+        return self._ranking.version
+
+    def update_ranking(self, timestamp):
+        """
+        Berekent de progress van alle auto's en werkt de ranking bij (zie ranking.ranking_key):
+          - Gefinishte auto's op final_position.
+          - Daarna de overige auto's op lap_count en progress (aflopend).
+
+        De ranking wordt incrementeel bijgehouden (IncrementalRanking): zolang niemand inhaalt,
+        is dat alleen een controle van de vorige volgorde; alleen auto's die van plaats
+        wisselen krijgen een nieuwe positie.
+
+        Returns:
+            list: PositionChangeEvents voor auto's waarvan de positie veranderd is.
+        """
+        located = []
+        positions = []
+        for car in self.cars.values():
+            position = self._ranking_position(car)
+            if position is None:
+                car.progress = 0
+            else:
+                located.append(car)
+                positions.append(position)
+
+        if located:
+            hints = [car.segment_index for car in located]
+            raw_progress, perp_distance, segment_index = self.geometry.project_points(positions, hints)
+            progress = self.geometry.normalize_progress(raw_progress)
+            for car, car_progress, distance, segment in zip(located, progress.tolist(),
+                                                            perp_distance.tolist(), segment_index.tolist()):
+                car.progress = car_progress
+                car.track_distance = distance
+                car.segment_index = segment
+
+        # Alleen auto's waarvan de plaats veranderd is krijgen een nieuwe positie
+        keys = [ranking_key(car) for car in self.cars.values()]
+        events = []
+        for marker_id, new_position in self._ranking.update(list(self.cars), keys):
+            car = self.cars[marker_id]
+            if car.position != new_position:
+                events.append(PositionChangeEvent(timestamp, marker_id, car.position, new_position))
+                car.position = new_position
+        return self._emit(events) if events else events
+
+
+# Volgorde van de laatste aanroep van ranked_cars: (ranking_version, marker_id's)
+_ranked_order = (None, ())
+
+
+def ranked_cars(cars, ranking_version=None):
+    """
+    Geeft de auto's gesorteerd op hun laatst berekende positie (auto's zonder positie achteraan).
+
+    Voor de render-stage: de ranking zelf wordt door RaceEngine.update_ranking berekend. Met
+    ranking_version (RaceManager.ranking_version) wordt de volgorde van de vorige aanroep
+    hergebruikt zolang de versie niet veranderd is, in plaats van elke frame te sorteren. De
+    volgorde wordt op marker_id bewaard, zodat dit ook werkt met snapshots van de auto's.
+    """
+    global _ranked_order
+    if ranking_version:
+        version, order = _ranked_order
+        if version == ranking_version and len(order) == len(cars):
+            try:
+                return [cars[marker_id] for marker_id in order]
+            except KeyError:
+                pass
+    sorted_cars = sorted(cars.values(), key=lambda car: (car.position is None, car.position or 0))
+    if ranking_version:
+        _ranked_order = (ranking_version, tuple(car.marker_id for car in sorted_cars))
+    return sorted_cars
@@ -1,68 +1,50 @@
 #race_logic
+import copy
 import cv2
 import numpy as np
 import time
 
-from path_utils import compute_cumulative_distances, calculate_progress_distance, expand_path
-from tracking_utils import project_to_centerline
+from path_utils import expand_path
 from config import *
-from overlay_utils import draw_text, draw_race_track, draw_finish_zone, draw_checkpoint_zone, update_and_draw_overlays, draw_final_ranking_overlay, display_car_info
+from overlay_utils import draw_text, update_and_draw_overlays, draw_final_ranking_overlay, display_car_info
 from race_manager import RaceManager
+from static_layer import StaticOverlayLayer
+from frame_buffers import FrameBufferPool, clear_outside_camera
+from camera_capture import CaptureThread
+from marker_detection import create_marker_detector
+from race_engine import RaceEngine, LapEvent, ranked_cars
+from multi_camera import CameraHomography, observations_from_detection
+from camera_calibration import create_corner_undistorter
+from log_utils import get_logger, RateLimitedLog
+from perf_stats import perf, PerfHud, finish_perf_report
 
-def sort_cars_by_position(cars):
-    """
-    Sorteert de auto's op basis van hun afgeronde lappen en de progress (cumulatieve afstand)
-    langs het traject. Hierbij wordt eerst een start_offset berekend aan de hand van een bekend 
-    startpunt (350,50). Vervolgens wordt voor elke auto de raw progress bepaald en aangepast 
-    met die offset. Daarna worden de auto's opgesplitst in gefinished en niet‒finished auto's:
+logger = get_logger(__name__)
 
-      - Gefinished auto's (waarbij car.finished True is en car.final_position is ingesteld) 
-        worden gesorteerd op final_position zodat het eindklassement vaststaat.
-      - Niet‒finished auto's worden gesorteerd op lap_count en progress (in afnemende volgorde).
-    
-    Tenslotte krijgen alle auto's een overall positie (position) toe op basis van de gesorteerde volgorde.
-    """
-    # Bereken de cumulatieve afstanden langs het traject
-    cum = compute_cumulative_distances(PATH_POINTS)
-    total_distance = cum[-1]
-    
-    # Bereken de start_offset op basis van een bekend startpunt gedefinieerd in PATH_POINTS
-    start_point = (350, 50)
-    print(f"Startpunt voor offsetberekening: {start_point}")
-    start_offset = project_to_centerline(start_point, PATH_POINTS)
-    print(f"Start_offset: {start_offset}")
-    
-    # Voor elke auto, als positie bekend is, bereken raw progress en pas de offset toe
-    for car in cars.values():
-        if car.x is not None and car.y is not None:
-            raw_progress = calculate_progress_distance(car, PATH_POINTS)
-            car.progress = (raw_progress - start_offset) % total_distance
-        else:
-            car.progress = 0
+# Waarschuwing als er geen markers in beeld zijn (anders elke frame een melding)
+_no_marker_log = RateLimitedLog(logger, interval=LOGGING_CONFIG["no_marker_interval"])
 
-    # Splits auto's op in gefinished en niet-finished
-    finished_cars = [car for car in cars.values() if car.finished and car.final_position is not None]
-    non_finished_cars = [car for car in cars.values() if not (car.finished and car.final_position is not None)]
-    
-    # Sorteer de gefinished auto's op hun final_position (laagste eerst, want 1 is eerste finish)
-    finished_cars.sort(key=lambda car: car.final_position)
-    
-    # Sorteer de niet-finished auto's zoals voorheen, op lap_count en progress (in afnemende volgorde)
-    non_finished_cars.sort(key=lambda car: (car.lap_count, car.progress), reverse=True)
-    
-    # Combineer beide lijsten: de gefinished auto's komen eerst
-    sorted_cars = finished_cars + non_finished_cars
-    
-    # Ken voor alle auto's de overall positie (1-based ranking) toe op basis van de gesorteerde volgorde
-    for idx, car in enumerate(sorted_cars):
-        car.position = idx + 1
+# Voorgerenderde zijbalken, ranking bar-achtergrond, traject en zones (per framegrootte)
+_static_layer = StaticOverlayLayer()
+
+# Herbruikbare compositie-buffers (double buffering: weergave en verwerking delen geen buffer)
+_frame_buffers = FrameBufferPool(num_buffers=2)
+
+# Detector van process_frame (zie get_marker_detector)
+_marker_detector = None
+
+# Homografie van het camerabeeld naar baancoördinaten bij één camera (verschuiving over de zijbalk)
+_default_homography = CameraHomography.from_offset(BLACK_BAR_WIDTH, 0)
 
-    # Debug: Print de gesorteerde lijst met relevante attributen
-    print("Gesorteerde auto's (position, marker_id, finished, final_position, lap_count, progress):")
-    for car in sorted_cars:
-        print(f"Pos {car.position}: Marker ID {car.marker_id}, Finished: {car.finished}, Final Pos: {car.final_position}, Lap Count: {car.lap_count}, Progress: {car.progress:.2f}")
+# Correctie van de markerhoeken voor lensvervorming bij één camera (zie get_default_undistorter)
+_default_undistorter = None
+_default_undistorter_loaded = False
 
-    return sorted_cars
+# Volgnummer van de frames in process_frame (voor MOTION_CONFIG["detect_interval"])
+_frame_counter = 0
+
+# Optionele performance-HUD in de linker zijbalk
+_perf_hud = PerfHud(perf, stages=PERF_CONFIG["hud_stages"],
+                    refresh_interval=PERF_CONFIG["hud_refresh_interval"]) if PERF_CONFIG["hud"] else None
 
 def update_car_positions(cars, frame_width, frame_height):
     """
@@ -105,10 +87,10 @@ def update_car_positions(cars, frame_width, frame_height):
         car.lap_complete_position = (new_complete_x, new_complete_y)
         
         # Debug: Print de berekende overlay-posities voor controle
-        print(f"Car {car.color_key}: overlay lap_position: ({new_lap_x}, {new_lap_y}), "
-              f"lap_complete_position: ({new_complete_x}, {new_complete_y})")
+        logger.debug("Car %s: overlay lap_position: (%s, %s), lap_complete_position: (%s, %s)",
+                     car.color_key, new_lap_x, new_lap_y, new_complete_x, new_complete_y)
 
-def initialize_frame(frame, cars, race_manager):
+def initialize_frame(frame, cars, race_manager, frame_time=None):
     """
     Initialiseert het volledige frame met alle vaste overlays, zoals:
     - Zwarte balken
@@ -116,96 +98,198 @@ def initialize_frame(frame, cars, race_manager):
     - Baan, finishzone en controlezone
     - Auto-posities
     """
-    # Bereken compositie-afmetingen
-    ranking_bar_height = RANKING_BAR_CONFIG['ranking_bar_height']
-    composite_width = frame.shape[1] + 2 * BLACK_BAR_WIDTH
-    composite_height = frame.shape[0] + ranking_bar_height
-
-    # Maak een nieuw frame voor de volledige compositie
-    new_frame = np.zeros((composite_height, composite_width, 3), dtype=np.uint8)
-    cam_region = (slice(0, frame.shape[0]), slice(BLACK_BAR_WIDTH, BLACK_BAR_WIDTH + frame.shape[1]))
-    new_frame[cam_region] = frame
+    # Haal een compositie-buffer uit de pool en schrijf het camerabeeld in de cameraregio
+    new_frame, cam_view = _frame_buffers.acquire(frame.shape)
+    cam_view[...] = frame
 
     # Debug: Controleer de afmetingen en regio's
-    print(f"Composite frame: width = {composite_width}, height = {composite_height}")
-    print(f"Camera regio: {cam_region}")
+    logger.debug("Composite frame: width = %s, height = %s", new_frame.shape[1], new_frame.shape[0])
+    logger.debug("Camera regio: %s", FrameBufferPool.camera_region(frame.shape))
 
-    # Teken vaste overlays
-    draw_race_track(new_frame, expand_path(PATH_POINTS, PATH_WIDTH))
-    draw_finish_zone(new_frame)
-    draw_checkpoint_zone(new_frame)
+    # Teken vaste overlays (uit de voorgerenderde statische laag)
+    _static_layer.get(frame.shape).compose(new_frame)
 
     # Teken auto-informatie direct bij het opstarten
-    current_time = time.time()
+    current_time = frame_time if frame_time is not None else race_manager.clock.now()
     for car_id, car in cars.items():
         # Pas de BLACK_BAR_WIDTH toe op de X-coördinaten van de auto
         adjusted_x = car.x + BLACK_BAR_WIDTH if car.x else None
         car.x = adjusted_x  # Update de auto-coördinaten met de offset
-        print(f"Auto {car_id} aangepaste x-coördinaat: {adjusted_x}")
+        logger.debug("Auto %s aangepaste x-coördinaat: %s", car_id, adjusted_x)
 
         display_car_info({car_id: car}, new_frame, current_time, race_manager)
 
     return new_frame
 
-def process_frame(frame, race_manager, cars, parameters, aruco_dict, expanded_path):
+def detect_markers(image, detector, predictions=None):
     """
-    Verwerkt een frame voor de race en bouwt een definitieve composiet op:
-    - Detecteert ArUco-markers en verwerkt deze.
-    - Achtergrondlaag: het originele camerabeeld wordt gespiegeld.
-    - Overlaylaag: alle overlays (traject, finish-zone, auto-informatie, indicatoren, "GO!"-tekst).
+    Detecteert ArUco-markers in het camerabeeld.
+
+    Deze stap leest alleen het beeld en raakt geen race-status aan, zodat hij in de
+    pipeline parallel op meerdere frames kan draaien (OpenCV geeft de GIL vrij).
+
+    Args:
+        image (numpy.ndarray): Het camerabeeld (BGR).
+        detector (MarkerDetector): De detector (volledig beeld of ROI's rond de auto's).
+        predictions (dict, optional): Voorspelde markercentra in camerabeeld-coördinaten
+                                      (zie predict_marker_positions).
+
+    Returns:
+        tuple: (corners, ids) in het formaat van cv2.aruco.detectMarkers.
     """
-    # Maak een copy van het originele frame
-    base_frame = frame.copy()
-    frame_height, frame_width = base_frame.shape[:2]
-    
-    # Initialiseer alles als het de eerste frame is
-    if not race_manager.initialized:
-        initialized_frame = initialize_frame(base_frame, cars, race_manager)
-        race_manager.initialized = True
-        return initialized_frame
-    
-    # ArUco-detectie op het originele, ongespiegelde beeld
-    print("DEBUG: Start ArUco-detectie in process_frame.")
-    gray = cv2.cvtColor(base_frame, cv2.COLOR_BGR2GRAY)
-    corners, ids, _ = cv2.aruco.detectMarkers(gray, aruco_dict, parameters=parameters)
-    if ids is not None and len(ids) > 0:
-        print(f"DEBUG: Gedetecteerde ArUco-ID's: {ids.flatten()}")
-        process_markers(cars, corners, ids, base_frame, race_manager)
-    else:
-        print("⚠️ DEBUG: Geen ArUco-markers gedetecteerd.")
+    start = time.perf_counter()
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    start = perf.lap("grayscale", start)
+    result = detector.detect(gray, predictions)
+    perf.lap("detect", start)
+    return result
+
+def detection_due(frame_index):
+    """
+    Geeft aan of op dit frame gedetecteerd moet worden (zie MOTION_CONFIG["detect_interval"]).
 
-    # Maak de compositie: extra ruimte voor de zwarte balken en ranking bar
-    ranking_bar_height = RANKING_BAR_CONFIG['ranking_bar_height']
-    composite_width = frame_width + 2 * BLACK_BAR_WIDTH
-    composite_height = frame_height + ranking_bar_height
-    new_frame = np.zeros((composite_height, composite_width, 3), dtype=np.uint8)
-    
-    # Definieer de cameraregion in het nieuwe canvas
-    cam_region = (slice(0, frame_height), slice(BLACK_BAR_WIDTH, BLACK_BAR_WIDTH + frame_width))
-    new_frame[cam_region] = base_frame  # Plaats het originele beeld eerst
+    Zonder bewegingsfilter wordt altijd gedetecteerd: anders zouden de auto's op de
+    overgeslagen frames stilstaan.
+    """
+    if not MOTION_CONFIG["enabled"]:
+        return True
+    return frame_index % max(1, MOTION_CONFIG["detect_interval"]) == 0
 
-    # Initialiseer alles als het de eerste frame is
-    if not race_manager.initialized:
-        initialized_frame = initialize_frame(base_frame, cars, race_manager)
-        race_manager.initialized = True
-        return initialized_frame
+def predict_marker_positions(cars, frame_time, homography=None, undistorter=None):
+    """
+    Voorspelt met het bewegingsfilter van elke auto het markercentrum op frame_time.
 
-    # Teken countdown of "GO!" als de race nog niet is gestart
-    if not race_manager.race_started:
-        handle_countdown(new_frame, race_manager, cars)
-        return new_frame
+    De voorspellingen zijn in camerabeeld-coördinaten (zonder de zijbalk, of via de inverse
+    homografie van de camera), zodat de detector ze direct als ROI-centrum kan gebruiken. Dit
+    leest alleen de filters en mag daarom vanuit de detect-workers worden aangeroepen.
+
+    Args:
+        homography (CameraHomography, optional): De homografie van de camera (standaard de
+                                                 verschuiving over de zijbalk).
+        undistorter (CornerUndistorter, optional): De lenscorrectie van de camera; geldt de
+                                                   homografie voor het gecorrigeerde beeld, dan
+                                                   worden de voorspellingen terug vervormd.
+
+    Returns:
+        dict or None: {marker_id: (x, y)}, of None als het bewegingsfilter uit staat.
+    """
+    if not MOTION_CONFIG["enabled"]:
+        return None
+    positions = {}
+    for marker_id, car in cars.items():
+        position = car.motion.position_at(frame_time)
+        if position is not None:
+            positions[marker_id] = position
+    if homography is None:
+        # De baan ligt in het getoonde (vervormde) beeld: alleen de zijbalk eraf
+        return {marker_id: (position[0] - BLACK_BAR_WIDTH, position[1]) for marker_id, position in positions.items()}
+    if not positions:
+        return {}
+    points = homography.to_camera(list(positions.values()))
+    if undistorter is not None and homography.undistorted:
+        points = undistorter.distort(points)
+    return dict(zip(positions, map(tuple, points.tolist())))
+
+def update_motion_estimates(cars, frame_time):
+    """
+    Zet de positie, schaalfactor en snelheid van elke auto op de schatting van het bewegingsfilter.
+
+    Op frames met een detectie is dat de gefilterde positie, op frames zonder detectie de
+    voorspelling. Overlay en ranking zien zo een vloeiende positie in plaats van een bevroren
+    positie als een marker een paar frames gemist wordt. Is een auto langer dan max_coast
+    seconden niet gezien, dan blijft de laatst bekende positie staan.
+    """
+    if not MOTION_CONFIG["enabled"]:
+        return
+    for car in cars.values():
+        position = car.motion.position_at(frame_time)
+        if position is None:
+            continue
+        car.x = int(round(position[0]))
+        car.y = int(round(position[1]))
+        car.velocity = car.motion.velocity
+        if car.motion.scale is not None:
+            car.scale_factor = car.motion.scale
+
+def get_default_undistorter():
+    """
+    Geeft de lenscorrectie van de (eerste) camera volgens CAMERAS[0]["intrinsics"], of None
+    zonder calibratie. Het bestand wordt één keer gelezen en de tabel één keer berekend.
+    """
+    global _default_undistorter, _default_undistorter_loaded
+    if not _default_undistorter_loaded:
+        _default_undistorter = create_corner_undistorter(CAMERAS[0].get("intrinsics"))
+        _default_undistorter_loaded = True
+    return _default_undistorter
+
+def camera_focal_length(undistorter):
+    """
+    Geeft de focale lengte (pixels) van een camera: gecalibreerd als er een (actieve)
+    undistorter is, anders FOCAL_LENGTH.
+    """
+    return undistorter.focal_length if undistorter is not None and undistorter.enabled else FOCAL_LENGTH
+
+def get_marker_detector(aruco_dict, parameters):
+    """
+    Geeft de detector voor process_frame, aangemaakt volgens DETECTION_CONFIG.
+
+    De detector wordt hergebruikt zolang dezelfde aruco_dict en parameters worden meegegeven,
+    zodat een RoiMarkerDetector zijn tracks tussen frames behoudt.
+    """
+    global _marker_detector
+    if (_marker_detector is None or _marker_detector.aruco_dict is not aruco_dict
+            or _marker_detector.parameters is not parameters):
+        _marker_detector = create_marker_detector(aruco_dict, parameters, DETECTION_CONFIG, MARKER_REAL_WIDTH,
+                                                  camera_focal_length(get_default_undistorter()))
+    return _marker_detector
+
+def close_marker_detector():
+    """
+    Sluit de detector van process_frame (de workers en shared memory van een
+    ProcessPoolDetector) en zet hem terug; de volgende process_frame maakt een nieuwe aan.
+    """
+    global _marker_detector
+    if _marker_detector is not None:
+        _marker_detector.close()
+        _marker_detector = None
+
+def update_race_state(cars, race_manager, corners, ids, frame_time, frame_shape, observations=None):
+    """
+    Werkt de race-status bij voor één frame, zonder te tekenen:
+      - Verwerkt de gedetecteerde markers (posities, checkpoint, lappen), of bij meerdere
+        camera's de samengevoegde waarnemingen (observations, zie DetectionMerger).
+      - Zet de posities op de schatting van het bewegingsfilter (ook zonder detectie).
+      - Werkt de "Ready?"/countdown-fase bij en start zo nodig de race.
+      - Berekent de overlay-posities en display-coördinaten van de auto's.
+      - Werkt de ranking bij (RaceEngine.update_ranking); de render-stage leest alleen car.position.
+
+    Frames moeten in volgorde door deze functie gaan; in de pipeline draait hij daarom
+    in één enkele logic-thread.
+    """
+    if observations:
+        start = time.perf_counter()
+        apply_observations(cars, observations, race_manager)
+        perf.lap("process_markers", start)
+    elif observations is None and ids is not None and len(ids) > 0:
+        logger.debug("Gedetecteerde ArUco-ID's: %s", ids)
+        start = time.perf_counter()
+        process_markers(cars, corners, ids, None, race_manager, frame_time)
+        perf.lap("process_markers", start)
+    elif corners is not None:
+        # corners is None op frames zonder detectie (detect_interval): dan geen waarschuwing
+        _no_marker_log.log("⚠️ Geen ArUco-markers gedetecteerd.")
+
+    # Gefilterde of voorspelde posities voor overlay en ranking
+    update_motion_estimates(cars, frame_time)
 
-    # Teken de vaste overlays
-    draw_race_track(new_frame, expand_path(PATH_POINTS, PATH_WIDTH))
-    draw_finish_zone(new_frame)
-    draw_checkpoint_zone(new_frame)
+    if not race_manager.race_started:
+        update_countdown_state(race_manager, cars, frame_time)
+        return
 
     # Update auto-posities relatief aan de composiet
-    update_car_positions(cars, composite_width, composite_height)
-    
-    # Teken auto-informatie
-    current_time = time.time()  # Huidige tijd
-    display_car_info(cars, new_frame, current_time, race_manager)    
+    frame_height, frame_width = frame_shape[:2]
+    update_car_positions(cars, frame_width + 2 * BLACK_BAR_WIDTH,
+                         frame_height + RANKING_BAR_CONFIG['ranking_bar_height'])
 
     # Bereken voor iedere auto de display-coördinaten
     for car in cars.values():
@@ -213,13 +297,50 @@ def process_frame(frame, race_manager, cars, parameters, aruco_dict, expanded_pa
             car.display_x = car.x
             car.display_y = car.y
         else:
-            print(f"⚠️ Warning: Car {car.marker_id} heeft geen geldige positie (x={car.x}, y={car.y}); overlay overslaan.")
-    
-    # Teken als laatste alle overlays, inclusief de auto-afbeeldingen en indicatoren
-    new_frame = update_and_draw_overlays(new_frame, cars, race_manager)
+            logger.debug("Car %s heeft geen geldige positie (x=%s, y=%s); overlay overslaan.", car.marker_id, car.x, car.y)
+
+    # Ranking op lappen, progress langs de baan en finishvolgorde
+    start = time.perf_counter()
+    engine = get_race_engine(cars, race_manager)
+    engine.update_ranking(frame_time)
+    race_manager.ranking_version = engine.ranking_version
+    perf.lap("ranking", start)
+
+def render_frame(new_frame, cam_view, cars, race_manager, corners, ids, frame_time):
+    """
+    Tekent alle overlays voor één frame op de compositie. Het camerabeeld staat al in cam_view.
+
+    De race-status wordt alleen gelezen (in de pipeline is dit een snapshot), zodat het
+    renderen van frame N kan overlappen met de race-logica van frame N+1.
+
+    Returns:
+        numpy.ndarray: De compositie met alle overlays.
+    """
+    frame_height, frame_width = cam_view.shape[:2]
+
+    # Teken de gedetecteerde markers in het camerabeeld
+    if ids is not None and len(ids) > 0:
+        cv2.aruco.drawDetectedMarkers(cam_view, corners, ids)
+
+    # Teken "Ready?", de countdown of "GO!" als de race nog niet is gestart
+    if not race_manager.race_started:
+        # De buffer wordt hergebruikt: maak de regio's buiten het camerabeeld weer zwart
+        clear_outside_camera(new_frame, cam_view.shape)
+        draw_countdown(new_frame, race_manager)
+        return new_frame
+
+    # Teken de vaste overlays: één gemaskeerde kopie van de voorgerenderde statische laag
+    start = time.perf_counter()
+    _static_layer.get(cam_view.shape).compose(new_frame)
+    perf.lap("static_layer", start)
+
+    # Teken als laatste alle overlays: auto-informatie in de zijbalken, ranking bar,
+    # auto-afbeeldingen en indicatoren
+    new_frame = update_and_draw_overlays(new_frame, cars, race_manager, draw_ranking_background=False,
+                                         frame_time=frame_time)
 
     # Indien de race net gestart is, teken "GO!" in de cameraregion
-    if race_manager.race_started and (time.time() - race_manager.race_start_time < 1):
+    if frame_time - race_manager.race_start_time < 1:
         pos = (BLACK_BAR_WIDTH + frame_width // 2 - GO_TEXT_OFFSET_X,
                frame_height // 2 + GO_TEXT_OFFSET_Y)
         draw_text(new_frame, GO_TEXT, pos, GO_TEXT_COLOR, GO_TEXT_FONT_SCALE, GO_TEXT_THICKNESS)
@@ -227,167 +348,263 @@ def process_frame(frame, race_manager, cars, parameters, aruco_dict, expanded_pa
     # Controleer of alle auto's gefinished zijn
     if cars and all(car.finished for car in cars.values()):
         final_finish_time = max(car.finish_time for car in cars.values() if car.finish_time is not None)
-        if time.time() - final_finish_time >= FINAL_OVERLAY_DELAY:
-            sorted_cars = sort_cars_by_position(cars)
+        if frame_time - final_finish_time >= FINAL_OVERLAY_DELAY:
+            start = time.perf_counter()
+            sorted_cars = ranked_cars(cars, race_manager.ranking_version)
             new_frame = draw_final_ranking_overlay(new_frame, sorted_cars)
+            perf.lap("final_overlay", start)
         else:
-            print(f"DEBUG: Final overlay delay nog aan de gang, nog {FINAL_OVERLAY_DELAY - (time.time() - final_finish_time):.1f} sec te gaan.")
+            logger.debug("Final overlay delay nog aan de gang, nog %.1f sec te gaan.",
+                         FINAL_OVERLAY_DELAY - (frame_time - final_finish_time))
+
+    # Optionele performance-HUD
+    if _perf_hud is not None:
+        _perf_hud.draw(new_frame, frame_height)
         
     return new_frame
 
-def handle_countdown(frame, race_manager, cars):
+def process_frame(frame, race_manager, cars, parameters, aruco_dict, expanded_path, frame_time=None):
+    """
+    Verwerkt een frame voor de race en bouwt een definitieve composiet op:
+    - Detecteert ArUco-markers en verwerkt deze.
+    - Achtergrondlaag: het originele camerabeeld wordt gespiegeld.
+    - Overlaylaag: alle overlays (traject, finish-zone, auto-informatie, indicatoren, "GO!"-tekst).
+
+    Dit is de seriële variant: detect_markers, update_race_state en render_frame na elkaar op
+    dezelfde thread. De RacePipeline voert dezelfde stappen uit op aparte worker-threads.
+
+    frame_time is het tijdstip waarop het frame is vastgelegd (CapturedFrame.timestamp). Lap-tijden
+    en de getoonde tijden van dit frame gebruiken dit tijdstip; zonder waarde wordt de klok van de
+    race_manager gebruikt.
+    """
+    if frame_time is None:
+        frame_time = race_manager.clock.now()
+    
+    # Initialiseer alles als het de eerste frame is
+    if not race_manager.initialized:
+        initialized_frame = initialize_frame(frame, cars, race_manager, frame_time)
+        race_manager.initialized = True
+        return initialized_frame
+
+    # Maak de compositie: een hergebruikte buffer met extra ruimte voor de zwarte balken en
+    # ranking bar. Het camerabeeld wordt direct in de cameraregio geschreven (geen frame.copy()).
+    new_frame, cam_view = _frame_buffers.acquire(frame.shape)
+    cam_view[...] = frame
+    
+    # ArUco-detectie op het originele, ongespiegelde beeld (de cameraregio van de compositie).
+    # Met een detect_interval > 1 wordt een deel van de frames overgeslagen; de auto's worden
+    # daar door het bewegingsfilter voorspeld.
+    global _frame_counter
+    _frame_counter += 1
+    if detection_due(_frame_counter):
+        undistorter = get_default_undistorter()
+        if undistorter is not None:
+            undistorter.check_image_size(frame.shape[1], frame.shape[0])
+        corners, ids = detect_markers(cam_view, get_marker_detector(aruco_dict, parameters),
+                                      predict_marker_positions(cars, frame_time))
+    else:
+        corners, ids = None, None
+
+    update_race_state(cars, race_manager, corners, ids, frame_time, frame.shape)
+    return render_frame(new_frame, cam_view, cars, race_manager, corners, ids, frame_time)
+
+def update_countdown_state(race_manager, cars, frame_time):
+    """
+    Werkt de pre-race fase bij (zonder te tekenen):
+    - Eerst wordt "Ready?" READY_TEXT_DURATION seconden getoond; daarna start de countdown.
+    - Als de countdown op 0 staat, start de race en krijgt elke auto de starttijd als laatste lap-tijd.
+
+    De huidige fase wordt op de race_manager bewaard (ready_start_time en countdown_number),
+    zodat draw_countdown hem kan tekenen.
     """
-    Behandelt de pre-race fase:
-    - Toont "Ready?" en start pas daarna de countdown.
-    - Als de countdown bezig is, wordt het nummer getoond; bij 0 start de race en verschijnt 'GO!'.
+    if race_manager.ready_start_time is None:
+        # Start de "Ready?"-fase
+        race_manager.ready_start_time = frame_time
+        race_manager.countdown_number = None
+        return
+
+    if race_manager.countdown_start_time is None:
+        if frame_time - race_manager.ready_start_time < READY_TEXT_DURATION:
+            return  # Nog in de "Ready?"-fase
+        race_manager.start_countdown(frame_time)
+
+    race_manager.countdown_number = race_manager.update_countdown(frame_time)
+    if race_manager.countdown_number == 0 and not race_manager.race_started:
+        race_manager.start_race(frame_time)
+        get_race_engine(cars, race_manager).start(race_manager.race_start_time)
+
+def draw_countdown(frame, race_manager):
     """
-    # Controleer of we nog in de "Ready?"-fase zitten
-    if not hasattr(race_manager, "ready_shown"):
+    Tekent de pre-race fase op het frame:
+    - "Ready?" zolang de countdown nog niet loopt.
+    - Het countdown-nummer, of "GO!" als de countdown op 0 staat.
+    """
+    countdown_number = race_manager.countdown_number
+    if countdown_number is None:
         # Teken "Ready?" op het frame
         draw_text(frame, START_TEXT, START_TEXT_POSITION,
                   START_TEXT_COLOR, START_TEXT_FONT_SCALE, START_TEXT_THICKNESS)
-        
-        # Toon het frame met "Ready?" in het venster
-        cv2.imshow("Race Track Warrior", frame)
-        cv2.waitKey(1000)  # Wacht 1 seconde om "Ready?" weer te geven
-        
-        # Markeer dat "Ready?" is getoond en start de countdown-timer
-        race_manager.ready_shown = True
-        race_manager.countdown_start_time = time.time()
-        return True  # Geef aan dat we in de "Ready?"-fase zitten
+    elif countdown_number > 0:
+        # Teken het countdown-nummer op het frame
+        pos = (frame.shape[1] // 2 - COUNTDOWN_OFFSET_X,
+               frame.shape[0] // 2 + COUNTDOWN_OFFSET_Y)
+        draw_text(frame, str(countdown_number), pos,
+                  COUNTDOWN_COLOR, COUNTDOWN_FONT_SCALE, COUNTDOWN_THICKNESS)
     else:
-        # Countdown begint pas nu
-        countdown_number = race_manager.update_countdown()
-        if countdown_number is not None:
-            if countdown_number > 0:
-                # Teken het countdown-nummer op het frame
-                pos = (frame.shape[1] // 2 - COUNTDOWN_OFFSET_X,
-                       frame.shape[0] // 2 + COUNTDOWN_OFFSET_Y)
-                draw_text(frame, str(countdown_number), pos,
-                          COUNTDOWN_COLOR, COUNTDOWN_FONT_SCALE, COUNTDOWN_THICKNESS)
-            else:
-                # Teken "GO!" op het frame
-                pos = (frame.shape[1] // 2 - GO_TEXT_OFFSET_X,
-                       frame.shape[0] // 2 + GO_TEXT_OFFSET_Y)
-                draw_text(frame, GO_TEXT, pos,
-                          GO_TEXT_COLOR, GO_TEXT_FONT_SCALE, GO_TEXT_THICKNESS)
-                if not race_manager.race_started:
-                    race_manager.start_race()
-                    for car in cars.values():
-                        car.last_lap_time = race_manager.race_start_time
-            return True  # Geef aan dat we nog in de countdown/race-start zitten
-    return False  # Countdown is voltooid, ga verder met de race
-
-def process_markers(cars, corners, ids, new_frame, race_manager):
-    """
-    Verwerkt de gedetecteerde ArUco-markers:
-      - Controleert dubbele verwerking binnen dezelfde detectieronde.
-      - Bereken het centrum (x, y) van elke marker.
-      - Update de positie van de auto (inclusief de opslag van de vorige positie).
-    """
-    # Set om al verwerkte markers in deze detectieronde bij te houden
-    processed_markers = set()
-
-    # Teken alle gedetecteerde markers in het frame
-    cv2.aruco.drawDetectedMarkers(new_frame, corners, ids)
-    print(f"Detected IDs: {ids}")
-    print(f"Detected Corners: {corners}")
-    
-    # Bereken de finish- en checkpoint-zones als polygonen
-    finish_box = cv2.boxPoints(FINISH_ZONE)
-    finish_box = np.int32(finish_box)
-    finish_box[:, 0] -= BLACK_BAR_WIDTH  # Correctie voor zijbalk
-    
-    checkpoint_box = cv2.boxPoints(CHECKPOINT_ZONE)
-    checkpoint_box = np.int32(checkpoint_box)
-    checkpoint_box[:, 0] -= BLACK_BAR_WIDTH  # Correctie voor zijbalk
-    
-    for i, marker_id in enumerate(ids.flatten()):
-        # Controleer of de marker al verwerkt is in deze detectieronde
-        if marker_id in processed_markers:
-            print(f"Marker ID {marker_id} is al verwerkt in deze detectieronde.")
-            continue
-        processed_markers.add(marker_id)
+        # Teken "GO!" op het frame
+        pos = (frame.shape[1] // 2 - GO_TEXT_OFFSET_X,
+               frame.shape[0] // 2 + GO_TEXT_OFFSET_Y)
+        draw_text(frame, GO_TEXT, pos,
+                  GO_TEXT_COLOR, GO_TEXT_FONT_SCALE, GO_TEXT_THICKNESS)
+
+def snapshot_race_state(cars, race_manager):
+    """
+    Maakt een ondiepe kopie van de auto's en de race_manager voor de render-stage.
+
+    De render-stage tekent frame N terwijl de logic-stage frame N+1 al verwerkt; door op
+    een snapshot te tekenen, ziet de renderer een consistente toestand van frame N.
+    Afbeeldingen worden gedeeld (alleen gelezen), veranderlijke lijsten worden gekopieerd.
+    """
+    cars_snapshot = {}
+    for marker_id, car in cars.items():
+        car_copy = copy.copy(car)
+        car_copy.lap_times = list(car.lap_times)
+        cars_snapshot[marker_id] = car_copy
+    race_manager_snapshot = copy.copy(race_manager)
+    race_manager_snapshot.finished_order = list(race_manager.finished_order)
+    return cars_snapshot, race_manager_snapshot
+
+def get_race_engine(cars, race_manager):
+    """
+    Geeft de RaceEngine van de race_manager en maakt deze aan bij de eerste aanroep (of als
+    er een andere set auto's wordt meegegeven).
+
+    De engine bevat de race-regels (passages, lappen, finish, ranking) en deelt de
+    finishvolgorde met de race_manager. De finish- en checkpointlijn zijn de lange assen van
+    FINISH_ZONE en CHECKPOINT_ZONE.
+    """
+    engine = race_manager.engine
+    if engine is None or engine.cars is not cars:
+        engine = RaceEngine.from_track(cars, PATH_POINTS, FINISH_ZONE, CHECKPOINT_ZONE, TOTAL_LAPS,
+                                       start_point=(350, 50), finished_order=race_manager.finished_order)
+        if race_manager.race_started:
+            engine.race_start_time = race_manager.race_start_time
+        race_manager.engine = engine
+    return engine
+
+def process_markers(cars, corners, ids, new_frame, race_manager, frame_time=None, homography=None,
+                    undistorter=None):
+    """
+    Verwerkt de gedetecteerde ArUco-markers van één camera:
+      - Corrigeert de hoekpunten voor lensvervorming (undistorter; zonder homografie die van
+        get_default_undistorter, als er een calibratie is). Bij de standaard verschuiving
+        bepaalt de correctie alleen grootte en afstand; de baan ligt in het getoonde beeld.
+      - Zet de markers om naar waarnemingen in baancoördinaten (via de homografie van de
+        camera; standaard de verschuiving over de zijbalk). Een marker die meerdere keren in
+        dezelfde detectieronde voorkomt, telt één keer.
+      - Verwerkt de waarnemingen met apply_observations (positie, bewegingsfilter, RaceEngine).
+
+    frame_time is het tijdstip waarop het frame is vastgelegd (standaard de huidige tijd van de
+    klok van de race_manager).
+    """
+    if frame_time is None:
+        frame_time = race_manager.clock.now()
+
+    # Teken alle gedetecteerde markers in het frame (als er een frame is meegegeven)
+    if new_frame is not None:
+        cv2.aruco.drawDetectedMarkers(new_frame, corners, ids)
+    logger.debug("Detected IDs: %s", ids)
+    logger.debug("Detected Corners: %s", corners)
+
+    if homography is None:
+        homography = _default_homography
+        undistorter = get_default_undistorter()
+    observations = observations_from_detection(corners, ids, frame_time, homography, undistorter=undistorter)
+    apply_observations(cars, observations, race_manager)
+    return new_frame
+
+def apply_observations(cars, observations, race_manager):
+    """
+    Verwerkt waarnemingen van markers (MarkerObservations in baancoördinaten, in tijdvolgorde):
+      - Update de positie en schaalfactor van de auto en het bewegingsfilter.
+      - Geeft het centrum als waarneming door aan de RaceEngine (checkpoint, lappen, finish).
+
+    De engine snijdt het segment tussen de vorige en de huidige waarneming met de checkpoint- en
+    finishlijn en interpoleert het passagetijdstip tussen de capture-tijden van de twee frames,
+    zodat lap-tijden niet op frames gekwantiseerd zijn (ook niet als er frames wegvallen).
+    Lineaire interpolatie tussen twee detecties is precies de baan van het constante-snelheidsmodel
+    van het bewegingsfilter, dus ook met een detect_interval > 1 blijven passagetijden sub-frame.
+    """
+    # De race-regels (in baancoördinaten)
+    engine = get_race_engine(cars, race_manager)
+
+    for observation in observations:
+        marker_id = observation.marker_id
 
         # Controleer of deze marker overeenkomt met een auto
-        if marker_id not in cars:
-            print(f"Marker ID {marker_id} komt niet overeen met een auto.")
+        car = cars.get(marker_id)
+        if car is None:
+            logger.debug("Marker ID %s komt niet overeen met een auto.", marker_id)
             continue
-    
-        car = cars[marker_id]
-        
-        # Bereken het centrum van de marker
-        x_center = int(np.mean(corners[i][0][:, 0]))
-        y_center = int(np.mean(corners[i][0][:, 1]))
-        
-        # Pas een positiecorrectie toe (indien nodig)
-        x_offset = 350 - 150  # Voorbeeld: 200 pixels correctie
-        y_offset = 50 - 50    # Geen verticale correctie in dit voorbeeld
-        adjusted_x = x_center + x_offset
-        adjusted_y = y_center + y_offset
-        print(f"Marker ID {marker_id}: Aangepaste positie: x = {adjusted_x}, y = {adjusted_y}")
-        
-        # Controleer of de marker binnen de checkpoint-zone ligt
-        if cv2.pointPolygonTest(checkpoint_box, (x_center, y_center), False) >= 0:
-            car.passed_checkpoint = True
-            print(f"Auto {marker_id} heeft de checkpoint gepasseerd.")
-        
-        # Controleer of de marker binnen de finish-zone ligt
-        if cv2.pointPolygonTest(finish_box, (x_center, y_center), False) >= 0:
-            # Controleer of de auto de checkpoint heeft gepasseerd en van links naar rechts beweegt
-            if car.passed_checkpoint and ((car.prev_x is None) or (adjusted_x > car.prev_x)):
-                if not car.finished:
-                    print(f"Marker ID {marker_id} passeert de finish.")
-                    car.increment_lap(time.time(), TOTAL_LAPS, race_manager)
-                    # Reset de checkpoint-status na het voltooien van een lap
-                    car.passed_checkpoint = False
-                    # Reset de lap text timer voor de "Lap Complete" melding
-                    car.lap_text_start_time = time.time()
+
+        # Precieze positie (float) voor de passage-detectie, afgerond voor de overlay
+        point = observation.center
+        adjusted_x = int(point[0])
+        adjusted_y = int(point[1])
+        logger.debug("Marker ID %s: positie: x = %s, y = %s (camera %s)",
+                     marker_id, adjusted_x, adjusted_y, observation.camera_id)
+
+        for event in engine.observe(marker_id, observation.timestamp, point[0], point[1]):
+            if isinstance(event, LapEvent):
+                logger.info("Marker ID %s passeert de finish op %.3f.", marker_id, event.time)
+                # Reset de lap text timer voor de "Lap Complete" melding
+                car.lap_text_start_time = observation.timestamp
             else:
-                print(f"Marker ID {marker_id}: Auto beweegt niet in de juiste richting of heeft de checkpoint niet gepasseerd.")
-        
-        # Bepaal de grootte (marker_size) van de marker om de afstand en schaalfactor te berekenen
-        width = np.linalg.norm(corners[i][0][0] - corners[i][0][1])
-        height = np.linalg.norm(corners[i][0][0] - corners[i][0][3])
-        marker_size = (width + height) / 2
-        distance = (MARKER_REAL_WIDTH * FOCAL_LENGTH) / marker_size
+                logger.debug("Marker ID %s: %s", marker_id, event)
+
+        # De afstand is al bij de waarneming berekend (gecorrigeerde hoekpunten, focale lengte
+        # van de calibratie of FOCAL_LENGTH); daaruit volgt de schaalfactor
+        distance = observation.distance
         scale_factor = max(INITIAL_SCALE_FACTOR * (1 / distance), MIN_SCALE_FACTOR)
-        print(f"Marker ID {marker_id}: width = {width}, height = {height}, marker_size = {marker_size}, distance = {distance}, scale_factor = {scale_factor}")
-        
-        # Update de positie van de auto
+        logger.debug("Marker ID %s: marker_size = %s, distance = %s, scale_factor = %s",
+                     marker_id, observation.confidence, distance, scale_factor)
+
+        # Update de positie van de auto en het bewegingsfilter
         car.update_position(adjusted_x, adjusted_y, scale_factor)
-        print(f"Auto {marker_id} bijgewerkte positie: x = {car.x}, y = {car.y}, scale_factor = {car.scale_factor}")
-    
-    return new_frame
+        car.motion.update(observation.timestamp, point, scale_factor)
+        logger.debug("Auto %s bijgewerkte positie: x = %s, y = %s, scale_factor = %s",
+                     marker_id, car.x, car.y, car.scale_factor)
 
 def process_frame_loop(cars, race_manager, cap, parameters, aruco_dict, expanded_path):
     """
     Beheert een continue lus om frames te verwerken met behulp van process_frame.
     """
-    while True:
-        ret, frame = cap.read()
-        if not ret or frame is None:
-            print("⚠️ Geen frame ontvangen van de camera. Controleer de verbinding.")
-            continue
-
-        try:
-            # Verwerk het frame via de bestaande process_frame-functie
-            processed_frame = process_frame(frame, race_manager, cars, parameters, aruco_dict, expanded_path)
-        except Exception as e:
-            print(f"❌ Fout bij verwerken frame: {e}")
-            continue
+    try:
+        while True:
+            ret, frame = cap.read()
+            if not ret or frame is None:
+                logger.warning("⚠️ Geen frame ontvangen van de camera. Controleer de verbinding.")
+                continue
 
-        # Toon het verwerkte frame
-        cv2.imshow("ArUco Auto Tracken met Ronde Detectie", processed_frame)
+            try:
+                # Verwerk het frame via de bestaande process_frame-functie
+                processed_frame = process_frame(frame, race_manager, cars, parameters, aruco_dict, expanded_path)
+            except Exception as e:
+                logger.error("❌ Fout bij verwerken frame: %s", e)
+                continue
 
-        # Controleer of het venster gesloten is of op Esc is gedrukt
-        key = cv2.waitKey(1) & 0xFF
-        if key == 27 or cv2.getWindowProperty("ArUco Auto Tracken met Ronde Detectie", cv2.WND_PROP_VISIBLE) < 1:
-            break
+            # Toon het verwerkte frame
+            cv2.imshow("ArUco Auto Tracken met Ronde Detectie", processed_frame)
 
-    # Zorg ervoor dat de camera netjes wordt vrijgegeven en vensters worden gesloten
-    cap.release()
-    cv2.destroyAllWindows()
+            # Controleer of het venster gesloten is of op Esc is gedrukt
+            key = cv2.waitKey(1) & 0xFF
+            if key == 27 or cv2.getWindowProperty("ArUco Auto Tracken met Ronde Detectie", cv2.WND_PROP_VISIBLE) < 1:
+                break
+    finally:
+        # Zorg ervoor dat de detector, de camera en de vensters netjes worden vrijgegeven
+        close_marker_detector()
+        cap.release()
+        cv2.destroyAllWindows()
     
 def run_race(cars, race_manager, cap):
     """
@@ -398,8 +615,9 @@ def run_race(cars, race_manager, cap):
     - race_manager: Het RaceManager-object dat de race beheert.
     - cap: OpenCV VideoCapture-object voor toegang tot de camera.
     """
+    capture = None
     try:
-        print("run_race is gestart!")  # Debug-uitvoer
+        logger.info("run_race is gestart!")
 
         # Definieer het ArUco-dictionary en de detectieparameters
         aruco_dict = cv2.aruco.getPredefinedDictionary(cv2.aruco.DICT_4X4_50)
@@ -407,40 +625,57 @@ def run_race(cars, race_manager, cap):
 
         # Maak het uitgezette pad (expanded_path) voor het parcours
         expanded_path = expand_path(PATH_POINTS, width=PATH_WIDTH)
-        print("Expanded path succesvol gegenereerd!")  # Debug-uitvoer
+        logger.debug("Expanded path succesvol gegenereerd!")
+
+        # Start de capture-thread: deze leest de camera en zet frames met timestamp in een queue
+        capture = CaptureThread(cap,
+                                queue_size=CAPTURE_CONFIG["queue_size"],
+                                policy=CAPTURE_CONFIG["policy"],
+                                read_retry_delay=CAPTURE_CONFIG["read_retry_delay"],
+                                clock=race_manager.clock)
+        capture.start()
 
         # Start de race-loop
         race_manager.initialized = False  # Nieuw attribuut om te controleren of alles is voorbereid
         while True:
-            # Lees een frame van de camera
-            ret, frame = cap.read()
-            if not ret or frame is None:
-                print("⚠️ Geen frame ontvangen van de camera. Controleer de verbinding.")
+            # Haal het volgende frame uit de capture-queue
+            captured = capture.read(timeout=CAPTURE_CONFIG["read_timeout"])
+            if captured is None:
+                logger.warning("⚠️ Geen frame ontvangen van de camera. Controleer de verbinding.")
                 continue
 
-            print("✅ Frame ontvangen!")  # Debug-uitvoer
+            logger.debug("✅ Frame %s ontvangen! (queue: %s, gedropt: %s)", captured.seq, capture.queue_depth, capture.dropped)
 
             # Probeer het frame te verwerken
+            start = time.perf_counter()
             try:
-                processed_frame = process_frame(frame, race_manager, cars, parameters, aruco_dict, expanded_path)
+                processed_frame = process_frame(captured.image, race_manager, cars, parameters, aruco_dict,
+                                                expanded_path, frame_time=captured.timestamp)
             except Exception as e:
-                print(f"❌ Fout bij verwerken frame: {e}")
+                logger.error("❌ Fout bij verwerken frame: %s", e)
                 continue
+            start = perf.lap("process_frame", start)
 
             # Toon het verwerkte frame (enkel hier!)
             cv2.imshow("Race Track Warrior", processed_frame)
+            perf.lap("imshow", start)
 
             # Controleer of de gebruiker het venster wil sluiten
             key = cv2.waitKey(1) & 0xFF
             if key == 27 or cv2.getWindowProperty("Race Track Warrior", cv2.WND_PROP_VISIBLE) < 1:
-                print("Programma wordt afgesloten...")
+                logger.info("Programma wordt afgesloten...")
                 break
 
-        # Zorg ervoor dat de camera netjes wordt vrijgegeven en vensters worden gesloten
-        cap.release()
-        cv2.destroyAllWindows()
+        logger.info("Capture-statistieken: %s", capture.stats())
+        logger.info("Performance per stage: %s", finish_perf_report())
 
     except Exception as e:
-        print(f"❌ Onverwachte fout in run_race: {e}")
+        logger.exception("❌ Onverwachte fout in run_race: %s", e)
+    finally:
+        # Stop de capture-thread vóór het vrijgeven van de camera; sluit de detector (workers
+        # en shared memory bij DETECTION_CONFIG["backend"] = "process")
+        if capture is not None:
+            capture.stop()
+        close_marker_detector()
         cap.release()
         cv2.destroyAllWindows()
\ No newline at end of file
@@ -1,7 +1,8 @@
 
 import cv2
 import numpy as np
-import time
+
+import race_clock
 
 class RaceManager:
     """
@@ -14,31 +15,43 @@ class RaceManager:
         countdown_start_time (float of None): Het tijdstip waarop de countdown is gestart; 
                                                als dit None is, is de countdown nog niet begonnen.
         race_start_time (float of None): Het tijdstip waarop de race daadwerkelijk is gestart.
+        clock: De klok (met now()) voor aanroepen zonder expliciet tijdstip.
+        engine (RaceEngine of None): De race-regels voor deze race (aangemaakt door race_logic.get_race_engine).
+        ranking_version (int): RaceEngine.ranking_version van het laatste frame; verandert alleen
+                               als de volgorde van de ranking verandert.
     """
     
-    def __init__(self, countdown_duration=3, cooldown_time=2):
+    def __init__(self, countdown_duration=3, cooldown_time=2, clock=None):
         """
         Initialiseert de RaceManager met de gegeven countdown- en cooldown-durations.
         De race wordt standaard niet gestart.
+
+        Alle methoden die een tijdstip nodig hebben, accepteren de timestamp van het frame
+        (now). Zonder timestamp wordt de klok gebruikt (standaard race_clock.get_clock()).
         """
+        self.clock = clock if clock is not None else race_clock.get_clock()
         self.countdown_duration = countdown_duration
         self.cooldown_time = cooldown_time
         self.race_started = False
         self.countdown_start_time = None
         self.race_start_time = None
         self.finished_order = []  # Nieuw: opslaan in welke volgorde auto's finishen
+        self.ready_start_time = None  # Tijdstip waarop "Ready?" voor het eerst getoond werd
+        self.countdown_number = None  # Laatst berekende countdown-waarde (voor het tekenen)
+        self.engine = None            # RaceEngine, zie race_logic.get_race_engine
+        self.ranking_version = 0      # Verandert zodra de volgorde van de ranking verandert
 
-    def start_countdown(self):
+    def start_countdown(self, now=None):
         """
         Start de countdown voor de race als deze nog niet actief is.
-        Dit stelt de variable 'countdown_start_time' in op de huidige tijd.
+        Dit stelt de variable 'countdown_start_time' in op de huidige tijd (of now).
         """        
         if self.countdown_start_time is None:
-            self.countdown_start_time = time.time()
+            self.countdown_start_time = now if now is not None else self.clock.now()
 
-    def update_countdown(self):
+    def update_countdown(self, now=None):
         """
-        Berekent de resterende countdown-tijd.
+        Berekent de resterende countdown-tijd op tijdstip now (standaard de huidige tijd).
 
         Returns:
             int of None:
@@ -51,7 +64,9 @@ class RaceManager:
         if self.countdown_start_time is None:
             return None  # Countdown is niet gestart
 
-        elapsed = time.time() - self.countdown_start_time
+        if now is None:
+            now = self.clock.now()
+        elapsed = now - self.countdown_start_time
         remaining = self.countdown_duration - elapsed
 
         if remaining > 0:
@@ -60,15 +75,15 @@ class RaceManager:
         else:
             return 0
 
-    def start_race(self):
+    def start_race(self, now=None):
         """
         Start de race:
           - Zet 'race_started' op True.
-          - Leg het tijdstip van de start vast in 'race_start_time'.
+          - Leg het tijdstip van de start (now, standaard de huidige tijd) vast in 'race_start_time'.
           - Reset de countdown (countdown_start_time wordt op None gezet).
         """
         self.race_started = True
-        self.race_start_time = time.time()
+        self.race_start_time = now if now is not None else self.clock.now()
         self.countdown_start_time = None
 
     def reset_race(self):
@@ -80,3 +95,7 @@ class RaceManager:
         self.race_started = False
         self.countdown_start_time = None
         self.race_start_time = None
+        self.ready_start_time = None
+        self.countdown_number = None
+        self.engine = None
+        self.ranking_version = 0
@@ -0,0 +1,464 @@
+# race_pipeline.py
+import queue
+import threading
+import time
+
+import cv2
+
+from config import (CAPTURE_CONFIG, PIPELINE_CONFIG, DETECTION_CONFIG, MARKER_REAL_WIDTH,
+                    CAMERAS, MULTI_CAMERA_CONFIG)
+from camera_capture import CaptureThread
+from marker_detection import create_marker_detector
+from multi_camera import CameraHomography, DetectionMerger, observations_from_detection
+from camera_calibration import create_corner_undistorter, check_capture_size
+from race_logic import (detect_markers, update_race_state, render_frame, snapshot_race_state,
+                        detection_due, predict_marker_positions, get_default_undistorter, camera_focal_length)
+from frame_buffers import FrameBufferPool
+from log_utils import get_logger
+from perf_stats import perf, finish_perf_report
+
+logger = get_logger(__name__)
+
+
+class PipelineFrame:
+    """
+    Eén frame dat door de pipeline stroomt.
+
+    Attributen:
+        seq (int): Volgnummer binnen de pipeline (aaneengesloten, vanaf 1).
+        timestamp (float): Tijdstip waarop het frame is vastgelegd.
+        image (numpy.ndarray): Het camerabeeld.
+        corners, ids: Resultaat van de detect-stage.
+        cars, race_manager: Snapshot van de race-status na de logic-stage.
+        output (numpy.ndarray): De gerenderde compositie na de render-stage.
+    """
+    __slots__ = ("seq", "timestamp", "image", "corners", "ids", "cars", "race_manager", "output")
+
+    def __init__(self, seq, timestamp, image):
+        self.seq = seq
+        self.timestamp = timestamp
+        self.image = image
+        self.corners = None
+        self.ids = None
+        self.cars = None
+        self.race_manager = None
+        self.output = None
+
+
+class CameraWorker(threading.Thread):
+    """
+    Capture- en detect-worker van een extra camera.
+
+    Detecteert de markers in de frames van zijn eigen CaptureThread (met een eigen detector,
+    zodat de ROI-tracks per camera blijven) en levert ze als waarnemingen in baancoördinaten
+    aan de DetectionMerger. De logic-stage haalt ze daar op volgorde van tijd op.
+    """
+
+    def __init__(self, camera_id, capture, detector, homography, merger, cars, read_timeout=1.0,
+                 undistorter=None):
+        """
+        Args:
+            camera_id (int): Het nummer van de camera (index in CAMERAS).
+            capture (CaptureThread): De (gestarte) capture-thread van deze camera.
+            detector (MarkerDetector): De markerdetector van deze camera.
+            homography (CameraHomography): Camerabeeld -> baancoördinaten.
+            merger (DetectionMerger): De gedeelde merger.
+            cars (dict): De Car-objecten (alleen gelezen, voor de ROI-voorspellingen).
+            read_timeout (float): Maximale wachttijd (s) op een frame van de capture-thread.
+            undistorter (CornerUndistorter, optional): Lenscorrectie van de markerhoeken.
+        """
+        super().__init__(name=f"CameraWorker-{camera_id}", daemon=True)
+        self.camera_id = camera_id
+        self.capture = capture
+        self.detector = detector
+        self.homography = homography
+        self.merger = merger
+        self.cars = cars
+        self.read_timeout = read_timeout
+        self.undistorter = undistorter
+        self._stop_event = threading.Event()
+
+        # Statistieken
+        self.frames_detected = 0
+
+    def run(self):
+        while not self._stop_event.is_set():
+            captured = self.capture.read(timeout=self.read_timeout)
+            if captured is None or not detection_due(captured.seq):
+                continue
+            try:
+                if self.undistorter is not None:
+                    self.undistorter.check_image_size(captured.image.shape[1], captured.image.shape[0])
+                predictions = predict_marker_positions(self.cars, captured.timestamp, self.homography,
+                                                       self.undistorter)
+                corners, ids = detect_markers(captured.image, self.detector, predictions)
+                self.merger.add(observations_from_detection(corners, ids, captured.timestamp,
+                                                            self.homography, self.camera_id, self.undistorter))
+            except Exception as e:
+                logger.error("❌ Fout bij detectie van camera %s: %s", self.camera_id, e)
+                continue
+            self.frames_detected += 1
+
+    def stop(self, timeout=1.0):
+        """
+        Stopt de worker en wacht (maximaal timeout seconden) tot deze klaar is.
+        """
+        self._stop_event.set()
+        if self.is_alive():
+            self.join(timeout)
+
+
+class RacePipeline:
+    """
+    Verwerkt frames in stages op aparte worker-threads:
+
+        capture -> detect (N workers) -> race-logica (1 worker) -> render (1 worker) -> weergave
+
+    De capture-stage is de CaptureThread. De detect-workers draaien parallel (cv2 geeft de
+    GIL vrij tijdens cvtColor en detectMarkers). De logic-stage zet de frames eerst weer op
+    volgorde (op volgnummer) zodat de race-status altijd in de juiste volgorde wordt
+    bijgewerkt, en geeft een snapshot door aan de render-stage. Weergave (cv2.imshow) gebeurt
+    op de thread die run() aanroept.
+
+    Alle queues tussen de stages zijn begrensd: als een stage achterloopt, blokkeren de
+    stages ervoor en laat de CaptureThread volgens zijn policy frames vallen. De doorvoer
+    wordt zo bepaald door de traagste stage in plaats van door de som van alle stages.
+
+    Met meerdere camera's (merger en cameras) bepaalt de eerste camera de frames die getoond
+    worden. Alle camera's, ook de eerste, leveren hun detecties als waarnemingen aan de
+    DetectionMerger; de logic-stage verwerkt per frame de samengevoegde waarnemingen tot en
+    met het tijdstip van dat frame.
+    """
+
+    def __init__(self, cars, race_manager, capture, detector,
+                 detect_workers=2, queue_size=2, read_timeout=1.0,
+                 homography=None, merger=None, cameras=(), undistorter=None):
+        """
+        Args:
+            cars (dict): De Car-objecten (key: marker_id).
+            race_manager (RaceManager): De race-status.
+            capture (CaptureThread): De (gestarte) capture-thread.
+            detector (MarkerDetector): De (thread-safe) markerdetector.
+            detect_workers (int): Aantal parallelle detect-workers.
+            queue_size (int): Maximale lengte van de queues tussen de stages.
+            read_timeout (float): Maximale wachttijd (s) op een frame van de capture-thread.
+            homography (CameraHomography, optional): Homografie van de (eerste) camera.
+            merger (DetectionMerger, optional): Merger voor de waarnemingen van alle camera's.
+            cameras (list): CameraWorkers van de extra camera's (gestart/gestopt met de pipeline).
+            undistorter (CornerUndistorter, optional): Lenscorrectie van de (eerste) camera bij
+                                                       een homografie (zonder homografie die van
+                                                       get_default_undistorter).
+        """
+        if merger is not None and homography is None:
+            homography = CameraHomography.from_offset()
+        self.cars = cars
+        self.race_manager = race_manager
+        self.capture = capture
+        self.detector = detector
+        self.detect_workers = max(1, detect_workers)
+        self.read_timeout = read_timeout
+        self.homography = homography
+        self.undistorter = undistorter
+        self.merger = merger
+        self.cameras = list(cameras)
+
+        self._detected = queue.Queue(maxsize=self.detect_workers * queue_size)
+        self._to_render = queue.Queue(maxsize=queue_size)
+        self._to_display = queue.Queue(maxsize=queue_size)
+
+        # Buffers voor: de frames in de display-queue, het frame dat gerenderd wordt en het
+        # frame dat op dit moment getoond wordt.
+        self._buffers = FrameBufferPool(num_buffers=queue_size + 2)
+
+        self._seq = 0
+        self._seq_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._threads = []
+
+        # Statistieken
+        self.frames_detected = 0
+        self.frames_rendered = 0
+        self.frames_displayed = 0
+
+    def _put(self, target_queue, item):
+        # Blokkerend plaatsen, maar wel reageren op stop()
+        while not self._stop_event.is_set():
+            try:
+                target_queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, source_queue):
+        try:
+            return source_queue.get(timeout=0.1)
+        except queue.Empty:
+            return None
+
+    def _detect_worker(self):
+        while not self._stop_event.is_set():
+            # Volgnummer toekennen onder een lock, zodat de volgnummers aaneengesloten zijn
+            with self._seq_lock:
+                captured = self.capture.read(timeout=self.read_timeout)
+                if captured is None:
+                    continue
+                self._seq += 1
+                item = PipelineFrame(self._seq, captured.timestamp, captured.image)
+
+            if not detection_due(item.seq):
+                # Overgeslagen frame (detect_interval): de logic-stage voorspelt de posities
+                self._put(self._detected, item)
+                continue
+
+            try:
+                undistorter = self.undistorter if self.homography is not None else get_default_undistorter()
+                if undistorter is not None:
+                    undistorter.check_image_size(item.image.shape[1], item.image.shape[0])
+                # De bewegingsfilters worden door de logic-worker bijgewerkt; lezen is thread-safe
+                predictions = predict_marker_positions(self.cars, item.timestamp, self.homography,
+                                                       self.undistorter)
+                item.corners, item.ids = detect_markers(item.image, self.detector, predictions)
+                if self.merger is not None:
+                    # Toevoegen vóór het doorgeven, zodat de logic-stage ze bij dit frame ziet
+                    self.merger.add(observations_from_detection(item.corners, item.ids, item.timestamp,
+                                                                self.homography, 0, self.undistorter))
+            except Exception as e:
+                # Het frame moet toch door naar de logic-stage, anders blijft de volgorde hangen
+                logger.error("❌ Fout bij detectie van frame %s: %s", item.seq, e)
+            self.frames_detected += 1
+            self._put(self._detected, item)
+
+    def _logic_worker(self):
+        pending = {}
+        next_seq = 1
+        while not self._stop_event.is_set():
+            item = self._get(self._detected)
+            if item is None:
+                continue
+            pending[item.seq] = item
+
+            # Verwerk de frames strikt op volgorde van volgnummer
+            while next_seq in pending:
+                item = pending.pop(next_seq)
+                next_seq += 1
+                try:
+                    observations = self.merger.pop_ready(item.timestamp) if self.merger is not None else None
+                    update_race_state(self.cars, self.race_manager, item.corners, item.ids,
+                                      item.timestamp, item.image.shape, observations=observations)
+                    start = time.perf_counter()
+                    item.cars, item.race_manager = snapshot_race_state(self.cars, self.race_manager)
+                    perf.lap("snapshot", start)
+                except Exception as e:
+                    logger.error("❌ Fout in race-logica voor frame %s: %s", item.seq, e)
+                    continue
+                if not self._put(self._to_render, item):
+                    return
+
+    def _render_worker(self):
+        while not self._stop_event.is_set():
+            item = self._get(self._to_render)
+            if item is None:
+                continue
+            start = time.perf_counter()
+            try:
+                new_frame, cam_view = self._buffers.acquire(item.image.shape)
+                cam_view[...] = item.image
+                item.output = render_frame(new_frame, cam_view, item.cars, item.race_manager,
+                                           item.corners, item.ids, item.timestamp)
+            except Exception as e:
+                logger.error("❌ Fout bij renderen van frame %s: %s", item.seq, e)
+                continue
+            perf.lap("render", start)
+            self.frames_rendered += 1
+            self._put(self._to_display, item)
+
+    def start(self):
+        """
+        Start de detect-, logic- en render-workers.
+        """
+        # De pipeline slaat het aparte initialisatieframe over: de eerste frames tonen de countdown
+        self.race_manager.initialized = True
+
+        workers = [(f"DetectWorker-{i}", self._detect_worker) for i in range(self.detect_workers)]
+        workers += [("LogicWorker", self._logic_worker), ("RenderWorker", self._render_worker)]
+        for name, target in workers:
+            thread = threading.Thread(target=target, name=name, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        for camera in self.cameras:
+            camera.start()
+
+    def run(self, window_name="Race Track Warrior"):
+        """
+        Toont de gerenderde frames (op de aanroepende thread) tot Esc of het sluiten van het venster.
+        """
+        self.start()
+        try:
+            while True:
+                item = self._get(self._to_display)
+                if item is None:
+                    continue
+                start = time.perf_counter()
+                cv2.imshow(window_name, item.output)
+                perf.lap("imshow", start)
+                self.frames_displayed += 1
+
+                key = cv2.waitKey(1) & 0xFF
+                if key == 27 or cv2.getWindowProperty(window_name, cv2.WND_PROP_VISIBLE) < 1:
+                    logger.info("Programma wordt afgesloten...")
+                    break
+        finally:
+            self.stop()
+
+    def stop(self, timeout=1.0):
+        """
+        Stopt alle workers en wacht (maximaal timeout seconden per worker) tot ze klaar zijn.
+        """
+        self._stop_event.set()
+        for camera in self.cameras:
+            camera.stop(timeout)
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def stats(self):
+        """
+        Geeft het aantal frames per stage en de huidige vulling van de queues.
+        """
+        stats = {
+            "detected": self.frames_detected,
+            "rendered": self.frames_rendered,
+            "displayed": self.frames_displayed,
+            "detect_queue": self._detected.qsize(),
+            "render_queue": self._to_render.qsize(),
+            "display_queue": self._to_display.qsize(),
+        }
+        if self.merger is not None:
+            stats["merger"] = self.merger.stats()
+            stats["camera_detected"] = {camera.camera_id: camera.frames_detected for camera in self.cameras}
+        return stats
+
+
+def detect_worker_count(detector):
+    """
+    Geeft het aantal detect-workers: PIPELINE_CONFIG["detect_workers"], maar minstens het
+    aantal processen van een ProcessPoolDetector (elke worker wacht op één proces).
+    """
+    return max(PIPELINE_CONFIG["detect_workers"], getattr(detector, "processes", 1))
+
+
+def run_race_pipelined(cars, race_manager, cap):
+    """
+    Variant van run_race die de frames via de RacePipeline verwerkt.
+
+    Parameters:
+    - cars: Dictionary met auto-objecten.
+    - race_manager: Het RaceManager-object dat de race beheert.
+    - cap: OpenCV VideoCapture-object voor toegang tot de camera.
+    """
+    capture = None
+    detector = None
+    try:
+        logger.info("run_race_pipelined is gestart!")
+
+        aruco_dict = cv2.aruco.getPredefinedDictionary(cv2.aruco.DICT_4X4_50)
+        parameters = cv2.aruco.DetectorParameters()
+
+        capture = CaptureThread(cap,
+                                queue_size=CAPTURE_CONFIG["queue_size"],
+                                policy=CAPTURE_CONFIG["policy"],
+                                read_retry_delay=CAPTURE_CONFIG["read_retry_delay"],
+                                clock=race_manager.clock)
+        capture.start()
+
+        check_capture_size(get_default_undistorter(), cap)
+        detector = create_marker_detector(aruco_dict, parameters, DETECTION_CONFIG, MARKER_REAL_WIDTH,
+                                          camera_focal_length(get_default_undistorter()))
+        pipeline = RacePipeline(cars, race_manager, capture, detector,
+                                detect_workers=detect_worker_count(detector),
+                                queue_size=PIPELINE_CONFIG["queue_size"],
+                                read_timeout=CAPTURE_CONFIG["read_timeout"])
+        pipeline.run()
+
+        logger.info("Pipeline-statistieken: %s", pipeline.stats())
+        logger.info("Capture-statistieken: %s", capture.stats())
+        logger.info("Performance per stage: %s", finish_perf_report())
+    except Exception as e:
+        logger.exception("❌ Onverwachte fout in run_race_pipelined: %s", e)
+    finally:
+        if capture is not None:
+            capture.stop()
+        if detector is not None:
+            detector.close()
+        cap.release()
+        cv2.destroyAllWindows()
+
+
+def run_race_multi_camera(cars, race_manager, caps, camera_configs=CAMERAS):
+    """
+    Variant van run_race_pipelined voor meerdere camera's (zie CAMERAS in config.py).
+
+    Elke camera krijgt een eigen CaptureThread en detector; de eerste camera loopt door de
+    detect-workers van de RacePipeline (en wordt getoond), de overige camera's door een
+    CameraWorker. Alle detecties worden via hun homografie naar baancoördinaten omgezet en in
+    de DetectionMerger samengevoegd.
+
+    Parameters:
+    - cars: Dictionary met auto-objecten.
+    - race_manager: Het RaceManager-object dat de race beheert.
+    - caps: Lijst met geopende VideoCapture-objecten, in de volgorde van camera_configs.
+    - camera_configs: De configuratie per camera (homografie of ijkpunten, calibratie).
+    """
+    captures = []
+    detectors = []
+    try:
+        logger.info("run_race_multi_camera is gestart met %s camera's!", len(caps))
+
+        aruco_dict = cv2.aruco.getPredefinedDictionary(cv2.aruco.DICT_4X4_50)
+        parameters = cv2.aruco.DetectorParameters()
+        merger = DetectionMerger(merge_window=MULTI_CAMERA_CONFIG["merge_window"])
+
+        homographies = []
+        undistorters = []
+        for camera_id, (cap, camera_config) in enumerate(zip(caps, camera_configs)):
+            capture = CaptureThread(cap,
+                                    queue_size=CAPTURE_CONFIG["queue_size"],
+                                    policy=CAPTURE_CONFIG["policy"],
+                                    read_retry_delay=CAPTURE_CONFIG["read_retry_delay"],
+                                    clock=race_manager.clock)
+            capture.name = f"CaptureThread-{camera_id}"
+            capture.start()
+            captures.append(capture)
+            homographies.append(CameraHomography.from_config(camera_config))
+            undistorters.append(create_corner_undistorter(camera_config.get("intrinsics")))
+            check_capture_size(undistorters[-1], cap)
+            detectors.append(create_marker_detector(aruco_dict, parameters, DETECTION_CONFIG, MARKER_REAL_WIDTH,
+                                                    camera_focal_length(undistorters[-1])))
+
+        cameras = [CameraWorker(camera_id, captures[camera_id], detectors[camera_id], homographies[camera_id],
+                                merger, cars, read_timeout=CAPTURE_CONFIG["read_timeout"],
+                                undistorter=undistorters[camera_id])
+                   for camera_id in range(1, len(captures))]
+        pipeline = RacePipeline(cars, race_manager, captures[0], detectors[0],
+                                detect_workers=detect_worker_count(detectors[0]),
+                                queue_size=PIPELINE_CONFIG["queue_size"],
+                                read_timeout=CAPTURE_CONFIG["read_timeout"],
+                                homography=homographies[0], merger=merger, cameras=cameras,
+                                undistorter=undistorters[0])
+        pipeline.run()
+
+        logger.info("Pipeline-statistieken: %s", pipeline.stats())
+        for capture in captures:
+            logger.info("Capture-statistieken (%s): %s", capture.name, capture.stats())
+        logger.info("Performance per stage: %s", finish_perf_report())
+    except Exception as e:
+        logger.exception("❌ Onverwachte fout in run_race_multi_camera: %s", e)
+    finally:
+        for capture in captures:
+            capture.stop()
+        for detector in detectors:
+            detector.close()
+        for cap in caps:
+            cap.release()
+        cv2.destroyAllWindows()
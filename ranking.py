@@ -0,0 +1,88 @@
+# ranking.py
+from itertools import count, islice
+from operator import le
+
+# Gedeelde teller voor IncrementalRanking.version (uniek over alle rankings heen)
+_versions = count(1)
+
+
+def ranking_key(car):
+    """
+    Geeft de sorteersleutel van een auto (oplopend = beter):
+      - Gefinishte auto's (met final_position) eerst, op final_position.
+      - Daarna de overige auto's op lap_count en progress (aflopend).
+    """
+    if car.finished and car.final_position is not None:
+        return (0, car.final_position)
+    return (1, -car.lap_count, -car.progress)
+
+
+class IncrementalRanking:
+    """
+    Houdt de volgorde van de ranking bij tussen frames, en meldt alleen wat er verandert.
+
+    Elke auto heeft een vaste slot (de volgorde waarin de marker_id's zijn opgegeven). De
+    vorige volgorde wordt bewaard; per update wordt eerst gecontroleerd of die volgorde met de
+    nieuwe sleutels nog klopt (één vergelijking per buurpaar, in C via map). Dat is het gewone
+    geval: de progress neemt toe, maar niemand haalt in. Alleen als er iets omgewisseld is,
+    wordt de bijna-gesorteerde volgorde opnieuw gesorteerd (timsort, lineair voor bijna
+    gesorteerde invoer), en alleen de auto's waarvan de plaats veranderd is, worden
+    teruggegeven. Bij gelijke sleutels blijft de vorige volgorde staan, zodat twee auto's op
+    hetzelfde punt van de baan niet elke frame van plaats wisselen.
+
+    version krijgt een nieuwe (oplopende, over alle rankings unieke) waarde zodra de volgorde
+    verandert; dat is een goedkoop signaal voor bijvoorbeeld de overlays.
+    """
+
+    def __init__(self):
+        self._ids = []      # slot -> marker_id
+        self._order = []    # index in de ranking -> slot
+        self.version = next(_versions)
+
+    def __len__(self):
+        return len(self._ids)
+
+    @property
+    def marker_ids(self):
+        """
+        De marker_id's in volgorde van de ranking.
+        """
+        ids = self._ids
+        return [ids[slot] for slot in self._order]
+
+    def update(self, marker_ids, keys):
+        """
+        Werkt de ranking bij met nieuwe sleutels (zie ranking_key).
+
+        Args:
+            marker_ids (list): De marker_id's per slot.
+            keys (list): De sleutels per slot (zelfde volgorde als marker_ids).
+
+        Returns:
+            list: (marker_id, nieuwe positie)-tuples voor de auto's waarvan de plaats in de
+                  ranking veranderd is (posities beginnen bij 1).
+        """
+        ids = self._ids
+        if marker_ids != ids:
+            # Andere auto's: volledig sorteren (stabiel, dus gelijke sleutels op slot-volgorde)
+            self._ids = ids = list(marker_ids)
+            self._order = sorted(range(len(keys)), key=keys.__getitem__)
+            self.version = next(_versions)
+            return [(ids[slot], index + 1) for index, slot in enumerate(self._order)]
+
+        order = self._order
+        ordered_keys = [keys[slot] for slot in order]
+        if all(map(le, ordered_keys, islice(ordered_keys, 1, None))):
+            return []
+
+        # Bijna gesorteerd: stabiel opnieuw sorteren binnen de vorige volgorde
+        new_order = [order[index] for index in sorted(range(len(order)), key=ordered_keys.__getitem__)]
+        self._order = new_order
+        self.version = next(_versions)
+        return [(ids[slot], index + 1)
+                for index, (slot, old_slot) in enumerate(zip(new_order, order)) if slot != old_slot]
+
+    def clear(self):
+        self._ids = []
+        self._order = []
+        self.version = next(_versions)
@@ -2,7 +2,166 @@ import cv2
 import numpy as np
 import config  # Zorg dat dit verwijst naar jouwe config.py waarin RANKING_LABELS staat
 
-def draw_ranking_bar(frame, sorted_cars, ranking_bar_config):
+
+class RankingBarRenderer:
+    """
+    Tekent de ranking bar met caches, zodat een ongewijzigde balk per frame één kopie is.
+
+    - Iconen: per auto-afbeelding en icon_size één keer geschaald (zonder alpha-kanaal).
+    - Tekstgroottes: cv2.getTextSize per (tekst, lettertype, schaal, dikte) één keer gemeten.
+    - Strook: de volledige balk (achtergrond, iconen en labels) wordt bewaard en alleen opnieuw
+      getekend als de framegrootte, de configuratie, de volgorde van de auto's of de labels
+      veranderen. Anders wordt de vorige strook over het frame gekopieerd. Met een
+      ranking_version (RaceManager.ranking_version) staat die voor de volgorde en de labels,
+      zodat de sleutel niet elke frame uit de auto's opgebouwd hoeft te worden.
+
+    Als de achtergrond al op het frame staat (draw_background=False, StaticOverlayLayer), worden
+    alleen de pixels gekopieerd die van de achtergrondkleur afwijken. Omdat de strook op dezelfde
+    achtergrondkleur is getekend, is het resultaat gelijk aan direct op het frame tekenen.
+    """
+
+    def __init__(self):
+        self._icons = {}
+        self._text_sizes = {}
+        self._strip_key = None
+        self._strip = None
+        self._strip_mask = None
+
+        # Statistieken
+        self.redraws = 0
+        self.reuses = 0
+
+    def get_icon(self, car_image, icon_size):
+        """
+        Geeft het (gecachete) BGR-icoon van een auto-afbeelding.
+        """
+        key = (id(car_image), icon_size)
+        entry = self._icons.get(key)
+        if entry is None or entry[0] is not car_image:
+            icon = cv2.resize(car_image, (icon_size, icon_size))
+            # Indien de afbeelding een alpha-kanaal heeft, gebruik dan enkel BGR-kanalen.
+            if icon.ndim == 3 and icon.shape[2] == 4:
+                icon = np.ascontiguousarray(icon[:, :, :3])
+            # De afbeelding wordt bewaard zodat het id niet hergebruikt wordt
+            entry = (car_image, icon)
+            self._icons[key] = entry
+        return entry[1]
+
+    def get_text_size(self, text, font, scale, thickness):
+        """
+        Geeft de (gecachete) uitkomst van cv2.getTextSize: ((breedte, hoogte), baseline).
+        """
+        key = (text, font, scale, thickness)
+        size = self._text_sizes.get(key)
+        if size is None:
+            size = cv2.getTextSize(text, font, scale, thickness)
+            self._text_sizes[key] = size
+        return size
+
+    def draw(self, frame, sorted_cars, ranking_bar_config, draw_background=True, ranking_version=None):
+        """
+        Tekent de ranking bar op het frame (zie draw_ranking_bar).
+        """
+        # Haal de configuratieparameters op, met defaultwaarden indien de sleutel niet aanwezig is.
+        ranking_bar_height = ranking_bar_config.get("ranking_bar_height", 100)
+        ranking_bar_bg_color = tuple(ranking_bar_config.get("ranking_bar_background_color", (50, 50, 50)))
+
+        # Haal de rankinglabels op uit de meegegeven config, of anders uit de globale config.
+        ranking_labels = ranking_bar_config.get("ranking_labels", None)
+        if ranking_labels is None:
+            ranking_labels = getattr(config, "RANKING_LABELS", {})
+
+        # Bepaal de afmetingen van het frame
+        frame_height, frame_width = frame.shape[:2]
+        bar_y = frame_height - ranking_bar_height
+        if bar_y < 0:
+            return frame
+
+        # Alles waar de inhoud van de strook van afhangt
+        config_key = tuple(sorted((k, repr(v)) for k, v in ranking_bar_config.items() if k != "ranking_labels"))
+        if ranking_version:
+            # De versie verandert met de volgorde (en dus de posities en labels) van de auto's
+            labels = None
+            key = (frame_width, ranking_bar_height, config_key, repr(ranking_labels), ranking_version)
+        else:
+            labels = self._labels(sorted_cars, ranking_labels)
+            key = (
+                frame_width,
+                ranking_bar_height,
+                config_key,
+                tuple((car.marker_id, id(getattr(car, "car_image", None))) for car in sorted_cars),
+                labels,
+            )
+        if key != self._strip_key:
+            if labels is None:
+                labels = self._labels(sorted_cars, ranking_labels)
+            self._render_strip(frame_width, sorted_cars, labels, ranking_bar_config, ranking_bar_bg_color)
+            self._strip_key = key
+            self.redraws += 1
+        else:
+            self.reuses += 1
+
+        bar = frame[bar_y:frame_height]
+        if draw_background:
+            bar[...] = self._strip
+        else:
+            cv2.copyTo(self._strip, self._strip_mask, bar)
+        return frame
+
+    @staticmethod
+    def _labels(sorted_cars, ranking_labels):
+        return tuple(ranking_labels.get(car.position, ranking_labels.get("default", f"{car.position}"))
+                     for car in sorted_cars)
+
+    def _render_strip(self, frame_width, sorted_cars, labels, ranking_bar_config, background_color):
+        ranking_bar_height = ranking_bar_config.get("ranking_bar_height", 100)
+        icon_size = ranking_bar_config.get("icon_size", 80)
+        text_font = ranking_bar_config.get("text_font", cv2.FONT_HERSHEY_SIMPLEX)
+        text_scale = ranking_bar_config.get("text_scale", 0.6)
+        text_color = ranking_bar_config.get("text_color", (255, 255, 255))
+        text_thickness = ranking_bar_config.get("text_thickness", 2)
+        text_offset = ranking_bar_config.get("text_offset", 10)
+
+        # Stap 1: De achtergrond van de ranking bar
+        strip = np.empty((ranking_bar_height, frame_width, 3), dtype=np.uint8)
+        strip[...] = background_color
+
+        num_cars = len(sorted_cars)
+        if num_cars > 0:
+            # Stap 2: Bepaal de horizontale spacing zodat elk icoon evenredig wordt verdeeld.
+            spacing = frame_width // (num_cars + 1)
+
+            # Stap 3: Voor elke auto in de gesorteerde lijst (coördinaten binnen de strook):
+            for idx, (car, ranking_text) in enumerate(zip(sorted_cars, labels)):
+                icon_center_x = spacing * (idx + 1)
+                icon_center_y = ranking_bar_height // 2
+
+                # Stap 3a: Indien de auto-afbeelding beschikbaar is, teken deze in het kader.
+                car_image = getattr(car, "car_image", None)
+                if car_image is not None:
+                    icon = self.get_icon(car_image, icon_size)
+                    x1 = icon_center_x - icon_size // 2
+                    y1 = icon_center_y - icon_size // 2
+                    x2 = x1 + icon_size
+                    y2 = y1 + icon_size
+                    # Controleer of de ROI binnen de grenzen van de strook valt.
+                    if x1 >= 0 and y1 >= 0 and x2 <= frame_width and y2 <= ranking_bar_height:
+                        strip[y1:y2, x1:x2] = icon
+
+                # Stap 3b: De rankingtekst, gecentreerd onder het icoon
+                (text_width, _), _ = self.get_text_size(ranking_text, text_font, text_scale, text_thickness)
+                text_x = icon_center_x - text_width // 2
+                text_y = ranking_bar_height - text_offset
+                cv2.putText(strip, ranking_text, (text_x, text_y), text_font, text_scale, text_color,
+                            text_thickness, cv2.LINE_AA)
+
+        self._strip = strip
+        # Pixels die van de achtergrond afwijken (voor frames waar de achtergrond al op staat)
+        differs = (strip != np.array(background_color, dtype=np.uint8)).any(axis=2)
+        self._strip_mask = differs.astype(np.uint8) * 255
+
+
+def draw_ranking_bar(frame, sorted_cars, ranking_bar_config, draw_background=True, ranking_version=None):
     """
     Tekent de ranking bar op het gegeven frame.
     
@@ -26,75 +185,20 @@ def draw_ranking_bar(frame, sorted_cars, ranking_bar_config):
         frame (numpy.ndarray): Het frame waarop de ranking bar wordt getekend.
         sorted_cars (list): Een gesorteerde lijst van Car-objecten, waarbij de auto met de beste positie eerst komt.
         ranking_bar_config (dict): Een dictionary met configuratieparameters voor de ranking bar.
+        draw_background (bool): Teken de achtergrond van de balk. Zet op False als de achtergrond
+                                al uit de StaticOverlayLayer komt.
+        ranking_version (int, optional): RaceManager.ranking_version; zolang die gelijk blijft,
+                                         wordt de strook hergebruikt zonder de auto's te bekijken.
     
+    De balk wordt getekend door een gedeelde RankingBarRenderer: iconen, tekstgroottes en de
+    volledige strook worden gecachet en alleen opnieuw getekend als de volgorde of de labels
+    veranderen.
+
     Returns:
         numpy.ndarray: Het frame met de getekende ranking bar.
     """
-    # Haal de configuratieparameters op, met defaultwaarden indien de sleutel niet aanwezig is.
-    ranking_bar_height = ranking_bar_config.get("ranking_bar_height", 100)
-    ranking_bar_bg_color = ranking_bar_config.get("ranking_bar_background_color", (50, 50, 50))
-    icon_size = ranking_bar_config.get("icon_size", 80)
-    text_font = ranking_bar_config.get("text_font", cv2.FONT_HERSHEY_SIMPLEX)
-    text_scale = ranking_bar_config.get("text_scale", 0.6)
-    text_color = ranking_bar_config.get("text_color", (255, 255, 255))
-    text_thickness = ranking_bar_config.get("text_thickness", 2)
-    text_offset = ranking_bar_config.get("text_offset", 10)
-    
-    # Haal de rankinglabels op uit de meegegeven config, of anders uit de globale config.
-    ranking_labels = ranking_bar_config.get("ranking_labels", None)
-    if ranking_labels is None:
-        ranking_labels = getattr(config, "RANKING_LABELS", {})
+    return _renderer.draw(frame, sorted_cars, ranking_bar_config, draw_background, ranking_version)
 
-    # Bepaal de afmetingen van het frame
-    frame_height, frame_width = frame.shape[:2]
-    
-    # De ranking bar wordt meestal in de onderste balk getekend; bepaal de y-positie hiervan:
-    bar_y = frame_height - ranking_bar_height
-
-    # Stap 1: Teken de achtergrond van de ranking bar als een rechthoek
-    cv2.rectangle(frame, (0, bar_y), (frame_width, frame_height), ranking_bar_bg_color, -1)
-
-    # Bepaal het aantal auto's dat getoond moet worden
-    num_cars = len(sorted_cars)
-    if num_cars == 0:
-        return frame
 
-    # Stap 2: Bepaal de horizontale spacing zodat elk icoon evenredig wordt verdeeld.
-    spacing = frame_width // (num_cars + 1)
-
-    # Stap 3: Voor elke auto in de gesorteerde lijst:
-    for idx, car in enumerate(sorted_cars):
-        # Bereken de gecentreerde positie voor het auto-icoon.
-        icon_center_x = spacing * (idx + 1)
-        icon_center_y = bar_y + ranking_bar_height // 2
-
-        # Stap 3a: Indien de auto-afbeelding beschikbaar is, teken deze in het kader.
-        if hasattr(car, "car_image") and car.car_image is not None:
-            # Verklein of schaal de auto-afbeelding tot icon_size x icon_size
-            icon = cv2.resize(car.car_image, (icon_size, icon_size))
-            # Bereken de linkerbovenhoek zodat het icoon gecentreerd getekend wordt.
-            x1 = icon_center_x - icon_size // 2
-            y1 = icon_center_y - icon_size // 2
-            x2 = x1 + icon_size
-            y2 = y1 + icon_size
-
-            # Controleer of de ROI binnen de grenzen van het frame valt.
-            if x1 >= 0 and y1 >= bar_y and x2 <= frame_width and y2 <= frame_height:
-                # Indien de afbeelding een alpha-kanaal heeft, gebruik dan enkel BGR-kanalen.
-                if icon.shape[2] == 4:
-                    icon = icon[:, :, :3]
-                frame[y1:y2, x1:x2] = icon
-
-        # Stap 3b: Stel de rankingtekst in d.m.v. de rankinglabels.
-        # Hier gaan we ervan uit dat 'car.position' al is bepaald (bijv. 1, 2, 3, etc.)
-        rank = car.position  
-        ranking_text = ranking_labels.get(rank, ranking_labels.get("default", f"{rank}"))
-                
-        # Bereken de grootte van de tekst zodat je deze kunt centreren.
-        (text_width, text_height), _ = cv2.getTextSize(ranking_text, text_font, text_scale, text_thickness)
-        text_x = icon_center_x - text_width // 2
-        # Zet de tekst dicht bij de onderkant van het frame (met text_offset)
-        text_y = frame_height - text_offset
-        cv2.putText(frame, ranking_text, (text_x, text_y), text_font, text_scale, text_color, text_thickness, cv2.LINE_AA)
-
-    return frame
+# De gedeelde renderer voor draw_ranking_bar (alleen gebruikt door de render-stage)
+_renderer = RankingBarRenderer()
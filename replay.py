@@ -0,0 +1,195 @@
+# replay.py
+import argparse
+import glob
+import os
+import time
+
+import cv2
+
+from config import CAR_CONFIG, PATH_POINTS, PATH_WIDTH
+from car_utils import initialize_cars
+from path_utils import expand_path
+from race_logic import process_frame, get_race_engine, close_marker_detector
+from race_engine import ranked_cars
+from race_manager import RaceManager
+from log_utils import get_logger
+import race_clock
+
+logger = get_logger(__name__)
+
+# Bestandstypen die als beeldreeks worden ingelezen
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp")
+
+
+def iter_frames(source, fps=30.0):
+    """
+    Leest frames uit een opgenomen bron en geeft ze met een gesimuleerde timestamp terug.
+
+    Args:
+        source: Een videobestand, een map met afbeeldingen (gesorteerd op naam), een lijst met
+                afbeeldingspaden, of een iterable met numpy-beelden of (timestamp, beeld)-tuples.
+        fps (float): Framerate voor de timestamps als de bron zelf geen timestamps heeft.
+                     Bij een videobestand wordt de framerate van de video gebruikt (indien bekend).
+
+    Yields:
+        tuple: (timestamp, image) met timestamp in seconden vanaf 0.
+    """
+    if isinstance(source, str) and os.path.isdir(source):
+        paths = sorted(p for p in glob.glob(os.path.join(source, "*")) if p.lower().endswith(IMAGE_EXTENSIONS))
+        yield from iter_frames(paths, fps)
+        return
+
+    if isinstance(source, str):
+        cap = cv2.VideoCapture(source)
+        if not cap.isOpened():
+            raise IOError(f"Kan de video '{source}' niet openen.")
+        video_fps = cap.get(cv2.CAP_PROP_FPS)
+        if video_fps and video_fps > 0:
+            fps = video_fps
+        try:
+            index = 0
+            while True:
+                ret, frame = cap.read()
+                if not ret or frame is None:
+                    break
+                yield index / fps, frame
+                index += 1
+        finally:
+            cap.release()
+        return
+
+    for index, item in enumerate(source):
+        if isinstance(item, tuple):
+            yield item
+        elif isinstance(item, str):
+            frame = cv2.imread(item)
+            if frame is None:
+                logger.warning("Afbeelding %s kon niet gelezen worden; overslaan.", item)
+                continue
+            yield index / fps, frame
+        else:
+            yield index / fps, item
+
+
+class RaceEventRecorder:
+    """
+    Verzamelt de events van de RaceEngine als dictionaries, met het framenummer erbij.
+
+    Events zijn dictionaries met "type" ("race_start", "checkpoint", "lap", "finish" of
+    "position"), "frame", "time" en (behalve bij de start) "marker_id", met per type
+    "lap" en "lap_time", "position", of "old_position" en "new_position".
+    """
+
+    def __init__(self, on_event=None):
+        self.events = []
+        self.frame_index = 0
+        self.on_event = on_event
+
+    def record(self, event):
+        """
+        Listener voor RaceEngine.add_listener.
+        """
+        entry = event.as_dict()
+        entry["frame"] = self.frame_index
+        self.events.append(entry)
+        if event.type in ("race_start", "lap", "finish"):
+            logger.info("Event: %s", entry)
+        else:
+            logger.debug("Event: %s", entry)
+        if self.on_event is not None:
+            self.on_event(entry)
+
+
+def run_replay(source, cars, race_manager=None, fps=30.0, skip_countdown=False, max_frames=None, on_event=None):
+    """
+    Speelt een opgenomen race headless af via process_frame, zo snel als de verwerking toelaat.
+
+    De replay loopt op een VirtualClock die per frame op de timestamp van dat frame wordt gezet
+    (ook als standaardklok, voor objecten die zonder eigen klok zijn aangemaakt). Countdown,
+    lap-tijden en overlays zien dus de opgenomen tijden.
+
+    Args:
+        source: Zie iter_frames.
+        cars (dict): De Car-objecten (key: marker_id).
+        race_manager (RaceManager, optional): Standaard een nieuwe RaceManager.
+        fps (float): Framerate als de bron zelf geen timestamps heeft.
+        skip_countdown (bool): Start de race direct bij het eerste frame (zonder "Ready?" en countdown).
+        max_frames (int, optional): Stop na dit aantal frames.
+        on_event (callable, optional): Wordt per event aangeroepen met de event-dictionary.
+
+    Returns:
+        dict: Met "frames", "wall_time" (inclusief het lezen/genereren van de frames),
+              "processing_time" (alleen process_frame), "fps" (op basis van processing_time),
+              "events" en "ranking" (marker_id's op positie).
+    """
+    clock = race_clock.VirtualClock()
+    if race_manager is None:
+        race_manager = RaceManager(clock=clock)
+    race_manager.clock = clock
+
+    aruco_dict = cv2.aruco.getPredefinedDictionary(cv2.aruco.DICT_4X4_50)
+    parameters = cv2.aruco.DetectorParameters()
+    expanded_path = expand_path(PATH_POINTS, width=PATH_WIDTH)
+
+    previous_clock = race_clock.set_clock(clock)
+    recorder = RaceEventRecorder(on_event)
+    engine = get_race_engine(cars, race_manager)
+    engine.add_listener(recorder.record)
+    frames = 0
+    processing_time = 0.0
+    start = time.perf_counter()
+    try:
+        race_manager.initialized = skip_countdown
+        for frame_index, (timestamp, frame) in enumerate(iter_frames(source, fps)):
+            if max_frames is not None and frame_index >= max_frames:
+                break
+            clock.set(timestamp)
+            recorder.frame_index = frame_index
+
+            if skip_countdown and not race_manager.race_started:
+                race_manager.start_race()
+                engine.start(race_manager.race_start_time)
+
+            frame_start = time.perf_counter()
+            process_frame(frame, race_manager, cars, parameters, aruco_dict, expanded_path, frame_time=timestamp)
+            processing_time += time.perf_counter() - frame_start
+            frames += 1
+    finally:
+        close_marker_detector()
+        race_clock.set_clock(previous_clock)
+
+    wall_time = time.perf_counter() - start
+    ranking = ranked_cars(cars)
+    return {
+        "frames": frames,
+        "wall_time": wall_time,
+        "processing_time": processing_time,
+        "fps": frames / processing_time if processing_time > 0 else 0.0,
+        "events": recorder.events,
+        "ranking": [car.marker_id for car in ranking],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Speel een opgenomen race headless af.")
+    parser.add_argument("source", help="Videobestand of map met afbeeldingen")
+    parser.add_argument("--fps", type=float, default=30.0, help="Framerate voor beeldreeksen")
+    parser.add_argument("--cars", default=",".join(CAR_CONFIG), help="Komma-gescheiden lijst met auto's (CAR_CONFIG-sleutels)")
+    parser.add_argument("--skip-countdown", action="store_true", help="Start de race direct bij het eerste frame")
+    parser.add_argument("--max-frames", type=int, default=None)
+    args = parser.parse_args()
+
+    participating_cars = [{"color": key, "username": key} for key in args.cars.split(",") if key]
+    cars = initialize_cars(participating_cars)
+    result = run_replay(args.source, cars, fps=args.fps, skip_countdown=args.skip_countdown,
+                        max_frames=args.max_frames)
+
+    for event in result["events"]:
+        if event["type"] != "position":
+            print(event)
+    print(f"{result['frames']} frames in {result['wall_time']:.2f} s ({result['fps']:.1f} fps)")
+    print(f"Eindstand (marker_id's): {result['ranking']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+# segment_index.py
+import bisect
+import math
+import numpy as np
+
+# Marge (in cellen) van het hint-venster langs de baan, bovenop de verplaatsing van de auto:
+# de cellen rond het punt bevatten ook segmenten die tot ongeveer twee cellen verder liggen
+HINT_MARGIN_CELLS = 2.0
+
+
+class SegmentGrid:
+    """
+    Uniform grid over de segmenten van een centerline.
+
+    Elke cel bevat de indices van de segmenten waarvan de bounding box de cel overlapt.
+    Een projectie test daardoor alleen de segmenten in de cellen rond het punt, in plaats van
+    alle segmenten van de baan. Dit loont voor dichte centerlines (duizenden punten, bijv.
+    uit een getraceerde baan); voor de handvol PATH_POINTS is de brute-force scan sneller.
+
+    De celindeling wordt opgeslagen in CSR-vorm: cell_start[c]:cell_start[c+1] geeft het bereik
+    in cell_segments met de segmenten van cel c.
+    """
+
+    def __init__(self, geometry, cell_size=None):
+        """
+        Bouwt de grid op uit een TrackGeometry.
+
+        Args:
+            geometry (TrackGeometry): De geometrie waarvan de segmenten geïndexeerd worden.
+            cell_size (float, optional): Zijde van een cel in pixels. Standaard gekozen op basis van
+                                         de gemiddelde segmentlengte, begrensd zodat er niet meer
+                                         dan ongeveer vier cellen per segment zijn.
+        """
+        self.geometry = geometry
+        starts = geometry.seg_starts
+        ends = geometry.seg_starts + geometry.seg_vectors
+
+        seg_min = np.minimum(starts, ends)
+        seg_max = np.maximum(starts, ends)
+        self.origin = seg_min.min(axis=0)
+        self._origin = tuple(self.origin.tolist())
+        extent = np.maximum(seg_max.max(axis=0) - self.origin, 1.0)
+
+        if cell_size is None:
+            mean_length = float(np.mean(geometry.seg_lengths)) if geometry.num_segments else 1.0
+            area_limited = math.sqrt(extent[0] * extent[1] / (4.0 * max(geometry.num_segments, 1)))
+            cell_size = max(2.0 * mean_length, area_limited, 1.0)
+        self.cell_size = float(cell_size)
+
+        self.nx = int(extent[0] // self.cell_size) + 1
+        self.ny = int(extent[1] // self.cell_size) + 1
+
+        # Bepaal per segment het bereik van cellen dat zijn bounding box raakt
+        cell_min = ((seg_min - self.origin) // self.cell_size).astype(np.int64)
+        cell_max = ((seg_max - self.origin) // self.cell_size).astype(np.int64)
+
+        buckets = [[] for _ in range(self.nx * self.ny)]
+        for seg, ((ix0, iy0), (ix1, iy1)) in enumerate(zip(cell_min.tolist(), cell_max.tolist())):
+            for iy in range(iy0, iy1 + 1):
+                row = iy * self.nx
+                for ix in range(ix0, ix1 + 1):
+                    buckets[row + ix].append(seg)
+
+        counts = np.fromiter((len(b) for b in buckets), dtype=np.int64, count=len(buckets))
+        self.cell_start = np.concatenate(([0], np.cumsum(counts)))
+        self.cell_segments = np.fromiter((seg for b in buckets for seg in b), dtype=np.intp,
+                                         count=int(self.cell_start[-1]))
+
+        # Voor het hint-venster: afstand tot één segment en zoeken langs de baan in gewone
+        # Python (sneller dan NumPy-aanroepen voor één segment of één waarde)
+        self.hint_margin = HINT_MARGIN_CELLS * self.cell_size
+        self._cum_distances = geometry.cum_distances.tolist()
+        self._seg_starts = geometry.seg_starts.tolist()
+        self._seg_vectors = geometry.seg_vectors.tolist()
+        self._safe_len_sq = geometry._safe_len_sq.tolist()
+
+        # Laagste en hoogste segmentindex per cel (lege cellen: bereik dat altijd binnen een
+        # hint-venster valt). Hiermee kan een hint-query zonder extra projectie bevestigd worden.
+        num_segments = geometry.num_segments
+        self.cell_min_segment = np.array([min(b) if b else num_segments for b in buckets],
+                                         dtype=np.int64).reshape(self.ny, self.nx)
+        self.cell_max_segment = np.array([max(b) if b else -1 for b in buckets],
+                                         dtype=np.int64).reshape(self.ny, self.nx)
+        self._cell_min_list = self.cell_min_segment.ravel().tolist()
+        self._cell_max_list = self.cell_max_segment.ravel().tolist()
+
+    def _cell_range(self, x0, y0, x1, y1):
+        ox, oy = self._origin
+        ix0 = max(int((x0 - ox) // self.cell_size), 0)
+        iy0 = max(int((y0 - oy) // self.cell_size), 0)
+        ix1 = min(int((x1 - ox) // self.cell_size), self.nx - 1)
+        iy1 = min(int((y1 - oy) // self.cell_size), self.ny - 1)
+        return ix0, iy0, ix1, iy1
+
+    def _segments_in_box(self, x0, y0, x1, y1):
+        """
+        Geeft de (unieke, oplopende) segmentindices van alle cellen die de box raken.
+        """
+        ix0, iy0, ix1, iy1 = self._cell_range(x0, y0, x1, y1)
+        if ix0 > ix1 or iy0 > iy1:
+            return np.empty(0, dtype=np.intp)
+
+        parts = []
+        for iy in range(iy0, iy1 + 1):
+            row = iy * self.nx
+            # Cellen in één rij liggen aaneengesloten in de CSR-array
+            parts.append(self.cell_segments[self.cell_start[row + ix0]:self.cell_start[row + ix1 + 1]])
+        return np.unique(np.concatenate(parts))
+
+    def _covers_grid(self, x0, y0, x1, y1):
+        return (x0 <= self.origin[0] and y0 <= self.origin[1]
+                and x1 >= self.origin[0] + self.nx * self.cell_size
+                and y1 >= self.origin[1] + self.ny * self.cell_size)
+
+    def _box_within_segments(self, x0, y0, x1, y1, lo, hi):
+        """
+        Controleert of alle segmenten in de cellen van de box binnen [lo, hi) vallen.
+        """
+        ix0, iy0, ix1, iy1 = self._cell_range(x0, y0, x1, y1)
+        # De box van een hint-query raakt maar een paar cellen: in gewone Python per rij
+        for iy in range(iy0, iy1 + 1):
+            row = iy * self.nx
+            if (min(self._cell_min_list[row + ix0:row + ix1 + 1], default=lo) < lo
+                    or max(self._cell_max_list[row + ix0:row + ix1 + 1], default=-1) >= hi):
+                return False
+        return True
+
+    def hint_range(self, px, py, hint_segment):
+        """
+        Het venster [lo, hi) van segmenten rond het hint-segment dat eerst getest wordt.
+
+        De afstand van het punt tot het hint-segment is de verplaatsing van de auto sinds de
+        vorige positie; het venster loopt langs cum_distances zo ver uit als die verplaatsing
+        plus hint_margin. Een snelle auto krijgt zo een groter venster dan een langzame.
+        """
+        sx, sy = self._seg_starts[hint_segment]
+        vx, vy = self._seg_vectors[hint_segment]
+        t = ((px - sx) * vx + (py - sy) * vy) / self._safe_len_sq[hint_segment]
+        t = min(max(t, 0.0), 1.0)
+        reach = math.hypot(px - sx - t * vx, py - sy - t * vy) + self.hint_margin
+        cum = self._cum_distances
+        lo = max(bisect.bisect_left(cum, cum[hint_segment] - reach) - 1, 0)
+        hi = min(bisect.bisect_right(cum, cum[hint_segment + 1] + reach), self.geometry.num_segments)
+        return lo, hi
+
+    def project_point(self, point, hint_segment=None):
+        """
+        Projecteert één punt op de centerline en test alleen segmenten in de buurt.
+
+        Zonder hint wordt een box rond het punt gezocht die één cel groot begint en verdubbelt
+        tot er kandidaten zijn. Met de beste afstand d als bovengrens volstaat daarna één query
+        van een box met straal d: elk segment dat dichterbij ligt, raakt die box en staat dus
+        in één van de cellen. Het resultaat is daarmee gelijk aan de brute-force scan.
+
+        Met een hint (het segment van de vorige positie van de auto) worden eerst alleen de
+        segmenten in het venster rond de hint getest (zie hint_range); hun afstand is meteen
+        een kleine bovengrens. Bevatten de cellen binnen die straal alleen segmenten uit het
+        venster, dan is het antwoord al exact en is er geen grid-query nodig; anders raakt de
+        query maar een paar cellen.
+
+        Args:
+            point (tuple): Het punt (x, y).
+            hint_segment (int, optional): Het segment waarop de auto het vorige frame lag.
+
+        Returns:
+            tuple: (progress, perp_distance, segment_index) als (float, float, int).
+        """
+        px, py = float(point[0]), float(point[1])
+        geometry = self.geometry
+
+        if hint_segment is not None and 0 <= hint_segment < geometry.num_segments:
+            lo, hi = self.hint_range(px, py, int(hint_segment))
+            result = geometry.project_onto_segments((px, py), slice(lo, hi))
+            radius = result[1]
+            if self._box_within_segments(px - radius, py - radius, px + radius, py + radius, lo, hi):
+                return result
+        else:
+            radius = self.cell_size
+            while True:
+                box = (px - radius, py - radius, px + radius, py + radius)
+                candidates = self._segments_in_box(*box)
+                if len(candidates):
+                    break
+                if self._covers_grid(*box):
+                    # Geen segmenten in de grid: val terug op de volledige scan
+                    return geometry.project_onto_segments((px, py), None)
+                radius *= 2.0
+            result = geometry.project_onto_segments((px, py), candidates)
+            if result[1] <= radius:
+                return result
+            radius = result[1]
+
+        candidates = self._segments_in_box(px - radius, py - radius, px + radius, py + radius)
+        if not len(candidates):
+            return geometry.project_onto_segments((px, py), None)
+        return geometry.project_onto_segments((px, py), candidates)
+
+    def project_points(self, points, hint_segments=None):
+        """
+        Projecteert een (N, 2) array van punten, met optioneel per punt een hint-segment.
+
+        Returns:
+            tuple: (progress, perp_distance, segment_index), elk een (N,) array.
+        """
+        pts = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        n = len(pts)
+        progress = np.empty(n, dtype=np.float64)
+        perp = np.empty(n, dtype=np.float64)
+        seg_idx = np.empty(n, dtype=np.intp)
+        for i in range(n):
+            hint = hint_segments[i] if hint_segments is not None else None
+            progress[i], perp[i], seg_idx[i] = self.project_point(pts[i], hint)
+        return progress, perp, seg_idx
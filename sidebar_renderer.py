@@ -0,0 +1,172 @@
+# sidebar_renderer.py
+import math
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+from config import FONT_SCALE_SIDEBAR, THICKNESS, LAP_COMPLETE_DURATION
+
+
+class TextGlyph:
+    """
+    Een voorgerenderde tekst: de anti-aliased pixels van cv2.putText op een zwarte achtergrond.
+
+    Attributen:
+        patch (numpy.ndarray): De tekst (BGR) op zwart.
+        mask (numpy.ndarray): uint8-masker (255 waar de tekst pixels heeft).
+        dx, dy (int): Positie van de linkerbovenhoek van de patch t.o.v. de tekst-oorsprong
+                      (de linkeronderhoek van de tekst, zoals bij cv2.putText).
+    """
+    __slots__ = ("patch", "mask", "dx", "dy")
+
+    def __init__(self, text, color, font, scale, thickness):
+        (width, height), baseline = cv2.getTextSize(text, font, scale, thickness)
+        margin = thickness + 1
+        self.dx = -margin
+        self.dy = -(height + margin)
+        self.patch = np.zeros((height + baseline + 2 * margin, width + 2 * margin, 3), dtype=np.uint8)
+        cv2.putText(self.patch, text, (margin, height + margin), font, scale, color, thickness, cv2.LINE_AA)
+        self.mask = (self.patch.any(axis=2)).astype(np.uint8) * 255
+
+
+class SidebarRenderer:
+    """
+    Tekent de auto-informatie in de zijbalken met voorgerenderde teksten.
+
+    Elke tekst (labels als "Total Time:", de gebruikersnaam, de lap en de tijden) wordt één keer
+    met cv2.putText gerenderd en als glyph-bitmap in een LRU-cache bewaard. Per frame wordt
+    per veld alleen de bitmap gemaskeerd over het frame gekopieerd; een veld wordt pas opnieuw
+    gerenderd als zijn tekst verandert. De vaste labels worden dus nooit opnieuw gerenderd.
+
+    De zijbalken zijn zwart (StaticOverlayLayer), dus het resultaat is gelijk aan direct op het
+    frame tekenen. De lopende totaaltijd verandert het vaakst; die wordt afgerond op
+    time_refresh_interval seconden, zodat hij niet elke frame een nieuwe bitmap nodig heeft.
+    """
+
+    def __init__(self, time_refresh_interval=0.1, max_glyphs=256, font=cv2.FONT_HERSHEY_SIMPLEX):
+        """
+        Args:
+            time_refresh_interval (float): Stapgrootte (s) van de getoonde totaaltijd (0 = elke frame).
+            max_glyphs (int): Maximaal aantal bitmaps in de cache.
+            font: Het OpenCV-lettertype.
+        """
+        self.time_refresh_interval = time_refresh_interval
+        self.max_glyphs = max_glyphs
+        self.font = font
+        self._glyphs = OrderedDict()
+
+        # Statistieken
+        self.renders = 0
+        self.hits = 0
+
+    def get_glyph(self, text, color, scale, thickness):
+        """
+        Geeft de (gecachete) bitmap van een tekst.
+        """
+        key = (text, tuple(color), scale, thickness)
+        glyph = self._glyphs.get(key)
+        if glyph is not None:
+            self._glyphs.move_to_end(key)
+            self.hits += 1
+            return glyph
+        glyph = TextGlyph(text, color, self.font, scale, thickness)
+        self._glyphs[key] = glyph
+        self.renders += 1
+        if len(self._glyphs) > self.max_glyphs:
+            self._glyphs.popitem(last=False)
+        return glyph
+
+    def draw_text(self, frame, text, position, color, scale=FONT_SCALE_SIDEBAR, thickness=THICKNESS):
+        """
+        Tekent een tekst met de oorsprong (linkeronderhoek) op position, zoals cv2.putText.
+        """
+        glyph = self.get_glyph(text, color, scale, thickness)
+        h, w = glyph.patch.shape[:2]
+        x = int(position[0]) + glyph.dx
+        y = int(position[1]) + glyph.dy
+
+        # Knip de bitmap af op de grenzen van het frame
+        frame_h, frame_w = frame.shape[:2]
+        sx1, sy1 = max(-x, 0), max(-y, 0)
+        sx2, sy2 = min(w, frame_w - x), min(h, frame_h - y)
+        if sx1 >= sx2 or sy1 >= sy2:
+            return
+        cv2.copyTo(glyph.patch[sy1:sy2, sx1:sx2], glyph.mask[sy1:sy2, sx1:sx2],
+                   frame[y + sy1:y + sy2, x + sx1:x + sx2])
+
+    def _round_time(self, seconds):
+        interval = self.time_refresh_interval
+        if not interval or interval <= 0:
+            return seconds
+        # Kleine marge tegen afrondfouten (bijv. 12.3 / 0.1 = 122.99999...)
+        return math.floor(seconds / interval + 1e-9) * interval
+
+    def car_fields(self, car, current_time, race_manager):
+        """
+        Bepaalt de teksten en posities van de velden van één auto.
+
+        Returns:
+            list: (tekst, positie)-tuples in tekenvolgorde.
+        """
+        lap_x, lap_y = car.lap_position
+        complete_x, complete_y = car.lap_complete_position
+        username = car.username if car.username is not None else car.color_key.capitalize()
+
+        # De gebruikersnaam (30 pixels boven de basispositie)
+        fields = [(username, (lap_x, lap_y - 30))]
+
+        # Controleer of de race is gestart
+        if not race_manager.race_started:
+            total_time_str = "0.000s"
+            best_lap_str = "N/A"
+            lap_str = "Lap 1"
+        else:
+            # Als de lap net is voltooid, toon "Lap Complete" en de lap-tijd
+            if (car.lap_text_start_time is not None
+                    and current_time - car.lap_text_start_time < LAP_COMPLETE_DURATION):
+                fields.append(("Lap Complete", (complete_x, complete_y)))
+                if car.lap_times and car.lap_times[-1] > 0:
+                    minutes, seconds = divmod(car.lap_times[-1], 60)
+                    fields.append(("Lap Time:", (complete_x, complete_y + 30)))
+                    fields.append((f"{int(minutes)}m {seconds:.2f}s", (complete_x, complete_y + 55)))
+
+            # De totale tijd (afgerond op time_refresh_interval zolang de auto nog rijdt)
+            if car.finished and car.finish_time is not None:
+                total_race_time = car.finish_time - race_manager.race_start_time
+            else:
+                total_race_time = self._round_time(current_time - race_manager.race_start_time)
+            total_minutes, total_seconds = divmod(total_race_time, 60)
+            total_time_str = f"{int(total_minutes)}m {total_seconds:.2f}s"
+
+            # De snelste ronde
+            best_lap_time = car.get_best_lap_time()
+            if best_lap_time:
+                best_minutes, best_seconds = divmod(best_lap_time, 60)
+                best_lap_str = f"{int(best_minutes)}m {best_seconds:.2f}s"
+            else:
+                best_lap_str = "N/A"
+
+            # De huidige ronde ("Finished" voor gefinishte auto's)
+            lap_str = "Finished" if car.finished else f"Lap {car.lap_count + 1}"
+
+        # Tijd- en ronde-informatie
+        total_label_y = lap_y + 35
+        total_value_y = total_label_y + 25
+        best_label_y = total_value_y + 35
+        best_value_y = best_label_y + 25
+        fields.extend([
+            (lap_str, (lap_x, lap_y)),
+            ("Total Time:", (lap_x, total_label_y)),
+            (total_time_str, (lap_x, total_value_y)),
+            ("Fastest Lap:", (lap_x, best_label_y)),
+            (best_lap_str, (lap_x, best_value_y)),
+        ])
+        return fields
+
+    def draw(self, frame, car, current_time, race_manager):
+        """
+        Tekent de velden van één auto op het frame.
+        """
+        for text, position in self.car_fields(car, current_time, race_manager):
+            self.draw_text(frame, text, position, car.color)
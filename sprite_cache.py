@@ -0,0 +1,162 @@
+# sprite_cache.py
+import math
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+from config import SPRITE_CACHE_CONFIG
+from log_utils import get_logger
+
+logger = get_logger(__name__)
+
+
+class Sprite:
+    """
+    Een voorgeschaalde afbeelding, klaar om over een frame te blenden.
+
+    Attributen:
+        premultiplied (numpy.ndarray): BGR (uint8), al vermenigvuldigd met alpha / 255.
+        inverse_alpha (numpy.ndarray): 255 - alpha, over 3 kanalen (uint8), of None voor een
+                                       afbeelding zonder alpha-kanaal (dan wordt er gekopieerd).
+        nbytes (int): Geheugengebruik van de sprite.
+    """
+    __slots__ = ("premultiplied", "inverse_alpha", "nbytes")
+
+    def __init__(self, premultiplied, inverse_alpha):
+        self.premultiplied = premultiplied
+        self.inverse_alpha = inverse_alpha
+        self.nbytes = premultiplied.nbytes + (inverse_alpha.nbytes if inverse_alpha is not None else 0)
+
+    @property
+    def shape(self):
+        return self.premultiplied.shape
+
+    @classmethod
+    def from_image(cls, image):
+        """
+        Maakt een sprite van een afbeelding op de huidige grootte.
+
+        Bij een alpha-kanaal wordt de kleur eenmalig voorvermenigvuldigd (afgerond, in uint16)
+        en wordt 255 - alpha over 3 kanalen bewaard, zodat blenden alleen nog uint8-bewerkingen zijn.
+
+        Args:
+            image (numpy.ndarray): BGR- of BGRA-afbeelding (uint8).
+        """
+        if image.ndim == 2 or image.shape[2] != 4:
+            return cls(np.ascontiguousarray(image), None)
+        alpha = image[:, :, 3:4].astype(np.uint16)
+        premultiplied = ((image[:, :, :3].astype(np.uint16) * alpha + 127) // 255).astype(np.uint8)
+        inverse_alpha = np.repeat(255 - alpha, 3, axis=2).astype(np.uint8)
+        return cls(premultiplied, inverse_alpha)
+
+
+class SpriteCache:
+    """
+    LRU-cache met voorgeschaalde auto-afbeeldingen, per afbeelding en schaal-bucket.
+
+    De schaalfactor van een auto verandert elk frame een klein beetje. Door de schaal te
+    kwantiseren in relatieve stappen van scale_step, is een frame meestal een cache-hit: de
+    cv2.resize van de volledige auto-afbeelding en het voorvermenigvuldigen met alpha gebeuren
+    alleen bij een nieuwe bucket. Het blenden per frame is dan één vermenigvuldiging en één
+    optelling op de ROI (zie image_utils.blend_sprite).
+
+    Sprites worden verwijderd (minst recent gebruikt eerst) zodra het totale geheugengebruik
+    boven max_bytes komt.
+    """
+
+    def __init__(self, max_bytes=32 * 1024 * 1024, scale_step=0.02):
+        """
+        Args:
+            max_bytes (int): Geheugenbudget in bytes.
+            scale_step (float): Relatieve stapgrootte van de schaal-buckets.
+        """
+        self.max_bytes = max_bytes
+        self.scale_step = scale_step
+        self._log_step = math.log1p(scale_step)
+        # key: (id(afbeelding), bucket) -> (afbeelding, Sprite). De afbeelding zelf wordt bewaard,
+        # zodat het id niet hergebruikt kan worden zolang de sprite in de cache staat.
+        self._entries = OrderedDict()
+        self.current_bytes = 0
+
+        # Statistieken
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def quantize(self, scale_factor):
+        """
+        Geeft de bucket en de bijbehorende (gekwantiseerde) schaal voor een schaalfactor.
+        """
+        bucket = int(round(math.log(scale_factor) / self._log_step))
+        return bucket, math.exp(bucket * self._log_step)
+
+    def get(self, image, scale_factor):
+        """
+        Geeft de sprite van image op de (gekwantiseerde) schaalfactor, en bouwt deze zo nodig.
+
+        Args:
+            image (numpy.ndarray): De originele afbeelding (BGR of BGRA).
+            scale_factor (float): De gewenste schaal.
+
+        Returns:
+            Sprite: De sprite, of None als de geschaalde afbeelding leeg zou zijn.
+        """
+        bucket, scale = self.quantize(scale_factor)
+        key = (id(image), bucket)
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] is image:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+        self.misses += 1
+        sprite = self._build(image, scale)
+        if sprite is None:
+            return None
+        if entry is not None:
+            self.current_bytes -= entry[1].nbytes
+        self._entries[key] = (image, sprite)
+        self._entries.move_to_end(key)
+        self.current_bytes += sprite.nbytes
+        self._evict()
+        return sprite
+
+    @staticmethod
+    def _build(image, scale):
+        width = int(round(image.shape[1] * scale))
+        height = int(round(image.shape[0] * scale))
+        if width <= 0 or height <= 0:
+            return None
+        return Sprite.from_image(cv2.resize(image, (width, height), interpolation=cv2.INTER_AREA))
+
+    def _evict(self):
+        # De laatst toegevoegde sprite blijft altijd staan, ook als hij alleen al boven het budget zit
+        while self.current_bytes > self.max_bytes and len(self._entries) > 1:
+            _, (_, sprite) = self._entries.popitem(last=False)
+            self.current_bytes -= sprite.nbytes
+            self.evictions += 1
+            logger.debug("Sprite-cache vol: sprite verwijderd (%s sprites, %s bytes).",
+                         len(self._entries), self.current_bytes)
+
+    def clear(self):
+        self._entries.clear()
+        self.current_bytes = 0
+
+    def stats(self):
+        """
+        Returns:
+            dict: Met "sprites", "bytes", "hits", "misses" en "evictions".
+        """
+        return {
+            "sprites": len(self._entries),
+            "bytes": self.current_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+# De gedeelde cache voor de auto-afbeeldingen (alleen gebruikt door de render-stage)
+sprite_cache = SpriteCache(max_bytes=SPRITE_CACHE_CONFIG["max_bytes"],
+                           scale_step=SPRITE_CACHE_CONFIG["scale_step"])
@@ -0,0 +1,104 @@
+# static_layer.py
+import cv2
+import numpy as np
+
+from config import (PATH_POINTS, PATH_WIDTH, FINISH_ZONE, CHECKPOINT_ZONE,
+                    BLACK_BAR_WIDTH, RANKING_BAR_CONFIG)
+from overlay_utils import draw_race_track, draw_finish_zone, draw_checkpoint_zone
+from path_utils import expand_path
+
+
+class StaticOverlayLayer:
+    """
+    Voorgerenderde laag met alles wat per frame gelijk blijft:
+      - De zwarte zijbalken.
+      - De achtergrond van de ranking bar.
+      - Het traject (expand_path van PATH_POINTS), de finish-zone en de checkpoint-zone.
+
+    De laag wordt één keer per framegrootte opgebouwd en pas opnieuw gerenderd als de
+    framegrootte of de betrokken configuratie wijzigt. Per frame wordt de laag met één
+    gemaskeerde kopie (np.copyto met 'where') over de compositie gelegd, in plaats van
+    expand_path, cv2.boxPoints en de polylines elke frame opnieuw uit te voeren.
+
+    Attributen:
+        image (numpy.ndarray): De laag in compositie-afmetingen (BGR).
+        mask (numpy.ndarray): Boolean masker (H, W, 1): True waar de laag het frame overschrijft.
+    """
+
+    def __init__(self):
+        self.image = None
+        self.mask = None
+        self._key = None
+
+    @staticmethod
+    def _config_key(frame_shape):
+        # Alle instellingen die de inhoud van de laag bepalen
+        return (
+            tuple(frame_shape[:2]),
+            tuple(tuple(p) for p in PATH_POINTS),
+            PATH_WIDTH,
+            FINISH_ZONE,
+            CHECKPOINT_ZONE,
+            BLACK_BAR_WIDTH,
+            RANKING_BAR_CONFIG.get("ranking_bar_height", 100),
+            tuple(RANKING_BAR_CONFIG.get("ranking_bar_background_color", (50, 50, 50))),
+        )
+
+    def get(self, frame_shape):
+        """
+        Geeft de laag voor de gegeven camera-framegrootte en bouwt deze zo nodig (opnieuw) op.
+
+        Args:
+            frame_shape (tuple): De shape van het camerabeeld (hoogte, breedte, ...).
+
+        Returns:
+            StaticOverlayLayer: self, zodat direct compose() aangeroepen kan worden.
+        """
+        key = self._config_key(frame_shape)
+        if key != self._key:
+            self._build(frame_shape[0], frame_shape[1])
+            self._key = key
+        return self
+
+    def _build(self, frame_height, frame_width):
+        ranking_bar_height = RANKING_BAR_CONFIG.get("ranking_bar_height", 100)
+        ranking_bar_bg_color = RANKING_BAR_CONFIG.get("ranking_bar_background_color", (50, 50, 50))
+        composite_height = frame_height + ranking_bar_height
+        composite_width = frame_width + 2 * BLACK_BAR_WIDTH
+
+        image = np.zeros((composite_height, composite_width, 3), dtype=np.uint8)
+
+        # Achtergrond van de ranking bar (onderaan, over de volle breedte)
+        cv2.rectangle(image, (0, frame_height), (composite_width, composite_height), ranking_bar_bg_color, -1)
+
+        # Traject en zones op een aparte laag, zodat we het masker kunnen afleiden.
+        # De lijnen worden zonder anti-aliasing getekend, dus elke niet-zwarte pixel hoort erbij.
+        track_layer = np.zeros_like(image)
+        draw_race_track(track_layer, expand_path(PATH_POINTS, PATH_WIDTH))
+        draw_finish_zone(track_layer)
+        draw_checkpoint_zone(track_layer)
+        track_mask = track_layer.any(axis=2)
+        # De ranking bar wordt na het traject getekend en gaat er dus overheen
+        track_mask[frame_height:, :] = False
+        image[track_mask] = track_layer[track_mask]
+
+        # Alles buiten de cameraregio (zijbalken + ranking bar) komt altijd uit de laag
+        mask = np.ones((composite_height, composite_width), dtype=bool)
+        mask[:frame_height, BLACK_BAR_WIDTH:BLACK_BAR_WIDTH + frame_width] = False
+        mask |= track_mask
+
+        self.image = image
+        self.mask = mask[:, :, None]
+
+    def compose(self, composite):
+        """
+        Legt de statische laag over de compositie (waarin het camerabeeld al staat).
+
+        Args:
+            composite (numpy.ndarray): De compositie in dezelfde afmetingen als de laag.
+
+        Returns:
+            numpy.ndarray: De compositie (in-place bijgewerkt).
+        """
+        np.copyto(composite, self.image, where=self.mask)
+        return composite
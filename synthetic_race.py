@@ -0,0 +1,254 @@
+# synthetic_race.py
+"""
+Genereert deterministische, synthetische racebeelden: ArUco-markers (DICT_4X4_50, net als
+Making_Aruco.py) die met een instelbare snelheid langs PATH_POINTS rijden.
+
+De beelden zijn camerabeelden zoals run_race ze krijgt: de baan ligt op PATH_POINTS min
+BLACK_BAR_WIDTH in x (process_markers telt die offset er weer bij op). Optioneel worden ruis,
+bewegingsonscherpte en occlusie toegevoegd. De frames kunnen in het geheugen gestreamd worden
+(als (timestamp, beeld), direct bruikbaar voor replay.run_replay) of naar een video geschreven.
+
+Naast de beelden berekent de generator de verwachte lap-events (ground truth), zodat een
+benchmark de lap-detectie kan controleren.
+
+Gebruik:
+    python synthetic_race.py race.mp4 --cars 4 --width 1280 --height 720
+"""
+import argparse
+
+import cv2
+import numpy as np
+
+from config import PATH_POINTS, BLACK_BAR_WIDTH, FINISH_ZONE, CHECKPOINT_ZONE, TOTAL_LAPS
+from track_geometry import TrackGeometry
+
+
+class SyntheticCar:
+    """
+    Eén marker die met constante snelheid langs de centerline rijdt.
+
+    Attributen:
+        marker_id (int): Het ArUco-ID.
+        start_distance (float): Raw afstand langs de centerline op t = 0.
+        speed (float): Snelheid in pixels per seconde.
+    """
+    __slots__ = ("marker_id", "start_distance", "speed", "patch")
+
+    def __init__(self, marker_id, start_distance, speed, patch):
+        self.marker_id = marker_id
+        self.start_distance = start_distance
+        self.speed = speed
+        self.patch = patch
+
+    def distance_at(self, t):
+        return self.start_distance + self.speed * t
+
+
+class SyntheticRaceGenerator:
+    """
+    Tekent per frame alle markers op hun positie langs de baan.
+
+    Alle willekeur (snelheden, ruis, occlusie) komt uit één np.random.Generator met een
+    vaste seed, zodat dezelfde instellingen altijd dezelfde beelden opleveren.
+    """
+
+    def __init__(self, num_cars=4, frame_size=(640, 480), fps=30.0, speed=300.0, speed_variation=0.0,
+                 marker_size=40, noise_sigma=0.0, blur_size=0, occlusion_prob=0.0, occlusion_fraction=0.4,
+                 background=200, seed=0, marker_ids=None):
+        """
+        Args:
+            num_cars (int): Aantal auto's (markers).
+            frame_size (tuple): (breedte, hoogte) van het camerabeeld.
+            fps (float): Framerate van de gegenereerde beelden.
+            speed (float): Basissnelheid in pixels per seconde.
+            speed_variation (float): Relatieve spreiding van de snelheid per auto (0.1 = ±10%).
+                                     Met spreiding kunnen auto's elkaar inhalen en overlappen.
+            marker_size (int): Zijde van de marker in pixels (zonder witte rand).
+            noise_sigma (float): Standaardafwijking van de Gaussische ruis (0 = geen ruis).
+            blur_size (int): Lengte van de bewegingsonscherpte in pixels (0 = geen blur).
+            occlusion_prob (float): Kans per auto per frame dat de marker deels bedekt is.
+            occlusion_fraction (float): Deel van de marker dat bij occlusie bedekt wordt.
+            background (int): Grijswaarde van de achtergrond.
+            seed (int): Seed voor alle willekeur.
+            marker_ids (list, optional): De marker-ID's; standaard 0 .. num_cars-1.
+        """
+        self.frame_width, self.frame_height = frame_size
+        self.fps = fps
+        self.marker_size = marker_size
+        self.noise_sigma = noise_sigma
+        self.blur_size = blur_size
+        self.occlusion_prob = occlusion_prob
+        self.occlusion_fraction = occlusion_fraction
+        self.background = background
+        self.rng = np.random.default_rng(seed)
+
+        self.geometry = TrackGeometry(PATH_POINTS)
+        self.finish_distance = self.geometry.project_point(FINISH_ZONE[0])[0]
+        self.checkpoint_distance = self.geometry.project_point(CHECKPOINT_ZONE[0])[0]
+
+        aruco_dict = cv2.aruco.getPredefinedDictionary(cv2.aruco.DICT_4X4_50)
+        if marker_ids is None:
+            marker_ids = list(range(num_cars))
+
+        # Verdeel de auto's gelijkmatig over de baan, de eerste net voorbij de finish
+        spacing = self.geometry.total_length / max(len(marker_ids), 1)
+        self.cars = []
+        for index, marker_id in enumerate(marker_ids):
+            marker = cv2.aruco.generateImageMarker(aruco_dict, marker_id, marker_size)
+            # Witte rand (quiet zone) zodat aangrenzende markers los van elkaar herkend worden
+            border = max(marker_size // 6, 2)
+            patch = cv2.copyMakeBorder(marker, border, border, border, border, cv2.BORDER_CONSTANT, value=255)
+            car_speed = speed * (1.0 + speed_variation * self.rng.uniform(-1.0, 1.0))
+            start = self.finish_distance + 20.0 - index * spacing
+            self.cars.append(SyntheticCar(marker_id, start, car_speed, patch))
+
+    def _draw_marker(self, frame, patch, center):
+        h, w = patch.shape[:2]
+        x0 = int(round(center[0] - w / 2.0))
+        y0 = int(round(center[1] - h / 2.0))
+        x1, y1 = x0 + w, y0 + h
+        cx0, cy0 = max(x0, 0), max(y0, 0)
+        cx1, cy1 = min(x1, frame.shape[1]), min(y1, frame.shape[0])
+        if cx1 <= cx0 or cy1 <= cy0:
+            return
+        frame[cy0:cy1, cx0:cx1] = patch[cy0 - y0:cy1 - y0, cx0 - x0:cx1 - x0, None]
+
+    def render(self, t):
+        """
+        Tekent het camerabeeld op tijdstip t (in seconden).
+
+        Returns:
+            numpy.ndarray: Het BGR-beeld.
+        """
+        frame = np.full((self.frame_height, self.frame_width, 3), self.background, dtype=np.uint8)
+
+        distances = [car.distance_at(t) for car in self.cars]
+        points, tangents = self.geometry.point_at(distances)
+        points[:, 0] -= BLACK_BAR_WIDTH  # Van compositie- naar cameracoördinaten
+
+        for car, center, tangent in zip(self.cars, points, tangents):
+            patch = car.patch
+            if self.blur_size > 1:
+                # Bewegingsonscherpte in de rijrichting
+                kernel = np.zeros((self.blur_size, self.blur_size), dtype=np.float32)
+                mid = self.blur_size // 2
+                cv2.line(kernel, (int(mid - tangent[0] * mid), int(mid - tangent[1] * mid)),
+                         (int(mid + tangent[0] * mid), int(mid + tangent[1] * mid)), 1.0, 1)
+                kernel /= max(kernel.sum(), 1e-6)
+                patch = cv2.filter2D(patch, -1, kernel, borderType=cv2.BORDER_REPLICATE)
+            self._draw_marker(frame, patch, center)
+
+            if self.occlusion_prob > 0 and self.rng.random() < self.occlusion_prob:
+                # Bedek een strook van de marker (bijv. een hand of een andere auto)
+                cover = int(self.marker_size * self.occlusion_fraction)
+                x0 = int(center[0] - self.marker_size / 2)
+                y0 = int(center[1] - self.marker_size / 2)
+                cv2.rectangle(frame, (x0, y0), (x0 + cover, y0 + self.marker_size), (60, 60, 60), -1)
+
+        if self.noise_sigma > 0:
+            noise = self.rng.normal(0.0, self.noise_sigma, frame.shape[:2]).astype(np.int16)
+            frame = np.clip(frame.astype(np.int16) + noise[:, :, None], 0, 255).astype(np.uint8)
+        return frame
+
+    def frames(self, duration):
+        """
+        Streamt de frames van 0 tot duration seconden.
+
+        Yields:
+            tuple: (timestamp, image), het formaat van replay.iter_frames.
+        """
+        num_frames = int(round(duration * self.fps))
+        for index in range(num_frames):
+            t = index / self.fps
+            yield t, self.render(t)
+
+    def write_video(self, path, duration, codec="mp4v"):
+        """
+        Schrijft de frames van 0 tot duration seconden naar een videobestand.
+
+        Returns:
+            int: Het aantal geschreven frames.
+        """
+        writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*codec), self.fps,
+                                 (self.frame_width, self.frame_height))
+        if not writer.isOpened():
+            raise IOError(f"Kan de video '{path}' niet schrijven.")
+        count = 0
+        try:
+            for _, frame in self.frames(duration):
+                writer.write(frame)
+                count += 1
+        finally:
+            writer.release()
+        return count
+
+    def expected_lap_events(self, duration, total_laps=TOTAL_LAPS):
+        """
+        Berekent de ground truth: wanneer elke auto een lap voltooit.
+
+        Net als process_markers telt een passage van de finish alleen als de auto sinds de
+        vorige lap de checkpoint gepasseerd is. De tijden zijn de exacte passagetijden van de
+        (op de centerline geprojecteerde) midden van de checkpoint- en finishzone.
+
+        Returns:
+            list: Dictionaries met "marker_id", "lap" en "time", gesorteerd op tijd.
+        """
+        length = self.geometry.total_length
+        events = []
+        for car in self.cars:
+            if car.speed <= 0:
+                continue
+            end = car.distance_at(duration)
+            crossings = []
+            for kind, offset in (("checkpoint", self.checkpoint_distance), ("finish", self.finish_distance)):
+                n = np.ceil((car.start_distance - offset) / length)
+                while offset + n * length <= end:
+                    crossings.append(((offset + n * length - car.start_distance) / car.speed, kind))
+                    n += 1
+            crossings.sort()
+
+            passed_checkpoint = False
+            laps = 0
+            for t, kind in crossings:
+                if t <= 0:
+                    continue
+                if kind == "checkpoint":
+                    passed_checkpoint = True
+                elif passed_checkpoint and laps < total_laps:
+                    laps += 1
+                    passed_checkpoint = False
+                    events.append({"marker_id": car.marker_id, "lap": laps, "time": t})
+        events.sort(key=lambda e: e["time"])
+        return events
+
+    def race_duration(self, total_laps=TOTAL_LAPS, margin=1.0):
+        """
+        Geeft de tijd (s) tot de traagste auto total_laps laps heeft voltooid, plus een marge.
+        """
+        slowest = min(car.speed for car in self.cars)
+        return (total_laps + 1) * self.geometry.total_length / slowest + margin
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Genereer een synthetische racevideo.")
+    parser.add_argument("output", help="Pad van de video (bijv. race.mp4)")
+    parser.add_argument("--cars", type=int, default=4)
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=480)
+    parser.add_argument("--fps", type=float, default=30.0)
+    parser.add_argument("--speed", type=float, default=300.0, help="Snelheid in pixels per seconde")
+    parser.add_argument("--noise", type=float, default=0.0)
+    parser.add_argument("--blur", type=int, default=0)
+    parser.add_argument("--occlusion", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    generator = SyntheticRaceGenerator(num_cars=args.cars, frame_size=(args.width, args.height), fps=args.fps,
+                                       speed=args.speed, noise_sigma=args.noise, blur_size=args.blur,
+                                       occlusion_prob=args.occlusion, seed=args.seed)
+    count = generator.write_video(args.output, generator.race_duration())
+    print(f"{count} frames geschreven naar {args.output}")
+
+
+if __name__ == "__main__":
+    main()
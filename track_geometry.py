@@ -0,0 +1,216 @@
+# track_geometry.py
+import numpy as np
+
+from segment_index import SegmentGrid
+
+# Vanaf dit aantal segmenten bouwt TrackGeometry automatisch een SegmentGrid op.
+# Voor kleinere banen is de gevectoriseerde brute-force scan sneller.
+INDEX_MIN_SEGMENTS = 1000
+
+
+class TrackGeometry:
+    """
+    Vooraf berekende geometrie van de centerline van de baan.
+
+    Alles wat per segment vastligt (startpunten, segmentvectoren, lengtes, cumulatieve
+    afstanden en de offset van het startpunt) wordt één keer berekend bij het aanmaken.
+    Daarna kan een willekeurig aantal punten in één gevectoriseerde NumPy-aanroep op de
+    centerline geprojecteerd worden, zonder per segment nieuwe arrays op te bouwen.
+
+    Attributen:
+        points (numpy.ndarray): (M, 2) array met de punten van de centerline.
+        seg_starts (numpy.ndarray): (M-1, 2) startpunten van de segmenten.
+        seg_vectors (numpy.ndarray): (M-1, 2) vectoren van segmentstart naar segmenteinde.
+        seg_lengths (numpy.ndarray): (M-1,) lengte van elk segment.
+        cum_distances (numpy.ndarray): (M,) cumulatieve afstand langs de centerline per punt.
+        total_length (float): De totale lengte van de centerline.
+        start_offset (float): De raw progress van het startpunt (wordt afgetrokken bij normaliseren).
+    """
+
+    def __init__(self, path_points, start_point=None, use_index=None):
+        """
+        Bouwt de geometrie op uit een lijst van (x, y)-punten.
+
+        Args:
+            path_points (list of tuple): De punten van de centerline.
+            start_point (tuple, optional): Het punt dat als start/finish geldt. Standaard het
+                                           eerste punt van de centerline.
+            use_index (bool, optional): Forceer (True) of verbied (False) een SegmentGrid.
+                                        Standaard alleen vanaf INDEX_MIN_SEGMENTS segmenten.
+        """
+        points = np.asarray(path_points, dtype=np.float64).reshape(-1, 2)
+        if len(points) < 2:
+            raise ValueError("Een centerline heeft minimaal twee punten nodig.")
+
+        self.points = points
+        self.seg_starts = points[:-1]
+        self.seg_vectors = np.diff(points, axis=0)
+        seg_len_sq = np.einsum("ij,ij->i", self.seg_vectors, self.seg_vectors)
+        self.seg_lengths = np.sqrt(seg_len_sq)
+        self.cum_distances = np.concatenate(([0.0], np.cumsum(self.seg_lengths)))
+        self.total_length = float(self.cum_distances[-1])
+
+        # Gedegenereerde segmenten (start == eind) krijgen lengte² 1 zodat we niet door 0 delen;
+        # hun segmentvector is nul, dus t wordt vanzelf 0 en de projectie valt op het startpunt.
+        self._safe_len_sq = np.where(seg_len_sq == 0, 1.0, seg_len_sq)
+
+        if use_index is None:
+            use_index = self.num_segments >= INDEX_MIN_SEGMENTS
+        self.segment_index = SegmentGrid(self) if use_index else None
+
+        if start_point is None:
+            start_point = points[0]
+        self.start_point = tuple(float(c) for c in start_point)
+        self.start_offset = self.project_point(self.start_point)[0]
+
+    @property
+    def num_segments(self):
+        return len(self.seg_lengths)
+
+    def project_points(self, points, hint_segments=None):
+        """
+        Projecteert één of meerdere punten op de centerline.
+
+        Voor elk punt wordt het segment met de kleinste loodrechte afstand gekozen (bij gelijke
+        afstand het eerste segment, net als de oorspronkelijke lus). Als er een SegmentGrid is,
+        worden alleen de segmenten in de buurt van elk punt getest.
+
+        Args:
+            points (array-like): Eén punt (x, y) of een (N, 2) array van punten.
+            hint_segments (sequence, optional): Per punt het segment van de vorige positie (of None).
+                                                Wordt alleen door de SegmentGrid gebruikt.
+
+        Returns:
+            tuple: (progress, perp_distance, segment_index), elk een (N,) array:
+                   - progress: raw afstand langs de centerline vanaf het eerste punt.
+                   - perp_distance: loodrechte afstand tot de centerline.
+                   - segment_index: index van het dichtstbijzijnde segment.
+        """
+        pts = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        if self.segment_index is not None:
+            return self.segment_index.project_points(pts, hint_segments)
+        return self.project_points_brute_force(pts)
+
+    def project_points_brute_force(self, points):
+        """
+        Projecteert punten door alle segmenten in één broadcast te testen (O(N * segmenten)).
+        """
+        pts = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+
+        # (N, S, 2): vector van elk segmentstartpunt naar elk punt
+        ap = pts[:, None, :] - self.seg_starts[None, :, :]
+        t = np.einsum("nsk,sk->ns", ap, self.seg_vectors) / self._safe_len_sq
+        np.clip(t, 0.0, 1.0, out=t)
+
+        diff = ap - t[:, :, None] * self.seg_vectors[None, :, :]
+        dist_sq = np.einsum("nsk,nsk->ns", diff, diff)
+
+        seg_idx = np.argmin(dist_sq, axis=1)
+        rows = np.arange(len(pts))
+        best_t = t[rows, seg_idx]
+        progress = self.cum_distances[seg_idx] + best_t * self.seg_lengths[seg_idx]
+        perp = np.sqrt(dist_sq[rows, seg_idx])
+        return progress, perp, seg_idx
+
+    def project_point(self, point, hint_segment=None):
+        """
+        Projecteert één punt en geeft scalaire waarden terug.
+
+        Returns:
+            tuple: (progress, perp_distance, segment_index) als (float, float, int).
+        """
+        if self.segment_index is not None:
+            return self.segment_index.project_point(point, hint_segment)
+        progress, perp, seg_idx = self.project_points_brute_force(point)
+        return float(progress[0]), float(perp[0]), int(seg_idx[0])
+
+    def project_onto_segments(self, point, segments):
+        """
+        Projecteert één punt op een deelverzameling van de segmenten.
+
+        Args:
+            point (tuple): Het punt (x, y).
+            segments (numpy.ndarray, slice or None): Oplopende segmentindices, of een slice
+                                                     voor een aaneengesloten bereik (zonder
+                                                     kopieën); None betekent alle segmenten.
+
+        Returns:
+            tuple: (progress, perp_distance, segment_index) als (float, float, int).
+        """
+        if segments is None:
+            segments = np.arange(self.num_segments)
+        p = np.asarray(point, dtype=np.float64)
+        ap = p - self.seg_starts[segments]
+        vectors = self.seg_vectors[segments]
+        t = np.einsum("sk,sk->s", ap, vectors) / self._safe_len_sq[segments]
+        np.clip(t, 0.0, 1.0, out=t)
+        diff = ap - t[:, None] * vectors
+        dist_sq = np.einsum("sk,sk->s", diff, diff)
+
+        best = int(np.argmin(dist_sq))
+        seg = segments.start + best if isinstance(segments, slice) else int(segments[best])
+        progress = self.cum_distances[seg] + t[best] * self.seg_lengths[seg]
+        return float(progress), float(np.sqrt(dist_sq[best])), seg
+
+    def point_at(self, distances):
+        """
+        Geeft de punten op de centerline op de gegeven raw afstanden (het omgekeerde van project_points).
+
+        Afstanden buiten [0, total_length] worden eerst modulo de baanlengte genomen (rondjes).
+
+        Args:
+            distances (float or array-like): Eén afstand of een (N,) array van afstanden.
+
+        Returns:
+            tuple: (points, tangents) als (N, 2) arrays; tangents zijn eenheidsvectoren in rijrichting.
+        """
+        d = np.mod(np.asarray(distances, dtype=np.float64).reshape(-1), self.total_length)
+        seg_idx = np.searchsorted(self.cum_distances, d, side="right") - 1
+        np.clip(seg_idx, 0, self.num_segments - 1, out=seg_idx)
+
+        lengths = self.seg_lengths[seg_idx]
+        t = (d - self.cum_distances[seg_idx]) / np.where(lengths == 0, 1.0, lengths)
+        points = self.seg_starts[seg_idx] + t[:, None] * self.seg_vectors[seg_idx]
+        tangents = self.seg_vectors[seg_idx] / np.where(lengths == 0, 1.0, lengths)[:, None]
+        return points, tangents
+
+    def normalize_progress(self, raw_progress):
+        """
+        Zet raw progress om naar progress ten opzichte van het startpunt, in [0, total_length).
+        Werkt zowel op een float als op een NumPy-array.
+        """
+        return (raw_progress - self.start_offset) % self.total_length
+
+
+_geometry_cache = {}
+# Snelle lookup op object-identiteit, zodat per frame geen sleutel van alle punten
+# opgebouwd hoeft te worden. Vervang de lijst (i.p.v. in-place aanpassen) als de baan wijzigt.
+_identity_cache = {}
+
+
+def get_track_geometry(path_points, start_point=None):
+    """
+    Geeft een (gecachte) TrackGeometry voor de gegeven centerline.
+
+    De geometrie wordt maar één keer per unieke combinatie van punten en startpunt opgebouwd,
+    zodat functies die elke frame worden aangeroepen geen segmentdata meer herberekenen.
+
+    Args:
+        path_points (list of tuple): De punten van de centerline (bijv. config.PATH_POINTS).
+        start_point (tuple, optional): Het start/finish-punt. Standaard het eerste punt.
+
+    Returns:
+        TrackGeometry: De bijbehorende geometrie.
+    """
+    start_key = tuple(start_point) if start_point is not None else None
+    cached = _identity_cache.get((id(path_points), start_key))
+    if cached is not None and cached[0] is path_points:
+        return cached[1]
+
+    key = (tuple(tuple(p) for p in path_points), start_key)
+    geometry = _geometry_cache.get(key)
+    if geometry is None:
+        geometry = TrackGeometry(path_points, start_point)
+        _geometry_cache[key] = geometry
+    _identity_cache[(id(path_points), start_key)] = (path_points, geometry)
+    return geometry
@@ -1,6 +1,10 @@
 import math
 import numpy as np
 
+from log_utils import get_logger
+
+logger = get_logger(__name__)
+
 def distance_between_points(p1, p2):
     """
     Bereken de Euclidische afstand tussen twee punten.
@@ -69,51 +73,6 @@ def project_point_to_segment(point, seg_start, seg_end):
     return proj_distance, perp_distance
 
 
-def project_to_centerline(point, centerline):
-    """
-    Berekent de progressie (afgelegde afstand) langs een centerline voor een gegeven punt.
-    Dit betekent: we bepalen hoe ver langs de centerline (de "middenlijn" van de baan) het punt ligt.
-    
-    De methode werkt als volgt:
-      1. Begin met een totaal lengte counter (total_length) gelijk aan 0.
-      2. Voor elk segment in de centerline:
-         - Projecteer 'point' op het segment (gebruik makend van project_point_to_segment).
-         - Als de loodrechte afstand (perp_distance) kleiner is dan de
-           huidige minimale gevonden afstand, onthoud dan de progress als:
-              best_progress = total_length + proj_distance.
-         - Tel de lengte van dit segment op bij total_length.
-      3. Geef de best gevonden progress-waarde (best_progress) terug.
-
-    Parameters:
-         point (tuple): Het punt (zoals de positie van een auto) in (x, y) die je wilt projecteren.
-         centerline (list of tuple): Een lijst van (x, y)-punten die de centerline van de baan definiëren.
-
-    Returns:
-         best_progress (float): De totale afgelegde afstand langs de centerline tot het punt dat 
-                                het dichtst bij 'point' ligt.
-    """
-    total_length = 0
-    best_progress = 0
-    min_perp_distance = float('inf')
-    
-    # Loop over elk segment in de centerline (elk paar opeenvolgende punten)
-    for i in range(len(centerline) - 1):
-        seg_start = centerline[i]
-        seg_end = centerline[i+1]
-        
-        # Projecteer het punt op dit segment
-        proj_distance, perp_distance = project_point_to_segment(point, seg_start, seg_end)
-        
-        # Als dit segment een kleinere loodrechte afstand heeft, onthoud dan de progress
-        if perp_distance < min_perp_distance:
-            min_perp_distance = perp_distance
-            best_progress = total_length + proj_distance
-        
-        # Tel de lengte van dit segment op bij de totale lengte
-        total_length += distance_between_points(seg_start, seg_end)
-        
-    return best_progress
-
 def process_detected_markers(new_frame, cars, parameters, aruco_dict, race_manager):
     """
     Detecteert ArUco-markers in new_frame en verwerkt ze.
@@ -122,8 +81,8 @@ def process_detected_markers(new_frame, cars, parameters, aruco_dict, race_manag
     corners, ids, _ = cv2.aruco.detectMarkers(gray, aruco_dict, parameters=parameters)
 
     # Debug: Bekijk de gedetecteerde ArUco-corners en IDs
-    print(f"Detected ArUco corners: {corners}")
-    print(f"Detected ArUco IDs: {ids}")
+    logger.debug("Detected ArUco corners: %s", corners)
+    logger.debug("Detected ArUco IDs: %s", ids)
     
     if ids is not None and len(ids) > 0:
         process_markers(cars, corners, ids, new_frame, race_manager)